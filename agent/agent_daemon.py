@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Long-running agent: keeps the HTTP pools, intent router, decision cache and the Ollama model
+warm, and answers questions from a queue with a pool of worker threads.
+
+    python agent/agent_daemon.py --workers 8 --llm-concurrency 2 --port 8100
+    curl -s localhost:8100/ask -d '{"question": "show version on leaf1"}'
+    python agent/agent_daemon.py --submit questions.txt --url http://localhost:8100
+    python agent/agent_daemon.py --submit questions.txt --workers 16     # in-process, then exit
+
+HTTP API (JSON, {"ok": ...} like the tool server):
+
+    POST /ask     {"question", "mode": "plan"|"turn", "wait": true}  -> the finished job, or its id
+    POST /submit  {"questions": [...], "mode", "wait": false}         -> job ids (or finished jobs)
+    GET  /jobs/<id>                                                   -> one job
+    GET  /stats                                                       -> queue, throughput, LLM gate
+
+"plan" runs agent_loop.run_agent (the planning loop), "turn" one decision and tool call
+(agent_turn). At most --llm-concurrency Ollama requests are in flight across all workers
+(agent_loop.llm_gate); workers waiting for the model queue there. A full queue answers 503.
+--submit reads one question per line (blank lines and # comments skipped), sends them as one
+batch and prints the jobs plus throughput and queue-depth statistics.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import agent_loop
+import http_client
+from agent_loop import (OLLAMA_API, OLLAMA_CHAT, OLLAMA_KEEP_ALIVE, OLLAMA_MODEL, agent_turn, get_decision_cache,
+                        get_router, llm_gate, run_agent)
+from tracing import trace
+
+AGENT_DAEMON_WORKERS = int(os.environ.get("AGENT_DAEMON_WORKERS", "8"))
+AGENT_DAEMON_QUEUE = int(os.environ.get("AGENT_DAEMON_QUEUE", "10000"))
+# finished jobs kept for GET /jobs/<id>, oldest dropped first
+AGENT_DAEMON_KEEP = int(os.environ.get("AGENT_DAEMON_KEEP", "10000"))
+# the same variable as agent_loop's cap, but a daemon defaults to 2 instead of no cap
+LLM_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_INFLIGHT", "2"))
+MODES = ("plan", "turn")
+
+
+def _pct(values, p):
+    if not values:
+        return None
+    s = sorted(values)
+    return round(s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))], 4)
+
+
+class AgentDaemon:
+    """Job queue plus worker threads around the agent; every method is thread-safe."""
+
+    def __init__(self, workers=AGENT_DAEMON_WORKERS, max_queue=AGENT_DAEMON_QUEUE, keep=AGENT_DAEMON_KEEP):
+        self.workers = workers
+        self.keep = keep
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._jobs = {}  # id -> job dict
+        self._done = {}  # id -> Event set when the job finishes
+        self._finished_ids = deque()  # finished job ids, oldest first, for trimming
+        self._ids = itertools.count(1)
+        self._threads = []
+        self._finished = deque(maxlen=10000)  # (finished_at, queue_s, run_s) of recent jobs
+        self.started = time.time()
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "running": 0,
+                         "max_queue_depth": 0}
+
+    def warm(self):
+        """
+        Open the pooled connections, build the router, open the decision cache, load the model
+        and have Ollama evaluate both system prompts once, so their prefix is already cached.
+        """
+        t0 = time.perf_counter()
+        get_router()
+        get_decision_cache()
+        keep_alive = {"keep_alive": OLLAMA_KEEP_ALIVE} if OLLAMA_KEEP_ALIVE else {}
+        client = http_client.get_client()
+        try:
+            # an empty prompt only loads the model
+            client.post(f"{OLLAMA_API}/api/generate", json=dict(model=OLLAMA_MODEL, prompt="", stream=False, **keep_alive))
+            if OLLAMA_CHAT:
+                for system in (agent_loop.system_prompt(), agent_loop.planner_prompt()):
+                    client.post(f"{OLLAMA_API}/api/chat", json=dict(
+                        model=OLLAMA_MODEL, messages=[{"role": "system", "content": system}], stream=False,
+                        options={"num_predict": 1}, **keep_alive))
+        except Exception as e:
+            print(f"[WARN] Ollama warm-up failed: {e}", file=sys.stderr)
+        return round(time.perf_counter() - t0, 3)
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"agent-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def submit(self, question, mode="plan"):
+        """Queue one question; returns the job id, or None when the queue is full."""
+        job_id = str(next(self._ids))
+        job = {"id": job_id, "question": question, "mode": mode, "status": "queued", "submitted": time.time()}
+        with self._lock:
+            try:
+                self._queue.put_nowait(job_id)
+            except queue.Full:
+                self.counters["rejected"] += 1
+                return None
+            self._jobs[job_id] = job
+            self._done[job_id] = threading.Event()
+            self.counters["submitted"] += 1
+            self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], self._queue.qsize())
+        return job_id
+
+    def job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or timeout); returns the job."""
+        with self._lock:
+            job, done = self._jobs.get(job_id), self._done.get(job_id)
+        if done is not None:
+            done.wait(timeout)
+        # the job dict itself, so a job trimmed from the history meanwhile is still returned
+        with self._lock:
+            return dict(job) if job is not None else None
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job["status"] = "running"
+                job["started"] = time.time()
+                self.counters["running"] += 1
+            try:
+                with trace() as trace_id:
+                    with self._lock:
+                        job["trace_id"] = trace_id
+                    if job["mode"] == "turn":
+                        decision, result = asyncio.run(agent_turn(job["question"]))
+                        out = {"decision": decision, "result": result}
+                    else:
+                        out = run_agent(job["question"])
+                status, extra = "done", {"result": out}
+            except Exception as e:
+                status, extra = "failed", {"error": f"{type(e).__name__}: {e}"}
+            finished = time.time()
+            with self._lock:
+                job.update(extra, status=status, finished=finished,
+                           queue_s=round(job["started"] - job["submitted"], 4),
+                           run_s=round(finished - job["started"], 4))
+                self.counters["running"] -= 1
+                self.counters["completed" if status == "done" else "failed"] += 1
+                self._finished.append((finished, job["queue_s"], job["run_s"]))
+                self._finished_ids.append(job_id)
+                while len(self._finished_ids) > self.keep:
+                    old_id = self._finished_ids.popleft()
+                    self._jobs.pop(old_id, None)
+                    self._done.pop(old_id, None)
+                done = self._done[job_id]
+            done.set()
+            self._queue.task_done()
+
+    def stats(self, window=60.0):
+        now = time.time()
+        with self._lock:
+            out = dict(self.counters, queue_depth=self._queue.qsize(), workers=self.workers)
+            recent = [f for f in self._finished if f[0] >= now - window]
+            queue_s = [f[1] for f in self._finished]
+            run_s = [f[2] for f in self._finished]
+        out.update({
+            "uptime_s": round(now - self.started, 1),
+            "throughput_per_s": round(len(recent) / min(window, max(now - self.started, 1e-9)), 3),
+            "queue_s": {"p50": _pct(queue_s, 50), "p95": _pct(queue_s, 95)},
+            "run_s": {"p50": _pct(run_s, 50), "p95": _pct(run_s, 95)},
+            "llm": llm_gate.stats(),
+            "http": http_client.get_client().metrics(),
+        })
+        return out
+
+
+def make_handler(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, obj, status=200):
+            data = json.dumps(obj, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                return self._send({"ok": True, "result": daemon.stats()})
+            if self.path.startswith("/jobs/"):
+                job = daemon.job(self.path[len("/jobs/"):])
+                if job is None:
+                    return self._send({"ok": False, "error": "job not found"}, 404)
+                return self._send({"ok": True, "result": job})
+            self._send({"ok": False, "error": "not found"}, 404)
+
+        def do_POST(self):
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            except ValueError:
+                return self._send({"ok": False, "error": "invalid JSON body"}, 400)
+            if not isinstance(body, dict):
+                return self._send({"ok": False, "error": "JSON body must be an object"}, 400)
+            mode = body.get("mode", "plan")
+            if mode not in MODES:
+                return self._send({"ok": False, "error": f"unknown mode: {mode}"}, 400)
+            if self.path == "/ask":
+                questions = [body.get("question")]
+            elif self.path == "/submit":
+                questions = body.get("questions")
+            else:
+                return self._send({"ok": False, "error": "not found"}, 404)
+            if not isinstance(questions, list) or not all(isinstance(q, str) and q.strip() for q in questions):
+                return self._send({"ok": False, "error": "question(s) required"}, 400)
+
+            ids = [daemon.submit(q.strip(), mode) for q in questions]
+            accepted = [i for i in ids if i is not None]
+            if len(accepted) < len(ids):
+                return self._send({"ok": False, "error": "queue full", "jobs": accepted}, 503)
+            if self.path == "/ask":
+                if not body.get("wait", True):
+                    return self._send({"ok": True, "job": accepted[0]})
+                return self._send({"ok": True, "result": daemon.wait(accepted[0])})
+            if body.get("wait"):
+                return self._send({"ok": True, "result": [daemon.wait(i) for i in accepted]})
+            return self._send({"ok": True, "jobs": accepted})
+
+    return Handler
+
+
+def read_questions(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def submit_batch(questions, mode, url=None, daemon=None):
+    """Run a batch through a running daemon (url) or an in-process one; returns (jobs, stats, wall_s)."""
+    t0 = time.perf_counter()
+    if url:
+        resp = requests.post(f"{url}/submit", json={"questions": questions, "mode": mode, "wait": True}, timeout=None)
+        jobs = resp.json()["result"]
+        stats = requests.get(f"{url}/stats", timeout=10).json()["result"]
+    else:
+        ids = [daemon.submit(q, mode) for q in questions]
+        jobs = [daemon.wait(i) for i in ids if i is not None]
+        stats = daemon.stats()
+    return jobs, stats, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=int(os.environ.get("AGENT_DAEMON_PORT", "8100")))
+    ap.add_argument("--workers", type=int, default=AGENT_DAEMON_WORKERS, help="questions processed concurrently")
+    ap.add_argument("--llm-concurrency", type=int, default=LLM_CONCURRENCY,
+                    help="Ollama requests in flight across all workers (0 = no cap)")
+    ap.add_argument("--max-queue", type=int, default=AGENT_DAEMON_QUEUE)
+    ap.add_argument("--submit", metavar="FILE", help="submit the questions in FILE as one batch and exit")
+    ap.add_argument("--url", help="with --submit: a running daemon (default: an in-process one)")
+    ap.add_argument("--mode", choices=MODES, default="plan")
+    ap.add_argument("--out", help="with --submit: also write the jobs and stats here as JSON")
+    ap.add_argument("--quiet", action="store_true", help="silence the agent's per-call output on stdout")
+    args = ap.parse_args()
+
+    if args.quiet:
+        sys.stdout = open(os.devnull, "w")
+    daemon = None
+    if not (args.submit and args.url):
+        llm_gate.set_limit(args.llm_concurrency)
+        # room for every worker's tool-session threads to keep their connections
+        http_client.HTTP_POOL_MAXSIZE = max(http_client.HTTP_POOL_MAXSIZE, args.workers * agent_loop.AGENT_WORKERS)
+        daemon = AgentDaemon(args.workers, args.max_queue)
+        warm_s = daemon.warm()
+        daemon.start()
+        print(f"[INFO] {args.workers} agent workers, {args.llm_concurrency or 'unlimited'} LLM requests in flight, "
+              f"warmed up in {warm_s}s", file=sys.stderr)
+
+    if args.submit:
+        questions = read_questions(args.submit)
+        jobs, stats, wall_s = submit_batch(questions, args.mode, args.url, daemon)
+        failed = sum(1 for j in jobs if j["status"] != "done")
+        print(f"[INFO] {len(jobs)} questions in {wall_s:.2f}s ({len(jobs) / wall_s:.2f}/s), {failed} failed, "
+              f"max queue depth {stats['max_queue_depth']}, queue wait p50/p95 "
+              f"{stats['queue_s']['p50']}/{stats['queue_s']['p95']}s, run p50/p95 "
+              f"{stats['run_s']['p50']}/{stats['run_s']['p95']}s, LLM waits {stats['llm']['waited']} "
+              f"(peak {stats['llm']['peak_in_flight']} in flight)", file=sys.stderr)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump({"wall_s": round(wall_s, 3), "stats": stats, "jobs": jobs}, f, indent=2, default=str)
+        return
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(daemon))
+    server.daemon_threads = True
+    print(f"[INFO] agent daemon on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,162 @@
 # --- paste this into agent/agent_loop.py (replace old versions) ---
-import os, json, requests, sys, re, datetime
-from prompts import SYSTEM_PROMPT
+import os, json, sys, datetime, time, asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from prompts import (EXAMPLE_COMMANDS, EXAMPLE_QUERY_FIELDS, RESPOND_JSON, build_planner_prompt, build_system_prompt,
+                     decision_messages, flatten_messages)
+from decision_cache import DecisionCache
+from device_lookup import fleet_filters, list_devices, mentioned_devices
+from intent_router import IntentRouter
+from http_client import AsyncHttpClient, get_client
+from ollama_stream import chat_until_decision, done_stats, generate_until_decision
+from json_extract import extract_json, is_decision, is_valid_decision
+from tracing import bind, current_trace_id, span, trace
 
 TOOL_SERVER = os.environ.get("TOOL_SERVER", "http://localhost:8000")
 OLLAMA_API = os.environ.get("OLLAMA_API", "http://localhost:11434")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3")
+# stream tokens and stop at the first complete decision object; OLLAMA_STREAM=0 waits for the full answer
+OLLAMA_STREAM = os.environ.get("OLLAMA_STREAM", "1") == "1"
+# /api/chat with the system prompt as a pinned system message, so Ollama reuses its evaluated
+# prefix across calls; OLLAMA_CHAT=0 flattens the same messages into /api/generate prompts
+OLLAMA_CHAT = os.environ.get("OLLAMA_CHAT", "1") == "1"
+# how long Ollama keeps the model (and its prompt cache) loaded after a call; "" = server default (5m)
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+last_ollama_timing = {}
 
-def ask_ollama(prompt):
-    """Call Ollama and return the raw string content. Logs raw output for debugging."""
-    url = f"{OLLAMA_API}/api/generate"
-    payload = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False}
+# persistent decision cache; DECISION_CACHE=0 disables it
+DECISION_CACHE = os.environ.get("DECISION_CACHE", "1") == "1"
+DECISION_CACHE_PATH = os.environ.get("DECISION_CACHE_PATH", str(Path(__file__).parent / ".decision_cache.sqlite3"))
+DECISION_CACHE_TTL = float(os.environ.get("DECISION_CACHE_TTL", str(7 * 24 * 3600)))
+DECISION_CACHE_MAX = int(os.environ.get("DECISION_CACHE_MAX", "10000"))
+_decision_cache = None
+
+def get_decision_cache():
+    """Open the shared decision cache lazily (None when disabled)."""
+    global _decision_cache
+    if DECISION_CACHE and _decision_cache is None:
+        _decision_cache = DecisionCache(DECISION_CACHE_PATH, ttl=DECISION_CACHE_TTL, max_entries=DECISION_CACHE_MAX)
+    return _decision_cache
+
+class LlmGate:
+    """
+    Caps the Ollama requests in flight from this process (limit 0 = no cap) so concurrent
+    agent workers queue here instead of oversubscribing the model. Counts waits and the peak.
+    """
+
+    def __init__(self, limit=0):
+        self.limit = limit
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters = {"calls": 0, "waited": 0, "wait_s": 0.0, "peak_in_flight": 0}
+
+    def set_limit(self, limit):
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one slot for the block; yields the seconds spent waiting for it."""
+        t0 = time.perf_counter()
+        with self._cond:
+            if self.limit and self.in_flight >= self.limit:
+                self.counters["waited"] += 1
+                self.waiting += 1
+                while self.limit and self.in_flight >= self.limit:
+                    self._cond.wait()
+                self.waiting -= 1
+            self.in_flight += 1
+            waited = time.perf_counter() - t0
+            self.counters["calls"] += 1
+            self.counters["wait_s"] += waited
+            self.counters["peak_in_flight"] = max(self.counters["peak_in_flight"], self.in_flight)
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, wait_s=round(self.counters["wait_s"], 4), limit=self.limit,
+                        in_flight=self.in_flight, waiting=self.waiting)
+
+# Ollama requests in flight from this process; 0 = no cap (the agent daemon sets one)
+OLLAMA_MAX_INFLIGHT = int(os.environ.get("OLLAMA_MAX_INFLIGHT", "0"))
+llm_gate = LlmGate(OLLAMA_MAX_INFLIGHT)
+
+def ask_ollama(messages, accept=is_valid_decision):
+    """
+    Call Ollama with chat messages (a plain string is sent as one prompt) and return the raw
+    string content. Logs raw output for debugging.
+    """
+    global last_ollama_timing
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+        prompt = messages[0]["content"]
+    else:
+        prompt = flatten_messages(messages)
+    with span("ollama", model=OLLAMA_MODEL, stream=OLLAMA_STREAM, chat=OLLAMA_CHAT,
+              prompt_bytes=len(prompt.encode())) as sp:
+        with llm_gate.slot() as waited:
+            raw, timing = _ask_ollama(messages if OLLAMA_CHAT else prompt, accept)
+        last_ollama_timing = timing
+        sp["response_bytes"] = len(raw.encode())
+        sp["gate_wait_s"] = round(waited, 4)
+        sp.update({k: v for k, v in timing.items()
+                   if k.endswith("_s") or k in ("stopped_early", "prompt_eval_count")})
+    return raw
+
+def _ask_ollama(request, accept):
+    """
+    request is a chat message list (/api/chat) or a prompt string (/api/generate).
+    Returns (raw, timing); timing is per call so concurrent callers never see each other's.
+    """
+    chat = not isinstance(request, str)
+    if OLLAMA_STREAM:
+        stream_fn = chat_until_decision if chat else generate_until_decision
+        try:
+            res = stream_fn(get_client(), OLLAMA_API, OLLAMA_MODEL, request, accept=accept,
+                            keep_alive=OLLAMA_KEEP_ALIVE or None)
+        except Exception as e:
+            res = {"raw": json.dumps({"__ollama_error": str(e)}), "stopped_early": False,
+                   "time_to_decision_s": None, "total_s": None}
+        timing = {k: v for k, v in res.items() if k not in ("raw", "decision")}
+        raw = res["raw"]
+        ttd = res["time_to_decision_s"]
+        print(f"[INFO] time-to-decision: {f'{ttd:.3f}s' if ttd is not None else 'n/a'}, "
+              f"generation: {res['total_s'] or 0:.3f}s{' (stopped early)' if res['stopped_early'] else ''}")
+        print(f"[{datetime.datetime.utcnow().isoformat()}] OLLAMA RAW RESPONSE:\n{raw}\n---end raw---")
+        return raw, timing
+
+    url = f"{OLLAMA_API}/api/chat" if chat else f"{OLLAMA_API}/api/generate"
+    payload = {"model": OLLAMA_MODEL, "stream": False}
+    payload.update({"messages": request} if chat else {"prompt": request})
+    if OLLAMA_KEEP_ALIVE:
+        payload["keep_alive"] = OLLAMA_KEEP_ALIVE
+    t0 = time.perf_counter()
     try:
-        r = requests.post(url, json=payload, timeout=60)
+        r = get_client().post(url, json=payload)
         r.raise_for_status()
         data = r.json()
     except Exception as e:
         data = {"__ollama_error": str(e)}
+    elapsed = time.perf_counter() - t0
+    timing = {"time_to_decision_s": elapsed, "total_s": elapsed, "stopped_early": False}
+    if isinstance(data, dict):
+        timing.update(done_stats(data))
 
     # normalize to a raw string representation
     raw = ""
     if isinstance(data, dict):
         if "response" in data:
             raw = data["response"]
+        elif isinstance(data.get("message"), dict):
+            raw = data["message"].get("content") or ""
         elif "choices" in data and data["choices"]:
             c0 = data["choices"][0]
             if isinstance(c0, dict):
@@ -34,90 +169,153 @@ def ask_ollama(prompt):
         raw = str(data)
 
     print(f"[{datetime.datetime.utcnow().isoformat()}] OLLAMA RAW RESPONSE:\n{raw}\n---end raw---")
-    return raw
+    return raw, timing
 
-def extract_json_from_text(text):
+def device_targets(user_question):
     """
-    Robust JSON extractor:
-    - strip leading explanation lines
-    - remove Markdown code fences ``` ... ```
-    - find first {...} JSON block and parse it
-    - return dict or None
+    The devices of a fleet-wide phrase, looked up by inventory role ("all spines"; "*" for every
+    device), else the inventory devices mentioned in order.
     """
-    if not text or not isinstance(text, str):
-        return None
+    filters = fleet_filters(user_question)
+    if filters is None:
+        return mentioned_devices(get_client(), TOOL_SERVER, user_question)
+    if not filters:
+        return "*"
+    try:
+        return [d["name"] for d in list_devices(get_client(), TOOL_SERVER, **filters)]
+    except Exception as e:
+        print("[WARN] Fleet lookup failed:", e)
+        return []
 
-    # remove common leading phrases like "Here is the JSON:" or "Answer:" (anything up to first newline if it doesn't start with {)
-    text = text.strip()
-    # Remove markdown fences ```json\n...\n``` or ```
-    text = re.sub(r"^```(?:json)?\s*", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s*```$", "", text, flags=re.IGNORECASE)
+def is_multi_device(args):
+    """True when a run_show decision targets more than one device (list or glob)."""
+    targets = args.get("devices")
+    if targets is None:
+        targets = args.get("device")
+    if isinstance(targets, list):
+        return len(targets) > 1
+    return isinstance(targets, str) and any(ch in targets for ch in "*?[")
 
-    # If still contains triple fenced blocks (multiple), collapse to content inside first fence
-    m_fence = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", text, flags=re.IGNORECASE)
-    if m_fence:
-        candidate = m_fence.group(1).strip()
-    else:
-        # remove a short leading text intro if present
-        # if text does not start with '{', drop leading lines until we find a line that starts with '{'
-        if not text.lstrip().startswith("{"):
-            lines = text.splitlines()
-            for i, line in enumerate(lines):
-                if line.strip().startswith("{"):
-                    candidate = "\n".join(lines[i:])
-                    break
-            else:
-                candidate = text
-        else:
-            candidate = text
+_tool_catalog = None
+
+def _get_tool_catalog():
+    """/tool/commands result, fetched once (None if the tool server was unreachable)."""
+    global _tool_catalog
+    if _tool_catalog is None:
+        try:
+            _tool_catalog = get_client().post(f"{TOOL_SERVER}/tool/commands", json={}, timeout=5).json()["result"]
+        except Exception as e:
+            print("[WARN] Command list unavailable, prompts list example commands only:", e)
+            _tool_catalog = False
+    return _tool_catalog or None
 
-    candidate = candidate.strip()
+def get_allowed_commands():
+    """The tool server's allowed show commands, fetched once (None if it was unreachable)."""
+    catalog = _get_tool_catalog()
+    return tuple(catalog["commands"]["cisco_ios"]) if catalog else None
 
-    # Now try to extract the first {...} block if candidate contains extra trailing stuff
-    m = re.search(r'(\{[\s\S]*?\})', candidate)
-    if not m:
-        return None
-    json_text = m.group(1)
+def get_query_fields():
+    """The tool server's /tool/query fields (None if it was unreachable)."""
+    catalog = _get_tool_catalog()
+    return tuple(catalog["query_fields"]) if catalog else None
 
-    # attempt to load
-    try:
-        return json.loads(json_text)
-    except Exception:
-        # attempt minor cleanup: remove trailing commas, etc (best-effort)
-        cleaned = re.sub(r",\s*}", "}", json_text)
-        cleaned = re.sub(r",\s*\]", "]", cleaned)
+def system_prompt():
+    """Single-decision system prompt listing the tool server's allowed commands and query fields."""
+    return build_system_prompt(get_allowed_commands() or EXAMPLE_COMMANDS, get_query_fields() or EXAMPLE_QUERY_FIELDS)
+
+def planner_prompt():
+    return build_planner_prompt(get_allowed_commands() or EXAMPLE_COMMANDS, get_query_fields() or EXAMPLE_QUERY_FIELDS)
+
+# deterministic pre-LLM router; INTENT_ROUTER=0 disables it
+INTENT_ROUTER = os.environ.get("INTENT_ROUTER", "1") == "1"
+ROUTER_MIN_CONFIDENCE = float(os.environ.get("ROUTER_MIN_CONFIDENCE", "0.9"))
+_router = None
+
+def get_router():
+    """Build the intent router once from the tool server's command list and inventory (None if unavailable)."""
+    global _router
+    if INTENT_ROUTER and _router is None:
         try:
-            return json.loads(cleaned)
+            cmds = get_allowed_commands()
+            if cmds is None:
+                raise RuntimeError("no command list from the tool server")
+            # fleet phrases resolve by inventory role, like device_targets()
+            records = list_devices(get_client(), TOOL_SERVER, fields=("name", "role"))
+            _router = IntentRouter(list(cmds), [d["name"] for d in records], {d["name"]: d["role"] for d in records})
         except Exception as e:
-            print("[WARN] Failed to json.loads extracted candidate:", e)
-            return None
+            print("[WARN] Intent router unavailable, every query goes to the LLM:", e)
+            _router = False
+    return _router or None
 
-def llm_decide_tools(user_question):
+def llm_decide_tools(user_question, use_router=True, use_cache=True):
     """
     Calls Ollama, extracts JSON, validates/coerces minimal schema.
+    Unambiguous queries are answered by the intent router without the LLM, and decisions
+    the LLM actually produced are cached so repeated questions skip the LLM call.
     Returns dict: {"tool": "...", "args": {...}}
     """
-    prompt = SYSTEM_PROMPT + "\n\nUser: " + (user_question or "") + "\n\nRespond with the exact JSON object only."
-    raw = ask_ollama(prompt)
-    parsed = extract_json_from_text(raw)
+    with span("llm_decide_tools", question_bytes=len((user_question or "").encode())) as sp:
+        decision = _decide(user_question, use_router, use_cache, sp)
+        sp["tool"] = decision.get("tool")
+    return decision
+
+def _decide(user_question, use_router, use_cache, sp):
+    router = get_router() if use_router else None
+    if router is not None:
+        with span("router") as rs:
+            routed = router.route(user_question)
+            rs["confidence"] = routed["confidence"]
+        if routed["decision"] is not None and routed["confidence"] >= ROUTER_MIN_CONFIDENCE:
+            print(f"[INFO] Routed without LLM ({routed['reason']})")
+            sp["source"] = "router"
+            return routed["decision"]
+    system = system_prompt()
+    cache = get_decision_cache() if use_cache else None
+    if cache is not None:
+        with span("decision_cache") as cs:
+            cached = cache.get(user_question, OLLAMA_MODEL, system)
+            cs["hit"] = cached is not None
+        if cached is not None:
+            print("[INFO] Decision cache hit")
+            sp["source"] = "cache"
+            return cached
+    sp["source"] = "llm"
+    t0 = time.perf_counter()
+    raw = ask_ollama(decision_messages(system, user_question))
+    with span("extract_json", bytes=len(raw.encode())) as es:
+        parsed = extract_json(raw)
+        es["ok"] = parsed is not None
+    llm_latency = time.perf_counter() - t0
     if parsed is None:
         print("[WARN] Could not parse JSON from LLM raw response. Raw below:")
         print(raw)
+    with span("coerce"):
+        decision = coerce_decision(parsed, user_question)
+    # heuristic fallbacks are not cached: the next attempt may get a real answer from the LLM
+    if cache is not None and parsed is not None:
+        cache.put(user_question, OLLAMA_MODEL, system, decision, llm_latency)
+    return decision
+
+def coerce_decision(parsed, user_question):
+    """Validate an extracted decision (or None) and coerce it to {"tool", "args"} using the question."""
+    if parsed is None:
         # fallback heuristics: if query contains "show" and a device name, coerce to run_show
         user_lower = (user_question or "").lower()
-        device_token = None
-        for token in ["leaf1","leaf2","leaf3","leaf4","leaf5","spine1","spine2","spine3","spine4","spine5"]:
-            if token in user_lower:
-                device_token = token
-                break
+        targets = device_targets(user_question)
         wants_show = any(w in user_lower for w in ["show ", "interfaces", "interface", "bgp", "version", "running-config", "ospf", "vlan"])
-        if wants_show and device_token:
-            print("[INFO] Heuristic coercion to run_show:", device_token)
-            return {"tool":"run_show", "args":{"device": device_token, "command":"show ip interface brief"}}
+        if wants_show and targets:
+            print("[INFO] Heuristic coercion to run_show:", targets)
+            if isinstance(targets, str) or len(targets) > 1:
+                return {"tool":"run_show", "args":{"devices": targets, "command":"show ip interface brief"}}
+            return {"tool":"run_show", "args":{"device": targets[0], "command":"show ip interface brief"}}
         return {"tool":"inventory", "args":{}}
-    # basic validation: allow only inventory or run_show
+    # basic validation: allow only inventory, run_show or query
     tool = parsed.get("tool")
     args = parsed.get("args") or {}
+    if tool == "query":
+        if args.get("field") and args.get("value") not in (None, ""):
+            return {"tool": "query", "args": {"field": args["field"], "value": str(args["value"])}}
+        tool = "inventory"
     if tool not in ("inventory","run_show"):
         # coerce if possible
         if "show" in (tool or "") or "device" in args:
@@ -128,18 +326,20 @@ def llm_decide_tools(user_question):
     if tool == "run_show":
         device = args.get("device")
         cmd = args.get("command")
+        if is_multi_device(args):
+            devices = args.get("devices") or device
+            return {"tool":"run_show","args":{"devices": devices, "command": cmd or "show ip interface brief"}}
+        if not device and isinstance(args.get("devices"), list) and args["devices"]:
+            device = args["devices"][0]
         if not device or not cmd:
             # try heuristics
-            user_lower = (user_question or "").lower()
-            device_token = None
-            for token in ["leaf1","leaf2","leaf3","leaf4","leaf5","spine1","spine2","spine3","spine4","spine5"]:
-                if token in user_lower:
-                    device_token = token
-                    break
-            if not device and device_token:
-                device = device_token
+            targets = device_targets(user_question)
             if not cmd:
                 cmd = "show ip interface brief"
+            if not device and (isinstance(targets, str) or len(targets) > 1):
+                return {"tool":"run_show","args":{"devices": targets, "command": cmd}}
+            if not device and targets:
+                device = targets[0]
             # if still missing device, fallback to inventory
             if not device:
                 return {"tool":"inventory","args":{}}
@@ -149,32 +349,373 @@ def llm_decide_tools(user_question):
 
 # Ensure the main prints output clearly
 def summarize_from_response(res):
+    if "parsed" in res:
+        # format=structured responses: one line per top-level field
+        return "\n".join(f"{k}: {json.dumps(v)}" for k, v in res["parsed"].items())[:2000]
     out = res.get("output","")
     lines = out.splitlines()
     return "\n".join(lines[:10])
 
-if __name__ == "__main__":
-    # simple CLI entry
-    if len(sys.argv) > 1:
-        q = " ".join(sys.argv[1:])
+DEFAULT_SHOW = "show ip interface brief"
+PREFETCH_MAX = int(os.environ.get("PREFETCH_MAX", "4"))
+
+async def _safe_json(coro):
+    try:
+        return await coro
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+async def agent_turn(user_question):
+    """
+    One decision plus its tool call. When the question needs the LLM, the inventory and the
+    default show output for devices named in the question are fetched while Ollama is
+    thinking; the decision reuses a prefetched result when it asks for the same thing.
+    Returns (decision, result).
+    """
+    with trace(current_trace_id()), span("agent_turn") as sp:
+        decision, result = await _agent_turn(user_question)
+        sp["tool"] = decision.get("tool")
+    return decision, result
+
+async def _agent_turn(user_question):
+    aclient = AsyncHttpClient()
+    router = get_router()
+    routed = router.route(user_question) if router is not None else {"decision": None, "confidence": 0.0}
+    needs_llm = routed["decision"] is None or routed["confidence"] < ROUTER_MIN_CONFIDENCE
+
+    prefetch, inventory = {}, None
+    deciding = asyncio.ensure_future(asyncio.to_thread(llm_decide_tools, user_question))
+    if needs_llm:
+        inventory = asyncio.ensure_future(_safe_json(aclient.post_json(f"{TOOL_SERVER}/tool/inventory", json={})))
+        # the device lookup runs while the LLM is already deciding; a fleet-wide question becomes
+        # one batch call, so only devices named in the question are prefetched
+        targets = []
+        if fleet_filters(user_question) is None:
+            targets = await asyncio.to_thread(mentioned_devices, get_client(), TOOL_SERVER, user_question)
+        for dev in targets[:PREFETCH_MAX]:
+            body = {"device": dev, "command": DEFAULT_SHOW}
+            prefetch[(dev, DEFAULT_SHOW)] = asyncio.ensure_future(
+                _safe_json(aclient.post_json(f"{TOOL_SERVER}/tool/run_show", json=body)))
+
+    decision = await deciding
+    tool = decision.get("tool")
+    args = decision.get("args", {})
+
+    if tool == "inventory":
+        name = args.get("name")
+        # the prefetch is the first page of the listing only, so a name is always looked up
+        if name and inventory is not None:
+            inventory.cancel()
+            inventory = None
+        inv = await inventory if inventory is not None else None
+        if inv and inv.get("ok"):
+            result = inv
+        else:
+            result = await _safe_json(aclient.post_json(f"{TOOL_SERVER}/tool/inventory", json={"name": name}))
+    elif tool == "query":
+        result = await _safe_json(aclient.post_json(f"{TOOL_SERVER}/tool/query", json=args))
+    elif tool == "run_show" and is_multi_device(args):
+        body = {"devices": args.get("devices") or args.get("device"), "commands": [args.get("command")]}
+        result = await _safe_json(aclient.post_json(f"{TOOL_SERVER}/tool/run_show_batch", json=body))
+    elif tool == "run_show":
+        key = (args.get("device"), args.get("command"))
+        if key in prefetch:
+            result = await prefetch.pop(key)
+        elif not key[0]:
+            result = {"ok": False, "error": "No device specified in decision"}
+        else:
+            body = {"device": key[0], "command": key[1]}
+            result = await _safe_json(aclient.post_json(f"{TOOL_SERVER}/tool/run_show", json=body))
     else:
-        q = input("Ask the network agent> ").strip()
-    decision = llm_decide_tools(q)
+        result = {"ok": False, "error": f"Unknown tool decision: {decision}"}
+    return decision, result
+
+# -----------------------
+# Multi-step planning loop
+# -----------------------
+AGENT_MAX_STEPS = int(os.environ.get("AGENT_MAX_STEPS", "4"))
+AGENT_WORKERS = int(os.environ.get("AGENT_WORKERS", "8"))
+OBSERVATION_MAX_LINES = int(os.environ.get("OBSERVATION_MAX_LINES", "15"))
+
+def is_plan(obj):
+    """A planner reply: {"calls": [...]}, {"final": "..."} or a bare single decision."""
+    if not isinstance(obj, dict):
+        return False
+    if isinstance(obj.get("calls"), list):
+        return all(is_decision(c) for c in obj["calls"])
+    return isinstance(obj.get("final"), str) or is_decision(obj)
+
+def parse_plan(raw):
+    """Return the first plan-shaped object in the LLM output, or None."""
+    return extract_json(raw, accept=is_plan)
+
+class ToolSession:
+    """
+    Executes tool calls for one question. Calls in a step run concurrently on a thread pool;
+    (device, command) results and inventory lookups are memoized for the whole session, so
+    repeated or overlapping calls never hit the tool server twice.
+    """
+
+    def __init__(self, workers=AGENT_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool")
+        self._lock = threading.Lock()
+        self.memo = {}  # ("run_show", device, command) / ("inventory", name) / ("query", field, value) -> result
+        self.tool_calls = 0
+        self.memo_hits = 0
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    def _post(self, path, body):
+        with self._lock:
+            self.tool_calls += 1
+        try:
+            return get_client().post(f"{TOOL_SERVER}{path}", json=body).json()
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def _run_show(self, args):
+        cmd = args.get("command")
+        if is_multi_device(args):
+            targets = args.get("devices") or args.get("device")
+            names = targets if isinstance(targets, list) else None
+            if names is not None:
+                missing = [d for d in names if ("run_show", d, cmd) not in self.memo]
+                if not missing:
+                    with self._lock:
+                        self.memo_hits += len(names)
+                    return [self.memo[("run_show", d, cmd)] for d in names]
+                targets = missing
+            res = self._post("/tool/run_show_batch", {"devices": targets, "commands": [cmd]})
+            if not res.get("ok"):
+                return [res]
+            with self._lock:
+                for item in res["results"]:
+                    self.memo[("run_show", item.get("device"), cmd)] = item
+            if names is not None:
+                return [self.memo.get(("run_show", d, cmd), {"ok": False, "device": d, "error": "missing"}) for d in names]
+            return res["results"]
+        key = ("run_show", args.get("device"), cmd)
+        if key in self.memo:
+            with self._lock:
+                self.memo_hits += 1
+            return [self.memo[key]]
+        res = self._post("/tool/run_show", {"device": key[1], "command": cmd})
+        res.setdefault("device", key[1])
+        res.setdefault("command", cmd)
+        with self._lock:
+            self.memo[key] = res
+        return [res]
+
+    def _inventory(self, args):
+        key = ("inventory", args.get("name"))
+        if key in self.memo:
+            with self._lock:
+                self.memo_hits += 1
+            return [self.memo[key]]
+        res = self._post("/tool/inventory", {"name": key[1]})
+        with self._lock:
+            self.memo[key] = res
+        return [res]
+
+    def _query(self, args):
+        key = ("query", args.get("field"), args.get("value"))
+        if key in self.memo:
+            with self._lock:
+                self.memo_hits += 1
+            return [self.memo[key]]
+        res = self._post("/tool/query", {"field": key[1], "value": key[2]})
+        with self._lock:
+            self.memo[key] = res
+        return [res]
+
+    def execute(self, decisions):
+        """Run a step's decisions concurrently; identical decisions run once. Returns [(decision, results)]."""
+        unique = list({json.dumps(d, sort_keys=True): d for d in decisions}.values())
+        def _one(d):
+            if d["tool"] == "run_show":
+                return d, self._run_show(d["args"])
+            if d["tool"] == "query":
+                return d, self._query(d["args"])
+            return d, self._inventory(d["args"])
+        return list(self._pool.map(bind(_one), unique))
+
+def format_observation(decision, results, seen):
+    """Compact text for the planner: one excerpt per (device, command) not already in `seen`."""
+    out = []
+    for res in results:
+        if decision["tool"] == "inventory":
+            key = ("inventory", decision["args"].get("name"))
+        elif decision["tool"] == "query":
+            key = ("query", decision["args"].get("field"), decision["args"].get("value"))
+        else:
+            key = ("run_show", res.get("device"), res.get("command"))
+        if key in seen:
+            continue
+        seen.add(key)
+        if decision["tool"] == "inventory":
+            names = [d.get("name") for d in res.get("result", [])] if res.get("ok") else []
+            out.append("inventory: " + (", ".join(names) if res.get("ok") else "ERROR " + str(res.get("error"))))
+            continue
+        if decision["tool"] == "query":
+            out.append(f"query {key[1]}={key[2]}: " + format_query_result(res))
+            continue
+        head = f"{res.get('device')} / {res.get('command')}:"
+        if not res.get("ok"):
+            out.append(head + " ERROR " + str(res.get("error")))
+        else:
+            lines = res.get("output", "").splitlines()
+            more = f"\n  ... ({len(lines) - OBSERVATION_MAX_LINES} more lines)" if len(lines) > OBSERVATION_MAX_LINES else ""
+            out.append(head + "\n" + "\n".join(lines[:OBSERVATION_MAX_LINES]) + more)
+    return out
+
+def format_query_result(res):
+    """One line per match (at most OBSERVATION_MAX_LINES) for a /tool/query response."""
+    if not res.get("ok"):
+        return "ERROR " + str(res.get("error"))
+    result = res["result"]
+    lines = [f"{result['count']} devices"]
+    for m in result["matches"][:OBSERVATION_MAX_LINES]:
+        lines.append("  " + ", ".join(f"{k}={v}" for k, v in m.items()))
+    if result["truncated"] or len(result["matches"]) > OBSERVATION_MAX_LINES:
+        lines.append("  ...")
+    return "\n".join(lines)
+
+def run_agent(user_question, max_steps=AGENT_MAX_STEPS):
+    """
+    Plan -> execute -> observe loop. Each step the LLM returns a list of calls (run in parallel,
+    deduplicated against the session memo) or a final answer; at most max_steps LLM rounds.
+    Unambiguous questions are routed straight to one tool step without the LLM.
+    Returns {"answer", "steps", "observations", "tool_calls", "memo_hits", "total_s"}.
+    """
+    with trace(current_trace_id()) as trace_id, span("run_agent"):
+        result = _run_agent(user_question, max_steps)
+    result["trace_id"] = trace_id
+    return result
+
+def _run_agent(user_question, max_steps):
+    session = ToolSession()
+    observations, steps, seen = [], [], set()
+    answer = None
+    t_start = time.perf_counter()
+    try:
+        router = get_router()
+        routed = router.route(user_question) if router is not None else {"decision": None, "confidence": 0.0}
+        if routed["decision"] is not None and routed["confidence"] >= ROUTER_MIN_CONFIDENCE:
+            t0 = time.perf_counter()
+            with span("tools", step=1, calls=1):
+                done = session.execute([routed["decision"]])
+            for d, r in done:
+                observations.extend(format_observation(d, r, seen))
+            steps.append({"step": 1, "source": "router", "llm_s": 0.0, "tools_s": round(time.perf_counter() - t0, 4),
+                          "calls": [routed["decision"]]})
+            answer = "\n".join(observations)
+            max_steps = 0
+
+        # one growing conversation: each step only appends the reply and the new observations,
+        # so the prompt of step n is a prefix of step n+1 and Ollama re-evaluates just the tail
+        messages = [{"role": "system", "content": planner_prompt()},
+                    {"role": "user", "content": "Question: " + (user_question or "") + "\n\n" + RESPOND_JSON}]
+        for i in range(1, max_steps + 1):
+            t0 = time.perf_counter()
+            with span("plan", step=i, observations=len(observations)):
+                raw = ask_ollama(messages, accept=is_plan)
+                messages.append({"role": "assistant", "content": raw})
+                with span("extract_json", bytes=len(raw.encode())):
+                    plan = parse_plan(raw)
+            llm_s = time.perf_counter() - t0
+            step = {"step": i, "source": "llm", "llm_s": round(llm_s, 4), "tools_s": 0.0, "calls": []}
+            steps.append(step)
+
+            if plan is None:
+                # unusable reply: fall back to the single-decision heuristics once
+                plan = {"calls": [coerce_decision(None, user_question)]} if not observations else {}
+            if isinstance(plan.get("final"), str):
+                answer = plan["final"]
+                break
+            calls = plan.get("calls") if "calls" in plan else ([plan] if is_decision(plan) else [])
+            decisions = [coerce_decision(c, user_question) for c in calls]
+            if not decisions:
+                break
+            hits_before, calls_before = session.memo_hits, session.tool_calls
+            t0 = time.perf_counter()
+            with span("tools", step=i, calls=len(decisions)):
+                done = session.execute(decisions)
+            step.update({"tools_s": round(time.perf_counter() - t0, 4), "calls": decisions,
+                         "tool_requests": session.tool_calls - calls_before,
+                         "memo_hits": session.memo_hits - hits_before})
+            if session.tool_calls == calls_before:
+                # everything asked for was already observed: nothing new to learn
+                break
+            new = [line for d, r in done for line in format_observation(d, r, seen)]
+            observations.extend(new)
+            messages.append({"role": "user", "content": "Observations:\n" + ("\n\n".join(new) or "(nothing new)") + "\n\n" + RESPOND_JSON})
+        if answer is None:
+            answer = "\n\n".join(observations) or "No answer."
+    finally:
+        session.close()
+    return {"answer": answer, "steps": steps, "observations": observations,
+            "tool_calls": session.tool_calls, "memo_hits": session.memo_hits,
+            "total_s": round(time.perf_counter() - t_start, 4)}
+
+def main(q, single):
+    if not single:
+        result = run_agent(q)
+        for step in result["steps"]:
+            print(f"STEP {step['step']} ({step['source']}): llm {step['llm_s']}s, tools {step['tools_s']}s, "
+                  f"{len(step['calls'])} calls, {step.get('memo_hits', 0)} memo hits")
+            for call in step["calls"]:
+                print("   ", json.dumps(call))
+        print("\nOBSERVATIONS:")
+        print("\n\n".join(result["observations"]))
+        print("\nANSWER:")
+        print(result["answer"])
+        print(f"\n{result['tool_calls']} tool requests, {result['memo_hits']} memo hits, {result['total_s']}s total")
+        print("HTTP CLIENT:", json.dumps(get_client().metrics()))
+        sys.exit(0)
+    decision, res = asyncio.run(agent_turn(q))
     print("DECISION:", json.dumps(decision, indent=2))
+    args = decision.get("args", {})
     if decision.get("tool") == "inventory":
-        inv = requests.post(f"{TOOL_SERVER}/tool/inventory", json={"name": decision['args'].get("name")}).json()
-        print("INVENTORY RESULT:", json.dumps(inv, indent=2))
+        print("INVENTORY RESULT:", json.dumps(res, indent=2))
+    elif decision.get("tool") == "query":
+        print("ANSWER:")
+        print(format_query_result(res))
+        print("\nEVIDENCE:")
+        print(json.dumps(res, indent=2))
+    elif decision.get("tool") == "run_show" and is_multi_device(args):
+        if not res.get("ok"):
+            print("Batch failed:", res.get("error"))
+            sys.exit(1)
+        print(f"ANSWER (excerpt, {res['count']} results, {res['errors']} errors):")
+        for item in res["results"]:
+            print(f"--- {item.get('device')}: {item.get('command')}")
+            print(summarize_from_response(item) if item.get("ok") else "ERROR: " + str(item.get("error")))
+        print("\nEVIDENCE:")
+        print(json.dumps(res, indent=2))
     elif decision.get("tool") == "run_show":
-        args = decision.get("args",{})
-        dev = args.get("device")
-        cmd = args.get("command")
-        if not dev:
+        if not args.get("device"):
             print("No device specified in decision; aborting.")
             sys.exit(1)
-        res = requests.post(f"{TOOL_SERVER}/tool/run_show", json={"device": dev, "command": cmd}).json()
         print("ANSWER (excerpt):")
         print(summarize_from_response(res))
         print("\nEVIDENCE:")
         print(json.dumps(res, indent=2))
     else:
-        print("Unknown tool decision:", decision)
\ No newline at end of file
+        print("Unknown tool decision:", decision)
+    if get_decision_cache() is not None:
+        print("\nDECISION CACHE:", json.dumps(get_decision_cache().stats()))
+    print("HTTP CLIENT:", json.dumps(get_client().metrics()))
+
+if __name__ == "__main__":
+    # simple CLI entry
+    argv = sys.argv[1:]
+    single = "--single" in argv  # one decision + one tool call (no planning loop)
+    argv = [a for a in argv if a != "--single"]
+    if argv:
+        q = " ".join(argv)
+    else:
+        q = input("Ask the network agent> ").strip()
+    with trace() as trace_id:
+        print(f"[INFO] trace id {trace_id}")
+        main(q, single)
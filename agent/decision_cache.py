@@ -0,0 +1,118 @@
+# agent/decision_cache.py
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    key TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    decision TEXT NOT NULL,
+    llm_latency REAL NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decisions_last_used ON decisions(last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def normalize_question(question):
+    """Lower-case, collapse whitespace and drop trailing punctuation so trivial variants share a key."""
+    q = " ".join((question or "").lower().split())
+    return re.sub(r"[\s?.!]+$", "", q)
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256((prompt or "").encode()).hexdigest()[:16]
+
+
+class DecisionCache:
+    """
+    Persistent SQLite cache of validated {"tool","args"} decisions.
+    Keyed on (normalized question, model, system prompt hash); entries expire after
+    `ttl` seconds and the least recently used ones are evicted past `max_entries`.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=10000):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def key(self, question, model, prompt):
+        raw = "\x1f".join([normalize_question(question), model or "", prompt_hash(prompt)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, question, model, prompt):
+        """Return the cached decision dict, or None on a miss or expired entry."""
+        key = self.key(question, model, prompt)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT decision, llm_latency, created FROM decisions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM decisions WHERE key = ?", (key,))
+                self._bump("misses", 1)
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE decisions SET last_used = ? WHERE key = ?", (now, key))
+            self._bump("hits", 1)
+            self._bump("latency_saved", row[1])
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, question, model, prompt, decision, llm_latency):
+        key = self.key(question, model, prompt)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO decisions (key, question, decision, llm_latency, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_question(question), json.dumps(decision), float(llm_latency), now, now),
+            )
+            self._db.execute("DELETE FROM decisions WHERE created < ?", (now - self.ttl,))
+            self._db.execute(
+                "DELETE FROM decisions WHERE key IN ("
+                " SELECT key FROM decisions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def _bump(self, name, amount):
+        self._db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._db.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "latency_saved_s": round(counters.get("latency_saved", 0.0), 3),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM decisions")
+            self._db.execute("DELETE FROM counters")
+            self._db.commit()
@@ -0,0 +1,61 @@
+# agent/device_lookup.py
+"""
+Client side of the tool server's device inventory (/tool/inventory), shared by the agent and
+the UI: which devices a question names, and paged listings.
+"""
+from intent_router import tokenize
+
+# distinct words of a question sent for lookup
+LOOKUP_MAX_TOKENS = 64
+# devices per /tool/inventory page when listing a whole fleet
+LIST_PAGE_SIZE = 10000
+# fleet-wide phrases -> inventory filters ({}: every device)
+FLEET_PHRASES = {"all spines": {"role": "spine"}, "every spine": {"role": "spine"},
+                 "all leaves": {"role": "leaf"}, "all leafs": {"role": "leaf"}, "every leaf": {"role": "leaf"},
+                 "all devices": {}, "every device": {}}
+
+
+def match_devices(question, by_lower):
+    """Devices named in the question, in order, for callers holding the list as {lower name: name}."""
+    return list(dict.fromkeys(by_lower[w] for w in tokenize(question) if w in by_lower))
+
+
+def fleet_filters(question):
+    """Inventory filters of the first fleet-wide phrase in the question ("all spines"), else None."""
+    lower = (question or "").lower()
+    return next((filters for phrase, filters in FLEET_PHRASES.items() if phrase in lower), None)
+
+
+def mentioned_devices(client, tool_server, question):
+    """
+    Inventory devices named in the question, in the order they appear. Whole words are looked
+    up, so "leaf1" does not match inside "leaf12". [] when the inventory is unreachable.
+    """
+    words = list(dict.fromkeys(tokenize(question)))[:LOOKUP_MAX_TOKENS]
+    if not words:
+        return []
+    try:
+        res = client.post(f"{tool_server}/tool/inventory", json={"names": words, "fields": ["name"]}).json()
+    except Exception as e:
+        print("[WARN] Device lookup failed:", e)
+        return []
+    if not res.get("ok"):
+        return []
+    # the server answers in question order with its own spelling of each name
+    return [d["name"] for d in res["result"]]
+
+
+def list_devices(client, tool_server, fields=("name",), page_size=LIST_PAGE_SIZE, **filters):
+    """Every device matching filters (prefix, glob, role, site, vendor, tags), following the cursor."""
+    out, cursor = [], None
+    while True:
+        body = dict(filters, fields=list(fields), limit=page_size)
+        if cursor:
+            body["cursor"] = cursor
+        res = client.post(f"{tool_server}/tool/inventory", json=body).json()
+        if not res.get("ok"):
+            raise RuntimeError(res.get("error"))
+        out.extend(res["result"])
+        cursor = res.get("next_cursor")
+        if not cursor:
+            return out
@@ -0,0 +1,141 @@
+# agent/http_client.py
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import tracing
+
+# connections kept per host by the shared client; long-running callers (agent_daemon.py) raise it
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))
+
+# (connect, read) timeouts by path prefix; the first match wins
+DEFAULT_TIMEOUTS = [
+    ("/api/generate", (3.05, 60)),
+    ("/api/chat", (3.05, 60)),
+    ("/tool/run_show_batch", (3.05, 60)),
+    ("/tool/", (3.05, 20)),
+    ("", (3.05, 10)),
+]
+
+
+class HttpClient:
+    """
+    Keep-alive session shared by the agent and the UI for Ollama and tool-server calls.
+    - pooled connections per host (HTTPAdapter), so repeated calls reuse TCP connections
+    - retry with exponential backoff on connection errors and 502/503/504
+      (every endpoint we call is read-only, so POST is safe to retry)
+    - per-endpoint timeouts from DEFAULT_TIMEOUTS unless a call passes its own
+    - counters for requests, new connections and per-endpoint latency
+    - the current trace's correlation id is sent as X-Correlation-ID and each call is a span
+    """
+
+    def __init__(self, pool_maxsize=16, retries=2, backoff=0.2, timeouts=None):
+        self.timeouts = timeouts or DEFAULT_TIMEOUTS
+        self.session = requests.Session()
+        retry = Retry(total=retries, connect=retries, read=0, backoff_factor=backoff,
+                      status_forcelist=(502, 503, 504), allowed_methods=None, raise_on_status=False)
+        self._adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._endpoints = {}  # path -> [count, total_seconds]
+
+    def timeout_for(self, url):
+        path = urlsplit(url).path
+        for prefix, timeout in self.timeouts:
+            if path.startswith(prefix):
+                return timeout
+        return self.timeouts[-1][1]
+
+    def post(self, url, json=None, timeout=None, **kwargs):
+        path = urlsplit(url).path
+        headers = dict(kwargs.pop("headers", None) or {}, **tracing.headers())
+        t0 = time.perf_counter()
+        try:
+            with tracing.span("http", path=path) as sp:
+                resp = self.session.post(url, json=json, timeout=timeout or self.timeout_for(url),
+                                         headers=headers, **kwargs)
+                sp["status"] = resp.status_code
+                sp["bytes_out"] = len(resp.request.body or b"")
+                if not kwargs.get("stream"):
+                    sp["bytes_in"] = len(resp.content)
+            return resp
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self._requests += 1
+                stat = self._endpoints.setdefault(path, [0, 0.0])
+                stat[0] += 1
+                stat[1] += elapsed
+
+    def connections_opened(self):
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def metrics(self):
+        opened = self.connections_opened()
+        with self._lock:
+            endpoints = {p: {"count": c, "mean_ms": round(t / c * 1000, 2)} for p, (c, t) in self._endpoints.items()}
+            reqs, errors = self._requests, self._errors
+        return {
+            "requests": reqs,
+            "errors": errors,
+            "connections_opened": opened,
+            "connection_reuse": round(max(0.0, 1 - opened / reqs), 4) if reqs else 0.0,
+            "endpoints": endpoints,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpClient:
+    """
+    asyncio front end over the pooled HttpClient: calls run on worker threads (requests
+    releases the GIL while waiting on the socket), so one agent turn can await the LLM
+    call, the inventory and prefetched show outputs concurrently.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+
+    async def post(self, url, json=None, timeout=None, **kwargs):
+        return await asyncio.to_thread(self.client.post, url, json=json, timeout=timeout, **kwargs)
+
+    async def post_json(self, url, json=None, timeout=None):
+        resp = await self.post(url, json=json, timeout=timeout)
+        return resp.json()
+
+    async def gather_json(self, calls):
+        """Run [(url, body), ...] concurrently; failed calls come back as {"ok": False, "error": ...}."""
+        async def _one(url, body):
+            try:
+                return await self.post_json(url, json=body)
+            except Exception as e:
+                return {"ok": False, "error": str(e)}
+        return await asyncio.gather(*(_one(u, b) for u, b in calls))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared HttpClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(pool_maxsize=HTTP_POOL_MAXSIZE)
+    return _client
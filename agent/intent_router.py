@@ -0,0 +1,122 @@
+# agent/intent_router.py
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9\-/.:*]*")
+# "... on leaf1" style suffix, stripped from a pipe modifier's regex
+_TARGET_SUFFIX_RE = re.compile(r"\s+(?:on|for|from|of|at)\s+\S+(?:\s+\S+)?\s*[?.!]*$", re.IGNORECASE)
+_INVENTORY_WORDS = {"list", "inventory", "devices", "fleet"}
+_FLEET_WORDS = {"all", "every", "each"}
+# "all <word>" meaning the whole fleet, whatever the roles
+_ALL_DEVICE_WORDS = ("devices", "device", "switches", "routers")
+_ROLE_RE = re.compile(r"[a-z]+")
+
+
+def tokenize(text):
+    return [t.rstrip(".:") for t in _TOKEN_RE.findall((text or "").lower())]
+
+
+def role_words(role):
+    """Words naming a role's devices after "all"/"every": "leaf" -> leaf, leafs, leafes, leaves."""
+    words = {role, role + "s", role + "es"}
+    if role.endswith("f"):
+        words.add(role[:-1] + "ves")
+    return words
+
+
+class IntentRouter:
+    """
+    Deterministic pre-LLM router. Built once from the allowed command list and the device
+    inventory: commands go into a token trie (with and without the leading "show"), device
+    names into a set, and fleet phrases ("all spines") map to the devices of that inventory
+    role. roles is {name: role} as /tool/inventory reports it; without it a device's role is
+    its name's letter prefix, the inventory's own default. route() scans the question once
+    and only answers when the match is unambiguous.
+    """
+
+    def __init__(self, commands, devices, roles=None):
+        self.commands = list(commands)
+        self.devices = set(devices)
+        self._trie = {}
+        for cmd in self.commands:
+            words = tokenize(cmd)
+            self._insert(words, cmd)
+            if len(words) > 2 and words[0] == "show":
+                self._insert(words[1:], cmd)
+        fleet = {}
+        for name in sorted(self.devices):
+            role = (roles or {}).get(name)
+            if role is None:
+                m = _ROLE_RE.match(name.lower())
+                role = m.group(0) if m else None
+            for word in role_words(role.lower()) if role else ():
+                fleet.setdefault(word, []).append(name)
+        self._fleet = dict(fleet, **dict.fromkeys(_ALL_DEVICE_WORDS, "*"))
+
+    def _insert(self, words, cmd):
+        node = self._trie
+        for w in words:
+            node = node.setdefault(w, {})
+        # keep the full-form command if both forms end on the same node
+        node.setdefault(None, cmd)
+
+    def _match_commands(self, tokens):
+        """Longest trie match at each position; overlapping shorter matches are skipped."""
+        found = []
+        i = 0
+        while i < len(tokens):
+            node, j, best = self._trie, i, None
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if None in node:
+                    best = (node[None], j)
+            if best:
+                found.append(best[0])
+                i = best[1]
+            else:
+                i += 1
+        return found
+
+    def _targets(self, tokens):
+        for a, b in zip(tokens, tokens[1:]):
+            if a in _FLEET_WORDS and b in self._fleet:
+                fleet = self._fleet[b]
+                return fleet if fleet == "*" else list(fleet)
+        seen = []
+        for t in tokens:
+            if t in self.devices and t not in seen:
+                seen.append(t)
+        return seen
+
+    def route(self, question):
+        """Return {"decision": {...} or None, "confidence": float, "reason": str}."""
+        head, sep, tail = (question or "").partition("|")
+        tokens = tokenize(head)
+        targets = self._targets(tokenize(question))
+        cmds = list(dict.fromkeys(self._match_commands(tokens)))
+
+        if len(cmds) > 1:
+            return {"decision": None, "confidence": 0.4, "reason": f"several commands matched: {cmds}"}
+        if cmds:
+            cmd = cmds[0]
+            if sep:
+                modifier = _TARGET_SUFFIX_RE.sub("", tail).strip()
+                if not modifier:
+                    return {"decision": None, "confidence": 0.3, "reason": "empty pipe modifier"}
+                cmd = f"{cmd} | {modifier}"
+            if not targets:
+                return {"decision": None, "confidence": 0.3, "reason": "command matched but no device"}
+            if isinstance(targets, str) or len(targets) > 1:
+                return {"decision": {"tool": "run_show", "args": {"devices": targets, "command": cmd}},
+                        "confidence": 1.0, "reason": "command + several devices"}
+            return {"decision": {"tool": "run_show", "args": {"device": targets[0], "command": cmd}},
+                    "confidence": 1.0, "reason": "command + device"}
+
+        words = set(tokens)
+        if words & _INVENTORY_WORDS and not (words & {"show", "interface", "interfaces", "bgp", "route"}):
+            if isinstance(targets, list) and len(targets) == 1:
+                return {"decision": {"tool": "inventory", "args": {"name": targets[0]}},
+                        "confidence": 0.95, "reason": "inventory lookup for one device"}
+            if not targets or targets == "*":
+                return {"decision": {"tool": "inventory", "args": {}}, "confidence": 0.95, "reason": "inventory listing"}
+        return {"decision": None, "confidence": 0.2 if targets else 0.0, "reason": "no command matched"}
@@ -0,0 +1,148 @@
+# agent/json_extract.py
+import json
+import re
+
+# characters that change scanner state inside an object
+_SPECIAL = re.compile(r'[{}"\\]')
+
+
+class JsonObjectScanner:
+    """
+    Incremental, string-aware brace scanner. feed() accepts text in arbitrary chunks
+    (e.g. streamed LLM tokens) and returns the complete top-level {...} spans seen so far.
+    Each character is examined once; text outside objects is skipped with str.find.
+    start is the offset, in the chunk that opened it, of the latest object's opening brace.
+
+    With nested=True every inner {...} is returned too, as soon as it closes, so an object
+    inside a brace that never closes (prose like ":-{" before the answer) is still seen
+    while streaming. Inner spans come before the object that contains them.
+    """
+
+    def __init__(self, nested=False):
+        self.nested = nested
+        self.start = None
+        self._parts = []
+        self._len = 0  # characters in _parts
+        self._opens = []  # offsets of the open inner braces in the current object (nested only)
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+
+    def feed(self, chunk):
+        return list(self.scan(chunk))
+
+    def scan(self, chunk, pos=0):
+        """Like feed(), but yields each span as soon as it closes so callers can stop early."""
+        i, n = pos, len(chunk)
+        while i < n:
+            if self._depth == 0:
+                start = chunk.find("{", i)
+                if start < 0:
+                    return
+                self.start = start
+                self._parts = []
+                self._len = 0
+                self._opens = []
+                self._depth = 1
+                self._in_str = self._escape = False
+                seg_start = start
+                i = start + 1
+            else:
+                seg_start = i
+            while i < n and self._depth:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                m = _SPECIAL.search(chunk, i)
+                if m is None:
+                    i = n
+                    break
+                ch = m.group()
+                i = m.end()
+                if self._in_str:
+                    if ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._in_str = False
+                elif ch == '"':
+                    self._in_str = True
+                elif ch == "{":
+                    self._depth += 1
+                    if self.nested:
+                        self._opens.append(self._len + m.start() - seg_start)
+                elif ch == "}":
+                    self._depth -= 1
+                    if self.nested and self._opens:
+                        yield ("".join(self._parts) + chunk[seg_start:i])[self._opens.pop():]
+            self._parts.append(chunk[seg_start:i])
+            self._len += i - seg_start
+            if self._depth == 0:
+                yield "".join(self._parts)
+                self._parts = []
+
+    @property
+    def pending(self):
+        """True while an object has been opened but not yet closed."""
+        return self._depth > 0
+
+
+def is_decision(obj):
+    """Minimal tool-decision shape: {"tool": <str>, "args": <dict, optional>}."""
+    return (isinstance(obj, dict) and isinstance(obj.get("tool"), str)
+            and isinstance(obj.get("args", {}), dict))
+
+
+def loads_lenient(text):
+    """json.loads, retried once with trailing commas removed; None if it still fails."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        cleaned = re.sub(r",\s*([}\]])", r"\1", text)
+        try:
+            return json.loads(cleaned)
+        except ValueError:
+            return None
+
+
+# tool -> {arg: accepted types}; unknown args are tolerated (coercion drops them)
+TOOL_ARGS = {
+    "inventory": {"name": (str, type(None))},
+    "run_show": {"device": (str, type(None)), "devices": (str, list, type(None)), "command": (str, type(None))},
+    "query": {"field": str, "value": (str, int, float), "limit": int},
+}
+
+
+def is_valid_decision(obj):
+    """A decision for a known tool whose known args have the right types."""
+    if not is_decision(obj) or obj["tool"] not in TOOL_ARGS:
+        return False
+    args = obj.get("args") or {}
+    for key, types in TOOL_ARGS[obj["tool"]].items():
+        if key in args and not isinstance(args[key], types):
+            return False
+    return True
+
+
+def extract_json(text, accept=is_valid_decision):
+    """
+    First balanced {...} in free text (fenced, chatty or bare) that parses, leniently, and
+    passes `accept` (accept=None takes any object); None if there is none. Braces inside
+    strings are ignored and nested objects stay whole. A candidate that fails, or a brace that
+    never closes (":-{"), is given up and the scan restarts at the next brace after it.
+    """
+    if not text or not isinstance(text, str):
+        return None
+    pos = 0
+    while True:
+        scanner = JsonObjectScanner()
+        for candidate in scanner.scan(text, pos):
+            obj = loads_lenient(candidate)
+            if obj is not None and (accept is None or accept(obj)):
+                return obj
+            # the object may start at one of the failed candidate's own braces
+            break
+        else:
+            if not scanner.pending:
+                return None
+        pos = scanner.start + 1
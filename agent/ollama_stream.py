@@ -0,0 +1,81 @@
+# agent/ollama_stream.py
+import json
+import time
+
+from json_extract import JsonObjectScanner, is_valid_decision, loads_lenient
+
+
+def done_stats(frame):
+    """Token counts and durations in seconds (Ollama reports ns) from a final frame or non-stream reply."""
+    out = {k: frame[k] for k in ("prompt_eval_count", "eval_count") if frame.get(k) is not None}
+    for key in ("prompt_eval_duration", "load_duration"):
+        if frame.get(key) is not None:
+            out[key.replace("_duration", "_s")] = frame[key] / 1e9
+    return out
+
+
+def generate_until_decision(client, api, model, prompt, accept=is_valid_decision, options=None, keep_alive=None):
+    """
+    Stream /api/generate and stop as soon as one complete object passing `accept` has
+    arrived; closing the response makes Ollama abandon the rest of the generation.
+    Returns {"raw", "decision", "stopped_early", "time_to_first_token_s",
+             "time_to_decision_s", "total_s", "eval_count"} plus the prompt-eval stats
+    (prompt_eval_count, prompt_eval_s, load_s) when the final frame was read.
+    """
+    payload = {"model": model, "prompt": prompt, "stream": True}
+    return _stream_until_decision(client, f"{api}/api/generate", payload, lambda f: f.get("response", ""),
+                                  accept, options, keep_alive)
+
+
+def chat_until_decision(client, api, model, messages, accept=is_valid_decision, options=None, keep_alive=None):
+    """
+    Same as generate_until_decision over /api/chat. A system message that is identical on
+    every call lets Ollama reuse its evaluated prefix instead of re-reading it each time.
+    """
+    payload = {"model": model, "messages": messages, "stream": True}
+    return _stream_until_decision(client, f"{api}/api/chat", payload,
+                                  lambda f: (f.get("message") or {}).get("content", ""), accept, options, keep_alive)
+
+
+def _stream_until_decision(client, url, payload, token_of, accept, options, keep_alive):
+    if options:
+        payload["options"] = options
+    if keep_alive:
+        payload["keep_alive"] = keep_alive
+    # nested: a stray "{" in the preamble must not hold back the decision that follows it
+    scanner = JsonObjectScanner(nested=True)
+    pieces = []
+    out = {"raw": "", "decision": None, "stopped_early": False, "time_to_first_token_s": None,
+           "time_to_decision_s": None, "total_s": None, "eval_count": None}
+    t0 = time.perf_counter()
+    resp = client.post(url, json=payload, stream=True)
+    try:
+        resp.raise_for_status()
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            frame = json.loads(line)
+            if "error" in frame:
+                raise RuntimeError(frame["error"])
+            token = token_of(frame)
+            if token:
+                if out["time_to_first_token_s"] is None:
+                    out["time_to_first_token_s"] = time.perf_counter() - t0
+                pieces.append(token)
+                for candidate in scanner.feed(token):
+                    obj = loads_lenient(candidate)
+                    if obj is not None and accept(obj):
+                        out["decision"] = obj
+                        out["time_to_decision_s"] = time.perf_counter() - t0
+                        out["stopped_early"] = not frame.get("done", False)
+                        break
+            if frame.get("done"):
+                out.update(done_stats(frame))
+                break
+            if out["decision"] is not None:
+                break
+    finally:
+        resp.close()
+    out["total_s"] = time.perf_counter() - t0
+    out["raw"] = "".join(pieces)
+    return out
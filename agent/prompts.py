@@ -1,20 +1,72 @@
 # agent/prompts.py
-SYSTEM_PROMPT = """
-You are a small, precise network tool-orchestrator. You MUST respond ONLY with a single JSON object
-and nothing else (no explanations). The JSON must exactly match one of these shapes:
+from functools import lru_cache
 
-1) For inventory queries:
-   {"tool": "inventory", "args": {"name": "<optional device name or null>"}}
+# stands in for the tool server's command list (/tool/commands) when it cannot be fetched
+EXAMPLE_COMMANDS = ("show ip interface brief", "show version", "show ip bgp summary", "show running-config",
+                    "show interfaces status")
+# likewise for the fleet-query fields (/tool/commands "query_fields", server/fleet_index.FIELDS)
+EXAMPLE_QUERY_FIELDS = ("ip", "interface", "neighbor", "neighbor_as", "local_as", "version")
+RESPOND_JSON = "Respond with the exact JSON object only."
 
-2) For read-only show commands:
-   {"tool": "run_show", "args": {"device": "<device name>", "command": "<exact allowed command>"}}
+# both prompts are sent as a pinned system message, so they must not vary between calls
+# for the same command list and query fields; the command list goes last and is one line, no quotes
+_SYSTEM_TEMPLATE = """You are a precise network tool-orchestrator. Reply with ONE JSON object and nothing else, in one of these shapes:
+1) Inventory: {{"tool": "inventory", "args": {{"name": "<device name>" or null}}}}
+2) Show command on one device: {{"tool": "run_show", "args": {{"device": "<device>", "command": "<allowed command>"}}}}
+3) Same show command on several devices: {{"tool": "run_show", "args": {{"devices": ["<device>", ...] or "<glob such as spine*>", "command": "<allowed command>"}}}}
+4) Which devices have a value: {{"tool": "query", "args": {{"field": "{fields}", "value": "<exact value>"}}}}
+Rules: no extra keys, no prose. A device name (e.g. leaf1), "show", interfaces, BGP or version: shape 2. Several devices ("all spines"): shape 3. Which device(s) have an address, neighbor, AS or version: shape 4. Unsure: shape 1.
+Allowed commands: {commands}"""
 
-Allowed commands (examples): "show ip interface brief", "show version", "show ip bgp summary",
-"show running-config", "show interfaces status"
+_PLANNER_TEMPLATE = """You are a network troubleshooting agent that answers a question over several steps of read-only tool calls. Reply with ONE JSON object and nothing else:
+1) Call tools (independent calls run in parallel): {{"calls": [<call>, ...]}} where a call is
+   {{"tool": "run_show", "args": {{"device": "<device>", "command": "<allowed command>"}}}}
+   {{"tool": "run_show", "args": {{"devices": "<glob such as leaf*>", "command": "<allowed command>"}}}}
+   {{"tool": "query", "args": {{"field": "{fields}", "value": "<exact value>"}}}}
+   {{"tool": "inventory", "args": {{"name": null}}}}
+2) Answer once the observations are enough: {{"final": "<short answer for a network engineer, citing devices and values>"}}
+Rules: use "query" first to find which devices own an IP, interface, BGP neighbor, AS or version. Ask for everything you need in one step when the calls are independent. Never repeat a call you already have an observation for. No prose outside the JSON object.
+Allowed commands: {commands}"""
 
-Rules:
-- Do NOT include any additional keys.
-- Do not return plain text or commentary.
-- If the user asks about interfaces, BGP, version, or says "show" or mentions a device name (e.g., leaf1), prefer "run_show".
-- If you cannot decide, return the inventory tool with args.name either null or the device name.
-"""
\ No newline at end of file
+
+def format_commands(commands):
+    """The allowed commands on one line, deduplicated: "show version; show ip route; ..."."""
+    return "; ".join(dict.fromkeys(c.strip() for c in commands if c and c.strip()))
+
+
+def format_fields(fields):
+    """The query fields as one alternative: "ip|interface|..."."""
+    return "|".join(dict.fromkeys(fields))
+
+
+@lru_cache(maxsize=16)
+def build_system_prompt(commands=EXAMPLE_COMMANDS, fields=EXAMPLE_QUERY_FIELDS):
+    """Single-decision system prompt for tuples of allowed commands and query fields."""
+    return _SYSTEM_TEMPLATE.format(commands=format_commands(commands), fields=format_fields(fields))
+
+
+@lru_cache(maxsize=16)
+def build_planner_prompt(commands=EXAMPLE_COMMANDS, fields=EXAMPLE_QUERY_FIELDS):
+    """Planning-loop system prompt for tuples of allowed commands and query fields."""
+    return _PLANNER_TEMPLATE.format(commands=format_commands(commands), fields=format_fields(fields))
+
+
+def decision_messages(system, question):
+    """Chat messages for one decision: the pinned system prompt, then the question."""
+    return [{"role": "system", "content": system},
+            {"role": "user", "content": (question or "") + "\n\n" + RESPOND_JSON}]
+
+
+def flatten_messages(messages):
+    """One /api/generate prompt for a chat: the system text, then "User:"/"Assistant:" turns."""
+    parts = []
+    for m in messages:
+        if m["role"] == "system":
+            parts.append(m["content"])
+        else:
+            parts.append(("Assistant: " if m["role"] == "assistant" else "User: ") + m["content"])
+    return "\n\n".join(parts)
+
+
+SYSTEM_PROMPT = build_system_prompt()
+PLANNER_PROMPT = build_planner_prompt()
@@ -0,0 +1,98 @@
+# agent/tracing.py
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# sent on every tool-server call; the server echoes it and tags its own spans with it
+CORRELATION_HEADER = "X-Correlation-ID"
+
+# TRACE=0 disables the JSONL file; spans are still kept in memory for the UI
+TRACE = os.environ.get("TRACE", "1") == "1"
+TRACE_FILE = os.environ.get("TRACE_FILE", str(Path(__file__).parent / ".trace.jsonl"))
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_parent_id = contextvars.ContextVar("parent_span_id", default=None)
+
+_write_lock = threading.Lock()
+_file = None
+_recent = deque(maxlen=5000)
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+@contextmanager
+def trace(trace_id=None):
+    """Run the block under a correlation id (a new one unless given); yields the id."""
+    token = _trace_id.set(trace_id or new_trace_id())
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time the block as one span of the current trace. Yields a dict the block can add
+    attributes to (byte sizes, status, ...). Outside a trace this only times the block.
+    """
+    span_id = uuid.uuid4().hex[:8]
+    record = {"trace_id": _trace_id.get(), "span_id": span_id, "parent_id": _parent_id.get(),
+              "name": name, "ts": round(time.time(), 6)}
+    token = _parent_id.set(span_id)
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        _parent_id.reset(token)
+        if record["trace_id"] is not None:
+            record.update(attrs)
+            _emit(record)
+
+
+def _emit(record):
+    global _file
+    _recent.append(record)
+    if not TRACE:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        try:
+            if _file is None:
+                _file = open(TRACE_FILE, "a", buffering=1)
+            _file.write(line)
+        except OSError:
+            pass
+
+
+def spans_for(trace_id):
+    """Spans recorded in this process for trace_id, in completion order."""
+    return [s for s in list(_recent) if s["trace_id"] == trace_id]
+
+
+def headers():
+    """Correlation header for outgoing requests ({} outside a trace)."""
+    tid = _trace_id.get()
+    return {CORRELATION_HEADER: tid} if tid else {}
+
+
+def bind(fn):
+    """Wrap fn to run in a copy of the caller's context (trace id and parent span) on another thread."""
+    ctx = contextvars.copy_context()
+    return lambda *a, **kw: ctx.copy().run(fn, *a, **kw)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Flask (gunicorn gthread) vs asyncio (uvicorn + tool_server_async.py) at increasing client
+concurrency.
+
+    python scripts/bench_async_server.py                                   # 10, 100, 1000 clients
+    python scripts/bench_async_server.py --clients 1000 --workloads hot_key --duration 20
+    python scripts/bench_async_server.py --workers 2 --threads 16 --out bench/async_server.json
+
+For every server, workload and client count, `server/serve.py --server <name>` is started on
+a free port and driven by --clients concurrent keep-alive HTTP/1.1 connections (a raw asyncio
+client, spread over --client-procs processes, each connection sending its next request as
+soon as the previous answer arrives) for --duration seconds. Workloads over the bundled mocks:
+
+    cached    random /tool/run_show lookups plus --inventory-ratio /tool/inventory, outputs
+              preloaded in memory: the cost of the server itself
+    uncached  the same mix with MOCK_CACHE_BYTES=0, so every lookup reads its file
+    hot_key   every client asks for the same (device, command) with the cache off: the asyncio
+              server coalesces concurrent identical lookups into one read
+
+Reported per run: requests/sec, p50/p95/p99 latency, errors, and how many file reads the store
+did (store misses) against how many lookups were coalesced or answered from memory. Client and
+server share the host, so on small machines the numbers are relative, not absolute.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SERVER = ROOT / "server" / "serve.py"
+MOCK_DIR = ROOT / "server" / "pyats_mocks"
+COMMANDS = ["show ip interface brief", "show version", "show ip bgp summary", "show interfaces status"]
+WORKLOADS = ("cached", "uncached", "hot_key")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _http(base, path, body=None):
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(base + path, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def wait_ready(base, proc, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            _http(base, "/tool/inventory", {})
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base} did not become ready")
+
+
+def _request(port, path, body):
+    data = json.dumps(body).encode()
+    return (f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n").encode() + data
+
+
+def request_mix(port, workload, devices, inventory_ratio, n, seed):
+    """n pre-encoded (kind, bytes) requests for one connection."""
+    rnd = random.Random(seed)
+    if workload == "hot_key":
+        raw = _request(port, "/tool/run_show", {"device": devices[0], "command": COMMANDS[0]})
+        return [("run_show", raw)] * n
+    out = []
+    for _ in range(n):
+        if rnd.random() < inventory_ratio:
+            out.append(("inventory", _request(port, "/tool/inventory", {})))
+        else:
+            body = {"device": rnd.choice(devices), "command": rnd.choice(COMMANDS)}
+            out.append(("run_show", _request(port, "/tool/run_show", body)))
+    return out
+
+
+async def _connection(streams, mix, deadline, lat):
+    reader, writer = streams
+    errors = i = 0
+    try:
+        while time.perf_counter() < deadline:
+            kind, raw = mix[i % len(mix)]
+            i += 1
+            t0 = time.perf_counter()
+            writer.write(raw)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                if line[:15].lower() == b"content-length:":
+                    length = int(line[15:])
+            await reader.readexactly(length)
+            lat[kind].append(time.perf_counter() - t0)
+            if head[9:12] != b"200":
+                errors += 1
+    except (OSError, asyncio.IncompleteReadError):
+        errors += 1
+    finally:
+        writer.close()
+    return errors
+
+
+async def _drive(port, mixes, duration):
+    lat = {"run_show": [], "inventory": []}
+    # every connection is open before the clock starts
+    conns = await asyncio.gather(*(asyncio.open_connection("127.0.0.1", port) for _ in mixes))
+    deadline = time.perf_counter() + duration
+    errors = await asyncio.gather(*(_connection(c, mix, deadline, lat) for c, mix in zip(conns, mixes)))
+    return lat, sum(errors)
+
+
+def client_proc(port, mixes, duration):
+    return asyncio.run(_drive(port, mixes, duration))
+
+
+def percentiles(samples, duration):
+    if not samples:
+        return {"requests": 0}
+    s = sorted(samples)
+    pick = lambda p: s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] * 1000
+    return {"requests": len(s), "req_per_s": round(len(s) / duration, 1), "p50_ms": round(pick(50), 3),
+            "p95_ms": round(pick(95), 3), "p99_ms": round(pick(99), 3)}
+
+
+def run_one(server, workload, clients, args, devices):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, TRACE="0", MOCK_PRELOAD="1" if workload == "cached" else "0")
+    if workload != "cached":
+        env["MOCK_CACHE_BYTES"] = "0"
+    proc = subprocess.Popen([sys.executable, str(SERVER), "--server", server, "--bind", f"127.0.0.1:{port}",
+                             "--workers", str(args.workers), "--threads", str(args.threads),
+                             "--no-reload-on-change"],
+                            cwd=str(SERVER.parent), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(base, proc)
+        before = _http(base, "/tool/cache_stats")["result"]
+        # each connection cycles through its own seeded list of requests
+        per_conn = 200 if workload != "hot_key" else 1
+        mixes = [request_mix(port, workload, devices, args.inventory_ratio, per_conn, i) for i in range(clients)]
+        procs = max(1, min(args.client_procs, clients))
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            futures = [pool.submit(client_proc, port, mixes[i::procs], args.duration) for i in range(procs)]
+            results = [f.result() for f in futures]
+        after = _http(base, "/tool/cache_stats")["result"]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    lat = {"run_show": [], "inventory": []}
+    errors = 0
+    for part, err in results:
+        errors += err
+        for k in lat:
+            lat[k].extend(part[k])
+    total = len(lat["run_show"]) + len(lat["inventory"])
+    row = {"server": server, "workload": workload, "clients": clients, "errors": errors,
+           "req_per_s": round(total / args.duration, 1),
+           "run_show": percentiles(lat["run_show"], args.duration),
+           "inventory": percentiles(lat["inventory"], args.duration),
+           "store_misses": after["misses"] - before["misses"]}
+    if "async_reads" in after:
+        row["async_reads"] = {k: after["async_reads"][k] - before["async_reads"][k]
+                              for k in ("reads", "coalesced", "cached")}
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--servers", default="gunicorn,asyncio")
+    ap.add_argument("--clients", default="10,100,1000", help="comma-separated concurrent connection counts")
+    ap.add_argument("--workloads", default=",".join(WORKLOADS))
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--workers", type=int, default=1, help="server processes (both servers)")
+    ap.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    ap.add_argument("--client-procs", type=int, default=max(1, min(4, (os.cpu_count() or 1) // 2)))
+    ap.add_argument("--inventory-ratio", type=float, default=0.1)
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    args = ap.parse_args()
+
+    unknown = set(args.workloads.split(",")) - set(WORKLOADS)
+    if unknown:
+        ap.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+    devices = sorted(p.name for p in MOCK_DIR.iterdir() if p.is_dir())
+    rows = []
+    print(f"{'server':<9} {'workload':<9} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6} {'file reads':>10}", file=sys.stderr)
+    for workload in args.workloads.split(","):
+        for clients in (int(c) for c in args.clients.split(",")):
+            for server in args.servers.split(","):
+                row = run_one(server, workload, clients, args, devices)
+                rows.append(row)
+                rs = row["run_show"]
+                print(f"{server:<9} {workload:<9} {clients:>7} {row['req_per_s']:>9} {rs.get('p50_ms', '-'):>8} "
+                      f"{rs.get('p99_ms', '-'):>8} {row['errors']:>6} {row['store_misses']:>10}", file=sys.stderr)
+    report = {"options": {k: v for k, v in vars(args).items() if k != "out"}, "cpus": os.cpu_count(), "runs": rows}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Per-call requests.post vs the pooled HttpClient (and its asyncio front end) against an
+in-process tool server.
+
+    python scripts/bench_http_client.py --requests 500
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "agent"))
+sys.path.insert(0, str(ROOT / "server"))
+
+from http_client import AsyncHttpClient, HttpClient  # noqa: E402
+from tool_server import app, store  # noqa: E402
+
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def start_server():
+    srv = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_KeepAliveHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_port}"
+
+
+def summarize(samples, wall):
+    s = sorted(samples)
+    pick = lambda p: s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+    return {"requests": len(s), "req_per_s": round(len(s) / wall, 1),
+            "p50_ms": round(pick(50) * 1000, 3), "p99_ms": round(pick(99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(s) * 1000, 3)}
+
+
+def run_sync(post, url, bodies):
+    samples = []
+    t_start = time.perf_counter()
+    for body in bodies:
+        t0 = time.perf_counter()
+        post(url, json=body, timeout=10).raise_for_status()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - t_start)
+
+
+async def run_async(client, url, bodies, fanout):
+    aclient = AsyncHttpClient(client)
+    t_start = time.perf_counter()
+    for i in range(0, len(bodies), fanout):
+        await aclient.gather_json([(url, b) for b in bodies[i:i + fanout]])
+    wall = time.perf_counter() - t_start
+    return {"requests": len(bodies), "fanout": fanout, "req_per_s": round(len(bodies) / wall, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--fanout", type=int, default=8, help="concurrent calls per async turn")
+    args = ap.parse_args()
+
+    store.preload()
+    srv, base = start_server()
+    url = f"{base}/tool/run_show"
+    devices = store.devices()
+    bodies = [{"device": devices[i % len(devices)], "command": "show ip interface brief"}
+              for i in range(args.requests)]
+
+    report = {"per_call_requests_post": run_sync(requests.post, url, bodies)}
+    report["per_call_requests_post"]["connections_opened"] = len(bodies)
+
+    pooled = HttpClient()
+    report["pooled_http_client"] = run_sync(pooled.post, url, bodies)
+    report["pooled_http_client"]["connections_opened"] = pooled.connections_opened()
+
+    async_client = HttpClient(pool_maxsize=args.fanout)
+    report["async_http_client"] = asyncio.run(run_async(async_client, url, bodies, args.fanout))
+    report["async_http_client"]["connections_opened"] = async_client.connections_opened()
+
+    srv.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
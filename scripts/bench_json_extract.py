@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Fuzz corpus and microbenchmark for json_extract.extract_json against the regex extractor it
+replaced (the copy that used to live in agent_loop.py, kept below as legacy_extract), plus the
+early stop of a streamed answer (stream_extract: the text fed in STREAM_CHUNK-character tokens
+to the nested scanner ollama_stream.py uses, no fallback at the end).
+
+    python scripts/bench_json_extract.py                        # generated corpus, both extractors
+    python scripts/bench_json_extract.py --cases 20000 --rounds 5 --out bench/json_extract.json
+    python scripts/bench_json_extract.py --write-corpus corpus.jsonl   # dump the corpus and exit
+    python scripts/bench_json_extract.py --corpus recorded.jsonl       # recorded LLM outputs instead
+
+A corpus line is {"category", "text", "expected"}: the decision object the text should yield,
+or null when there is none to find. The generated corpus (seeded) wraps random tool decisions
+the way models actually answer: bare or pretty-printed, in code fences, surrounded by chatter
+(with stray braces), with braces and escaped quotes inside strings, trailing commas, an example
+object before the real one, CRLF line endings, cut off mid-object, or with no JSON at all.
+Reported per category: how often each extractor returned exactly the expected object, and
+per-call p50/p99 latency. legacy_extract is expected to miss some categories; a miss by
+extract_json or stream_extract exits non-zero.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "agent"))
+
+from json_extract import JsonObjectScanner, extract_json, is_valid_decision, loads_lenient  # noqa: E402
+
+STREAM_CHUNK = 4
+
+
+def legacy_extract(text):
+    """The pre-json_extract agent extractor, verbatim (non-greedy match stops at the first "}")."""
+    if not text or not isinstance(text, str):
+        return None
+    text = text.strip()
+    text = re.sub(r"^```(?:json)?\s*", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\s*```$", "", text, flags=re.IGNORECASE)
+    m_fence = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", text, flags=re.IGNORECASE)
+    if m_fence:
+        candidate = m_fence.group(1).strip()
+    else:
+        if not text.lstrip().startswith("{"):
+            lines = text.splitlines()
+            for i, line in enumerate(lines):
+                if line.strip().startswith("{"):
+                    candidate = "\n".join(lines[i:])
+                    break
+            else:
+                candidate = text
+        else:
+            candidate = text
+    candidate = candidate.strip()
+    m = re.search(r'(\{[\s\S]*?\})', candidate)
+    if not m:
+        return None
+    json_text = m.group(1)
+    try:
+        return json.loads(json_text)
+    except Exception:
+        cleaned = re.sub(r",\s*}", "}", json_text)
+        cleaned = re.sub(r",\s*\]", "]", cleaned)
+        try:
+            return json.loads(cleaned)
+        except Exception as e:
+            print("[WARN] Failed to json.loads extracted candidate:", e)
+            return None
+
+
+COMMANDS = ["show ip interface brief", "show version", "show ip bgp summary", "show running-config",
+            "show interfaces status", "show ip route", "show logging"]
+CHATTER = ["Sure!", "Here is the JSON you asked for:", "I'll look that up.", "Based on your question,",
+           "The device is reachable.", "Let me know if you need anything else.", "Hope this helps."]
+
+
+def random_decision(rnd):
+    dev = f"{rnd.choice(['leaf', 'spine'])}{rnd.randint(1, 500)}"
+    kind = rnd.randrange(6)
+    if kind == 0:
+        return {"tool": "inventory", "args": {"name": rnd.choice([None, dev])}}
+    if kind == 1:
+        return {"tool": "run_show", "args": {"devices": rnd.choice(["spine*", "leaf*", [dev, "spine1"]]),
+                                             "command": rnd.choice(COMMANDS)}}
+    if kind == 2:
+        return {"tool": "query", "args": {"field": rnd.choice(["ip", "neighbor_as", "version"]),
+                                          "value": rnd.choice(["10.128.0.9", "65002", "17.8.5"])}}
+    if kind == 3:
+        # braces and quotes inside strings
+        return {"tool": "run_show", "args": {"device": dev,
+                                             "command": rnd.choice(COMMANDS) + rnd.choice([" | include }", " | include {", " | include \"x\""])}}
+    return {"tool": "run_show", "args": {"device": dev, "command": rnd.choice(COMMANDS)}}
+
+
+def _chatter(rnd, n):
+    return " ".join(rnd.choice(CHATTER) for _ in range(n))
+
+
+# category -> (decision, rnd) -> (text, expected)
+WRAPPERS = {
+    "bare": lambda d, r: (json.dumps(d), d),
+    "pretty": lambda d, r: (json.dumps(d, indent=2), d),
+    "fenced_json": lambda d, r: (f"```json\n{json.dumps(d, indent=2)}\n```", d),
+    "fenced_after_text": lambda d, r: (f"{_chatter(r, 2)}\n```\n{json.dumps(d)}\n```\n{_chatter(r, 1)}", d),
+    "chatty": lambda d, r: (f"{_chatter(r, 3)}\n{json.dumps(d)}\n{_chatter(r, 2)}", d),
+    "chatty_inline": lambda d, r: (f"{_chatter(r, 2)} {json.dumps(d)} {_chatter(r, 1)}", d),
+    "stray_braces": lambda d, r: (f"Use the {{device}} placeholder. {json.dumps(d)} (or {{other}})", d),
+    "unclosed_brace": lambda d, r: (f"Use a brace {{ to start. {json.dumps(d)}", d),
+    "emoticon_brace": lambda d, r: (f"Sure :-{{ here: {json.dumps(d)} {_chatter(r, 1)}", d),
+    "long_chatter": lambda d, r: (_chatter(r, 400) + "\n" + json.dumps(d) + "\n" + _chatter(r, 400), d),
+    "trailing_comma": lambda d, r: (json.dumps(d)[:-2] + ",}}" if json.dumps(d).endswith("}}") else json.dumps(d), d),
+    "example_first": lambda d, r: ('For example {"example": true} would be wrong. Answer:\n' + json.dumps(d), d),
+    "two_objects": lambda d, r: (json.dumps(d) + "\n" + json.dumps({"tool": "inventory", "args": {"name": None}}), d),
+    "crlf": lambda d, r: (f"{_chatter(r, 1)}\r\n" + json.dumps(d, indent=2).replace("\n", "\r\n"), d),
+    "truncated": lambda d, r: (json.dumps(d)[: r.randint(5, len(json.dumps(d)) - 3)], None),
+    "no_json": lambda d, r: (_chatter(r, 5), None),
+}
+
+
+def generate_corpus(n, seed):
+    rnd = random.Random(seed)
+    names = sorted(WRAPPERS)
+    corpus = []
+    for i in range(n):
+        category = names[i % len(names)]
+        text, expected = WRAPPERS[category](random_decision(rnd), rnd)
+        corpus.append({"category": category, "text": text, "expected": expected})
+    return corpus
+
+
+def stream_extract(text):
+    scanner = JsonObjectScanner(nested=True)
+    for i in range(0, len(text), STREAM_CHUNK):
+        for candidate in scanner.scan(text[i:i + STREAM_CHUNK]):
+            obj = loads_lenient(candidate)
+            if obj is not None and is_valid_decision(obj):
+                return obj
+    return None
+
+
+def run(fn, corpus, rounds):
+    by_cat = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for case in corpus:
+            samples = []
+            for _ in range(rounds):
+                t0 = time.perf_counter()
+                got = fn(case["text"])
+                samples.append(time.perf_counter() - t0)
+            entry = by_cat.setdefault(case["category"], {"n": 0, "correct": 0, "samples": []})
+            entry["n"] += 1
+            entry["correct"] += got == case["expected"]
+            entry["samples"].append(statistics.median(samples))
+    return by_cat
+
+
+def summarize(by_cat):
+    out, all_samples, correct, n = {}, [], 0, 0
+    for cat, e in sorted(by_cat.items()):
+        s = sorted(e["samples"])
+        out[cat] = {"n": e["n"], "accuracy": round(e["correct"] / e["n"], 4),
+                    "p50_us": round(s[len(s) // 2] * 1e6, 2), "p99_us": round(s[int(len(s) * 0.99) - 1 if len(s) > 1 else 0] * 1e6, 2)}
+        all_samples += s
+        correct += e["correct"]
+        n += e["n"]
+    all_samples.sort()
+    out["all"] = {"n": n, "accuracy": round(correct / n, 4), "p50_us": round(all_samples[n // 2] * 1e6, 2),
+                  "mean_us": round(statistics.fmean(all_samples) * 1e6, 2)}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cases", type=int, default=5000)
+    ap.add_argument("--rounds", type=int, default=3, help="timed calls per case (median kept)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--corpus", help="JSONL corpus to use instead of generating one")
+    ap.add_argument("--write-corpus", help="write the generated corpus here and exit")
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    args = ap.parse_args()
+
+    if args.corpus:
+        corpus = [json.loads(line) for line in Path(args.corpus).read_text().splitlines() if line.strip()]
+    else:
+        corpus = generate_corpus(args.cases, args.seed)
+    if args.write_corpus:
+        Path(args.write_corpus).write_text("".join(json.dumps(c) + "\n" for c in corpus))
+        print(f"[INFO] wrote {len(corpus)} cases to {args.write_corpus}")
+        return
+
+    report = {"cases": len(corpus), "rounds": args.rounds,
+              "extract_json": summarize(run(extract_json, corpus, args.rounds)),
+              "stream_extract": summarize(run(stream_extract, corpus, args.rounds)),
+              "legacy": summarize(run(legacy_extract, corpus, args.rounds))}
+    new, old = report["extract_json"]["all"], report["legacy"]["all"]
+    report["speedup_mean"] = round(old["mean_us"] / new["mean_us"], 2) if new["mean_us"] else None
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+    # a regression in what the shared extractor gets right should fail CI-style runs
+    failed = [f"{fn}/{c}" for fn in ("extract_json", "stream_extract")
+              for c, s in report[fn].items() if s["accuracy"] < 1.0]
+    if failed:
+        print(f"[WARN] missed cases in: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Directory layout (MockStore) vs packed file (PackStore): cold start, lookup latency and RSS.
+
+    python scripts/bench_mock_pack.py --copies 200 --lookups 20000
+
+The current pack is replicated --copies times under a temp dir (leaf1 -> leaf1-c0007, ...)
+and converted to a pack. Each layout is then measured in a fresh child process: start-up
+(store construction + device list), a first pass over every output, random warm lookups
+(p50/p99) and peak RSS. The OS page cache is not dropped, so "cold" means a cold process.
+"""
+import argparse
+import json
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "server"))
+
+from mock_pack import PackStore, pack_dir  # noqa: E402
+from mock_store import MockStore  # noqa: E402
+
+MOCK_DIR = ROOT / "server" / "pyats_mocks"
+
+
+def build_fixture(tmp, copies):
+    src = tmp / "pyats_mocks"
+    for ddir in sorted(p for p in MOCK_DIR.iterdir() if p.is_dir()):
+        for i in range(copies):
+            shutil.copytree(ddir, src / f"{ddir.name}-c{i:04d}")
+    pack = tmp / "pyats_mocks.pack"
+    t0 = time.perf_counter()
+    entries, size = pack_dir(src, pack)
+    return src, pack, {"entries": entries, "bytes": size, "pack_s": round(time.perf_counter() - t0, 3)}
+
+
+def measure(kind, path, lookups, seed):
+    t0 = time.perf_counter()
+    if kind == "dir":
+        # budget large enough to hold the pack so the warm phase measures cache hits
+        store = MockStore(path, max_bytes=1 << 40, poll_interval=3600)
+    else:
+        store = PackStore(path, poll_interval=3600)
+    devices = store.devices()
+    startup = time.perf_counter() - t0
+
+    if kind == "dir":
+        keys = [(d, f.name) for d in devices for f in sorted((Path(path) / d).glob("*.txt"))]
+    else:
+        keys = [(d, f) for d in devices for f in store.files(d)]
+    t0 = time.perf_counter()
+    for d, f in keys:
+        store.get(d, f)
+    first_pass = time.perf_counter() - t0
+
+    rnd = random.Random(seed)
+    samples = []
+    for _ in range(lookups):
+        d, f = rnd.choice(keys)
+        t = time.perf_counter()
+        store.get(d, f)
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    return {
+        "layout": kind,
+        "startup_ms": round(startup * 1000, 2),
+        "first_pass_ms": round(first_pass * 1000, 2),
+        "lookup_p50_us": round(statistics.median(samples) * 1e6, 2),
+        "lookup_p99_us": round(samples[int(len(samples) * 0.99) - 1] * 1e6, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--copies", type=int, default=100, help="replicas of each device in the pack")
+    ap.add_argument("--lookups", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--child", nargs=2, metavar=("LAYOUT", "PATH"), help=argparse.SUPPRESS)
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], args.child[1], args.lookups, args.seed)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src, pack, fixture = build_fixture(Path(tmp), args.copies)
+        results = []
+        for kind, path in (("dir", src), ("pack", pack)):
+            out = subprocess.run([sys.executable, __file__, "--child", kind, str(path),
+                                  "--lookups", str(args.lookups), "--seed", str(args.seed)],
+                                 check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out))
+    report = {"fixture": fixture, "results": results}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Prompt-evaluation cost per LLM decision, before and after a change to the agent's prompts.
+
+    python scripts/bench_prompt.py                          # agent/ at HEAD vs the working tree
+    python scripts/bench_prompt.py --rev HEAD~1 --prompt-eval-rate 300 --load-time 2
+    python scripts/bench_prompt.py --idle 2 --default-keep-alive 1 --out bench/prompt.json
+
+Both versions of agent/ (the one at --rev, extracted with git archive, and the working tree)
+run in their own process against an in-process tool server and scripts/fake_ollama.py. The
+fake models how Ollama evaluates prompts: only the tokens after the longest prefix it still
+holds from an earlier request are evaluated, at --prompt-eval-rate tokens/s, and an idle
+model unloads after the request's keep_alive (--default-keep-alive when the client sends
+none) and pays --load-time on the next request. --idle pauses between questions, e.g. a
+scaled-down stand-in for a user who asks again after a few minutes.
+
+With the intent router and the decision cache off, every question is one llm_decide_tools()
+call, then the --planner questions run through run_agent(). Reported per version and phase:
+prompt tokens sent and evaluated per LLM call, prompt-eval and load seconds, model loads,
+and the wall time per question. The token counts come from the fake's approximate tokenizer,
+so they compare versions; they are not a real model's counts.
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+QUESTIONS = [
+    "is leaf2 healthy",
+    "what is the uptime of spine1",
+    "check the bgp neighbors of leaf3",
+    "which interfaces are down on spine2",
+    "how is leaf1 doing",
+    "anything wrong with spine3",
+    "look at the routing table of leaf4",
+    "is ntp in sync on spine4",
+]
+PLANNER_QUESTIONS = [
+    "why is the bgp session on leaf1 down",
+    "compare the software version of spine1 and spine2",
+    "is leaf5 reachable and are its uplinks up",
+]
+COUNTERS = ("prompt_tokens", "prompt_eval_tokens", "prompt_eval_s", "loads", "load_s")
+
+
+def _phase(fake, run, questions, idle):
+    before = fake.stats()
+    t0 = time.perf_counter()
+    for i, q in enumerate(questions):
+        if i and idle:
+            time.sleep(idle)
+        run(q)
+    wall = time.perf_counter() - t0 - idle * max(0, len(questions) - 1)
+    after = fake.stats()
+    calls = after["requests"] - before["requests"]
+    row = {"questions": len(questions), "llm_calls": calls, "chat_calls": after["chat"] - before["chat"],
+           "s_per_question": round(wall / max(1, len(questions)), 4)}
+    for k in COUNTERS:
+        row[k] = round(after[k] - before[k], 4)
+    row["prompt_tokens_per_call"] = round(row["prompt_tokens"] / max(1, calls), 1)
+    row["evaluated_per_call"] = round(row["prompt_eval_tokens"] / max(1, calls), 1)
+    row["prompt_eval_s_per_call"] = round(row["prompt_eval_s"] / max(1, calls), 4)
+    return row
+
+
+def measure(opts):
+    """Run in the child process, with the agent/ under test first on sys.path."""
+    from werkzeug.serving import make_server
+    import fake_ollama
+    import tool_server
+
+    fake = fake_ollama.FakeOllama(latency=opts["latency"], slots=opts["slots"],
+                                  prompt_eval_rate=opts["prompt_eval_rate"], load_time=opts["load_time"],
+                                  keep_alive=opts["default_keep_alive"]).start()
+    httpd = make_server("127.0.0.1", 0, tool_server.create_app(preload=False, watch=False), threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    os.environ.update(TOOL_SERVER=f"http://127.0.0.1:{httpd.server_port}", OLLAMA_API=fake.url)
+
+    import agent_loop
+
+    with contextlib.redirect_stdout(sys.stderr):
+        decide = _phase(fake, lambda q: agent_loop.llm_decide_tools(q, use_router=False, use_cache=False),
+                        opts["questions"], opts["idle"])
+        plan = _phase(fake, agent_loop.run_agent, opts["planner"], opts["idle"])
+    httpd.shutdown()
+    fake.stop()
+    return {"decide": decide, "planner": plan}
+
+
+def _extract_agent(rev, dest):
+    """agent/ as of rev, unpacked under dest; returns its path."""
+    blob = subprocess.run(["git", "-C", str(ROOT), "archive", "--format=tar", rev, "agent"],
+                          check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=BytesIO(blob)) as tar:
+        tar.extractall(dest)
+    return Path(dest) / "agent"
+
+
+def run_version(agent_dir, opts, tmp):
+    env = dict(os.environ, TRACE="0", INTENT_ROUTER="0", DECISION_CACHE="0",
+               DECISION_CACHE_PATH=str(Path(tmp) / "decisions.sqlite3"), SNAPSHOT_DIR=str(Path(tmp) / "snapshots"),
+               PYTHONPATH=os.pathsep.join([str(agent_dir), str(ROOT / "scripts"), str(ROOT / "server")]))
+    # the agent's own env overrides would hide the difference between versions
+    for key in ("OLLAMA_CHAT", "OLLAMA_KEEP_ALIVE", "OLLAMA_STREAM"):
+        env.pop(key, None)
+    out = subprocess.run([sys.executable, __file__, "--child", json.dumps(opts)], env=env, check=True,
+                         capture_output=True, text=True, cwd=str(agent_dir)).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rev", default="HEAD", help="git revision of agent/ to compare against the working tree")
+    ap.add_argument("--prompt-eval-rate", type=float, default=500.0, help="fake prompt tokens evaluated per second")
+    ap.add_argument("--load-time", type=float, default=1.0, help="fake model load seconds")
+    ap.add_argument("--default-keep-alive", type=float, default=300.0,
+                    help="seconds the fake keeps an idle model loaded when the request sends no keep_alive")
+    ap.add_argument("--idle", type=float, default=0.0, help="seconds between questions")
+    ap.add_argument("--slots", type=int, default=1)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--questions", type=int, default=len(QUESTIONS), help="decision questions to ask")
+    ap.add_argument("--planner", type=int, default=len(PLANNER_QUESTIONS), help="planner questions to ask")
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(json.loads(args.child))))
+        return
+
+    opts = {"prompt_eval_rate": args.prompt_eval_rate, "load_time": args.load_time,
+            "default_keep_alive": args.default_keep_alive, "idle": args.idle, "slots": args.slots,
+            "latency": args.latency, "questions": (QUESTIONS * 4)[:args.questions],
+            "planner": (PLANNER_QUESTIONS * 4)[:args.planner]}
+    versions = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        versions[args.rev] = run_version(_extract_agent(args.rev, Path(tmp) / "rev"), opts, tmp)
+        versions["working tree"] = run_version(ROOT / "agent", opts, tmp)
+
+    print(f"{'version':<14} {'phase':<8} {'calls':>5} {'sent/call':>9} {'eval/call':>9} {'eval s/call':>11} "
+          f"{'loads':>5} {'load s':>7} {'s/question':>10}", file=sys.stderr)
+    for name, phases in versions.items():
+        for phase, r in phases.items():
+            print(f"{name:<14} {phase:<8} {r['llm_calls']:>5} {r['prompt_tokens_per_call']:>9} "
+                  f"{r['evaluated_per_call']:>9} {r['prompt_eval_s_per_call']:>11} {r['loads']:>5} "
+                  f"{r['load_s']:>7} {r['s_per_question']:>10}", file=sys.stderr)
+    report = {"options": {k: v for k, v in vars(args).items() if k not in ("out", "child")}, "versions": versions}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
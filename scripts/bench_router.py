@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Decision latency of the intent router vs the LLM path.
+
+    python scripts/bench_router.py                 # router only
+    python scripts/bench_router.py --llm --llm-limit 20   # also time llm_decide_tools (needs Ollama)
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "agent"))
+sys.path.insert(0, str(ROOT / "server"))
+
+from intent_router import IntentRouter  # noqa: E402
+from tool_server import ALLOWED_COMMANDS, MOCK_DIR  # noqa: E402
+
+TEMPLATES = [
+    "{cmd} on {dev}",
+    "Show me {cmd} for {dev}",
+    "{dev}: {cmd}",
+    "please run {cmd} on {dev}?",
+    "{cmd} on all {role}s",
+    "{cmd} | include up on {dev}",
+]
+FREEFORM = [
+    "List all devices",
+    "what is in the inventory",
+    "why is bgp flapping on {dev}",
+    "compare ospf neighbors between {dev} and the spines",
+    "is {dev} healthy",
+    "show version and show clock on {dev}",
+]
+
+
+def build_corpus(commands, devices, size, seed):
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        dev = rnd.choice(devices)
+        role = "".join(ch for ch in dev if ch.isalpha())
+        if rnd.random() < 0.8:
+            corpus.append(rnd.choice(TEMPLATES).format(cmd=rnd.choice(commands), dev=dev, role=role))
+        else:
+            corpus.append(rnd.choice(FREEFORM).format(dev=dev))
+    return corpus
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"n": 0}
+    s = sorted(samples_ms)
+    pick = lambda p: s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+    return {"n": len(s), "p50_ms": round(pick(50), 4), "p99_ms": round(pick(99), 4),
+            "mean_ms": round(statistics.fmean(s), 4), "max_ms": round(s[-1], 4)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--queries", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--llm", action="store_true", help="also time the LLM path (needs Ollama)")
+    ap.add_argument("--llm-limit", type=int, default=20)
+    args = ap.parse_args()
+
+    commands = ALLOWED_COMMANDS["cisco_ios"]
+    devices = sorted(p.name for p in MOCK_DIR.iterdir() if p.is_dir()) or ["leaf1", "spine1"]
+
+    t0 = time.perf_counter()
+    router = IntentRouter(commands, devices)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    corpus = build_corpus(commands, devices, args.queries, args.seed)
+    routed_ms, fallback_ms, answered = [], [], 0
+    for q in corpus:
+        t0 = time.perf_counter()
+        res = router.route(q)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if res["decision"] is not None and res["confidence"] >= 0.9:
+            answered += 1
+            routed_ms.append(elapsed)
+        else:
+            fallback_ms.append(elapsed)
+
+    report = {
+        "devices": len(devices),
+        "commands": len(commands),
+        "router_build_ms": round(build_ms, 3),
+        "router_coverage": round(answered / len(corpus), 4),
+        "router_answered": percentiles(routed_ms),
+        "router_deferred_to_llm": percentiles(fallback_ms),
+    }
+
+    if args.llm:
+        import agent_loop
+        llm_ms = []
+        for q in corpus[: args.llm_limit]:
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent_loop.llm_decide_tools(q, use_router=False, use_cache=False)
+            llm_ms.append((time.perf_counter() - t0) * 1000)
+        report["llm_path"] = percentiles(llm_ms)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
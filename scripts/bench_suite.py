@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite: JSON extraction and coercion, tool server throughput and the full
+agent path, against generated fleets of several sizes and a fake Ollama (scripts/fake_ollama.py).
+
+    python scripts/bench_suite.py                                   # fleets of 10, 100, 1000 devices
+    python scripts/bench_suite.py --fleets 100,10000 --latency 0.05 --out bench/after.json
+    python scripts/bench_suite.py --compare bench/before.json --out bench/after.json
+
+Each fleet is generated into a temporary pack (generate_mock_pack.py) and measured in a fresh
+child process, so peak RSS is per fleet:
+
+    extract      json_extract.extract_json + agent_loop.coerce_decision over fake responses in
+                 every style (clean, fenced, chatty, malformed, truncated): latency and how
+                 often a usable decision came out
+    tool_server  the Flask test client: run_show (text and structured), run_show_batch over a
+                 glob, and /tool/query
+    agent        agent_turn (one decision + tool call) and run_agent (planner loop) over HTTP
+                 against a threaded tool server and the fake Ollama, router and cache off
+
+Every section reports requests/sec and p50/p95/p99 in ms. The JSON report also records the
+options and host, and --compare prints the p50 and throughput change against an earlier report.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+COMMANDS = ["show ip interface brief", "show version", "show ip bgp summary", "show interfaces status",
+            "show ip route", "show running-config"]
+TEMPLATES = ["{cmd} on {dev}", "Show me {cmd} for {dev}", "{dev}: {cmd}", "please run {cmd} on {dev}?"]
+
+
+def percentiles(samples_s, wall_s=None):
+    if not samples_s:
+        return {"n": 0}
+    s = sorted(samples_s)
+    pick = lambda p: s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] * 1000
+    out = {"n": len(s), "p50_ms": round(pick(50), 4), "p95_ms": round(pick(95), 4),
+           "p99_ms": round(pick(99), 4), "max_ms": round(s[-1] * 1000, 4)}
+    out["rps"] = round(len(s) / (wall_s if wall_s else sum(s)), 1)
+    return out
+
+
+def rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def timed(fn, items):
+    samples = []
+    t_wall = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - t0)
+    return percentiles(samples, time.perf_counter() - t_wall)
+
+
+def questions(devices, n, seed):
+    rnd = random.Random(seed)
+    return [rnd.choice(TEMPLATES).format(cmd=rnd.choice(COMMANDS), dev=rnd.choice(devices)) for _ in range(n)]
+
+
+# -- child: one fleet --
+def bench_extract(agent_loop, fake_ollama, devices, n, seed):
+    from json_extract import extract_json, is_decision
+    out = {}
+    qs = questions(devices, n, seed)
+    for style in fake_ollama.STYLES:
+        raws = [fake_ollama.dress(fake_ollama.synthetic_decision("User: " + q), style) for q in qs]
+        parsed = []
+        stats = timed(lambda r: parsed.append(extract_json(r)), raws)
+        stats["parsed_rate"] = round(sum(1 for p in parsed if isinstance(p, dict) and is_decision(p)) / n, 4)
+        stats["coerce"] = timed(lambda pq: agent_loop.coerce_decision(*pq), list(zip(parsed, qs)))
+        out[style] = stats
+    return out
+
+
+def bench_tool_server(tool_server, devices, n, seed):
+    client = tool_server.create_app(preload=False, watch=False).test_client()
+    rnd = random.Random(seed)
+    pairs = [(rnd.choice(devices), rnd.choice(COMMANDS)) for _ in range(n)]
+    structured = [(d, c) for d, c in pairs if c in tool_server.PARSERS]
+    post = lambda path, body: client.post(path, json=body).get_json()
+    tool_server.fleet_index.refresh()
+    return {
+        "run_show": timed(lambda p: post("/tool/run_show", {"device": p[0], "command": p[1]}), pairs),
+        "run_show_structured": timed(lambda p: post("/tool/run_show", {"device": p[0], "command": p[1],
+                                                                       "format": "structured"}), structured),
+        "run_show_batch_spines": timed(lambda c: post("/tool/run_show_batch", {"devices": "spine*", "commands": [c]}),
+                                       [rnd.choice(COMMANDS) for _ in range(max(1, n // 20))]),
+        "query_neighbor_as": timed(lambda v: post("/tool/query", {"field": "neighbor_as", "value": v}),
+                                   [str(65001 + rnd.randrange(len(devices))) for _ in range(n)]),
+    }
+
+
+def bench_agent(agent_loop, fake, devices, n, seed):
+    qs = questions(devices, n, seed)
+    ollama_before = fake.stats()["requests"]
+    turn = timed(lambda q: asyncio.run(agent_loop.agent_turn(q)), qs)
+    plans = []
+    planner = timed(lambda q: plans.append(agent_loop.run_agent(q)), qs)
+    planner["llm_steps_mean"] = round(sum(len(r["steps"]) for r in plans) / len(plans), 2)
+    planner["tool_calls_mean"] = round(sum(r["tool_calls"] for r in plans) / len(plans), 2)
+    return {"agent_turn": turn, "run_agent": planner, "ollama_requests": fake.stats()["requests"] - ollama_before}
+
+
+def run_child(opts):
+    from werkzeug.serving import make_server
+    import fake_ollama
+    import tool_server
+    fake = fake_ollama.FakeOllama(styles=opts["styles"], latency=opts["latency"],
+                                  token_delay=opts["token_delay"]).start()
+    os.environ["OLLAMA_API"] = fake.url
+    httpd = make_server("127.0.0.1", opts["tool_port"], tool_server.create_app(preload=False, watch=False),
+                        threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    import agent_loop
+
+    devices = tool_server.store.devices()
+    report = {"devices": len(devices), "rss_start_mb": rss_mb()}
+    with contextlib.redirect_stdout(io.StringIO()):
+        report["extract"] = bench_extract(agent_loop, fake_ollama, devices, opts["extract"], opts["seed"])
+        report["rss_after_extract_mb"] = rss_mb()
+        report["tool_server"] = bench_tool_server(tool_server, devices, opts["requests"], opts["seed"])
+        report["rss_after_tool_server_mb"] = rss_mb()
+        report["agent"] = bench_agent(agent_loop, fake, devices, opts["agent_requests"], opts["seed"])
+    report["max_rss_mb"] = rss_mb()
+    httpd.shutdown()
+    fake.stop()
+    return report
+
+
+# -- parent --
+def generate_fleet(tmp, size, seed):
+    spines = max(2, min(64, size // 20))
+    pack = tmp / f"fleet-{size}.pack"
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, str(SCRIPTS / "generate_mock_pack.py"), "--leaves", str(size - spines),
+                    "--spines", str(spines), "--seed", str(seed), "--pack", str(pack)],
+                   check=True, capture_output=True)
+    return pack, round(time.perf_counter() - t0, 3)
+
+
+def compare(old, new):
+    """(fleet, section, metric, old p50, new p50, p50 change %, rps change %) for matching entries."""
+    rows = []
+    old_fleets = {f["devices"]: f for f in old.get("fleets", [])}
+    for fleet in new["fleets"]:
+        before = old_fleets.get(fleet["devices"])
+        if before is None:
+            continue
+        for section in ("extract", "tool_server", "agent"):
+            for name, stats in fleet[section].items():
+                prev = before.get(section, {}).get(name)
+                if not isinstance(stats, dict) or not isinstance(prev, dict) or not prev.get("p50_ms"):
+                    continue
+                rps = round((stats["rps"] / prev["rps"] - 1) * 100, 1) if prev.get("rps") else None
+                rows.append((fleet["devices"], section, name, prev["p50_ms"], stats["p50_ms"],
+                             round((stats["p50_ms"] / prev["p50_ms"] - 1) * 100, 1), rps))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fleets", default="10,100,1000", help="comma-separated fleet sizes (devices)")
+    ap.add_argument("--requests", type=int, default=2000, help="tool server requests per endpoint")
+    ap.add_argument("--extract", type=int, default=2000, help="fake responses per style")
+    ap.add_argument("--agent-requests", type=int, default=50, help="questions through each agent path")
+    ap.add_argument("--styles", default="clean,fenced,chatty,malformed,truncated",
+                    help="fake Ollama response styles, cycled per request in the agent section")
+    ap.add_argument("--latency", type=float, default=0.0, help="fake Ollama time to first token (s)")
+    ap.add_argument("--token-delay", type=float, default=0.0, help="fake Ollama delay per token (s)")
+    ap.add_argument("--no-stream", action="store_true", help="agent uses non-streaming /api/generate")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--compare", help="earlier JSON report to compare against")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return
+
+    sizes = [int(s) for s in args.fleets.split(",") if s]
+    opts = {"styles": [s for s in args.styles.split(",") if s], "latency": args.latency,
+            "token_delay": args.token_delay, "seed": args.seed, "requests": args.requests,
+            "extract": args.extract, "agent_requests": args.agent_requests}
+    report = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+              "host": {"python": platform.python_version(), "platform": platform.platform(),
+                       "cpus": os.cpu_count()},
+              "options": dict(opts, fleets=sizes, stream=not args.no_stream), "fleets": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            pack, gen_s = generate_fleet(Path(tmp), size, args.seed)
+            env = dict(os.environ, MOCK_PACK=str(pack), MOCK_PRELOAD="0", TRACE="0", DECISION_CACHE="0",
+                       INTENT_ROUTER="0", OLLAMA_STREAM="0" if args.no_stream else "1",
+                       SNAPSHOT_DIR=str(Path(tmp) / "snapshots"),
+                       PYTHONPATH=os.pathsep.join(str(ROOT / d) for d in ("scripts", "server", "agent")))
+            port = free_port()
+            env["TOOL_SERVER"] = f"http://127.0.0.1:{port}"
+            print(f"[INFO] fleet of {size} devices (generated in {gen_s}s)", file=sys.stderr)
+            out = subprocess.run([sys.executable, __file__, "--child", json.dumps(dict(opts, tool_port=port))],
+                                 env=env, check=True, capture_output=True, text=True).stdout
+            fleet = json.loads(out)
+            fleet["generate_s"] = gen_s
+            report["fleets"].append(fleet)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+    if args.compare:
+        rows = compare(json.loads(Path(args.compare).read_text()), report)
+        print(f"\n{'devices':>8}  {'section':<12} {'metric':<24} {'p50 before':>11} {'p50 after':>10} "
+              f"{'p50 Δ%':>7} {'rps Δ%':>7}", file=sys.stderr)
+        for devices, section, name, a, b, d, r in rows:
+            print(f"{devices:>8}  {section:<12} {name:<24} {a:>11} {b:>10} {d:>7} {r if r is not None else '-':>7}",
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Backend calls per Streamlit interaction, measured with streamlit's AppTest.
+
+    python scripts/bench_ui_calls.py                       # the current web/streamlit_app.py
+    python scripts/bench_ui_calls.py --rev HEAD~1          # an earlier version, for before/after
+    python scripts/bench_ui_calls.py --out bench/ui_calls.json
+
+The app runs against an in-process tool server (counted per endpoint by a WSGI wrapper) and
+scripts/fake_ollama.py, with a fresh decision cache. A fixed script of interactions is played
+(first load, toggling a sidebar option, typing, submitting, re-submitting, a follow-up on the
+same device, a question that needs the LLM) and the requests each one caused are reported.
+Requests sent with the X-Prefetch header (background prefetch) are counted separately from
+those the interaction waited on. Each app version runs in its own process so no Streamlit
+cache carries over.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP = ROOT / "web" / "streamlit_app.py"
+
+
+class CountingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        kind = "prefetch" if environ.get("HTTP_X_PREFETCH") else "foreground"
+        with self.lock:
+            self.counts[(kind, environ.get("PATH_INFO", ""))] += 1
+        return self.app(environ, start_response)
+
+    def take(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+
+def _find(widgets, label):
+    for w in widgets:
+        if w.label == label:
+            return w
+    raise LookupError(label)
+
+
+def play(app_path):
+    """Run the interaction script against app_path; returns [{interaction, calls...}]."""
+    from streamlit.testing.v1 import AppTest
+    from werkzeug.serving import make_server
+    import fake_ollama
+    import tool_server
+
+    fake = fake_ollama.FakeOllama().start()
+    counter = CountingMiddleware(tool_server.create_app(preload=False, watch=False))
+    httpd = make_server("127.0.0.1", 0, counter, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    os.environ.update(TOOL_SERVER=f"http://127.0.0.1:{httpd.server_port}", OLLAMA_API=fake.url)
+
+    at = AppTest.from_file(str(app_path), default_timeout=60)
+
+    typed = {"text": ""}
+
+    def set_query(text):
+        typed["text"] = text
+        at.text_input(key="user_query").input(text)
+
+    def submit():
+        # AppTest drops form values that were typed but not submitted, like a browser would
+        # not send them, so the submit step types the text again before clicking
+        at.text_input(key="user_query").input(typed["text"])
+        _find(at.button, "Send").click()
+
+    def toggle():
+        box = _find(at.sidebar.checkbox, "Show raw LLM response")
+        box.uncheck() if box.value else box.check()
+
+    script = [
+        ("first load", None),
+        ("toggle a sidebar option", toggle),
+        ("type a question (no submit)", lambda: set_query("show version on leaf1")),
+        ("submit", submit),
+        ("toggle a sidebar option after an answer", toggle),
+        ("submit the same question again", submit),
+        ("follow-up on the same device", lambda: (set_query("show ip bgp summary on leaf1"), submit())),
+        ("question that needs the LLM", lambda: (set_query("is leaf2 healthy"), submit())),
+    ]
+    rows = []
+    for name, action in script:
+        ollama_before = fake.stats()["requests"]
+        if action is not None:
+            action()
+        at.run()
+        # let background prefetches land before counting
+        time.sleep(0.5)
+        counts = counter.take()
+        fg = {path: n for (kind, path), n in counts.items() if kind == "foreground"}
+        pf = {path: n for (kind, path), n in counts.items() if kind == "prefetch"}
+        rows.append({"interaction": name, "tool_server": sum(fg.values()), "ollama": fake.stats()["requests"] - ollama_before,
+                     "prefetch": sum(pf.values()), "endpoints": fg, "errors": [e.value for e in at.exception]})
+    httpd.shutdown()
+    fake.stop()
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rev", help="measure web/streamlit_app.py as of this git revision")
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(play(args.child)))
+        return
+
+    app, tmp_app = APP, None
+    if args.rev:
+        # next to the real app so its relative imports of agent/ still resolve
+        source = subprocess.run(["git", "-C", str(ROOT), "show", f"{args.rev}:web/streamlit_app.py"],
+                                check=True, capture_output=True, text=True).stdout
+        tmp_app = app = APP.with_name(f"_bench_app_{args.rev.replace('~', '_').replace('/', '_')}.py")
+        app.write_text(source)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, TRACE="0", DECISION_CACHE_PATH=str(Path(tmp) / "decisions.sqlite3"),
+                       SNAPSHOT_DIR=str(Path(tmp) / "snapshots"),
+                       PYTHONPATH=os.pathsep.join(str(ROOT / d) for d in ("scripts", "server", "agent")))
+            out = subprocess.run([sys.executable, __file__, "--child", str(app)], env=env, check=True,
+                                 capture_output=True, text=True).stdout
+    finally:
+        if tmp_app is not None:
+            tmp_app.unlink()
+    rows = json.loads(out.strip().splitlines()[-1])
+    report = {"app": args.rev or "working tree", "interactions": rows,
+              "total": {k: sum(r[k] for r in rows) for k in ("tool_server", "ollama", "prefetch")}}
+    print(f"{'interaction':<42} {'tool server':>11} {'ollama':>7} {'prefetch':>9}", file=sys.stderr)
+    for r in rows:
+        print(f"{r['interaction']:<42} {r['tool_server']:>11} {r['ollama']:>7} {r['prefetch']:>9}"
+              + (f"  errors: {r['errors']}" if r["errors"] else ""), file=sys.stderr)
+    t = report["total"]
+    print(f"{'total':<42} {t['tool_server']:>11} {t['ollama']:>7} {t['prefetch']:>9}", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
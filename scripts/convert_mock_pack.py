@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Convert between the directory mock layout and the packed single-file format.
+
+    python scripts/convert_mock_pack.py pack   server/pyats_mocks server/pyats_mocks.pack
+    python scripts/convert_mock_pack.py unpack server/pyats_mocks.pack /tmp/pyats_mocks
+
+Serve a pack with MOCK_PACK=server/pyats_mocks.pack python server/tool_server.py.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "server"))
+
+from mock_pack import pack_dir, unpack  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("mode", choices=["pack", "unpack"])
+    ap.add_argument("src")
+    ap.add_argument("dest")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.mode == "pack":
+        entries, size = pack_dir(args.src, args.dest)
+        print(f"packed {entries} outputs ({size} bytes) into {args.dest} in {time.perf_counter() - t0:.2f}s")
+    else:
+        count = unpack(args.src, args.dest)
+        print(f"unpacked {count} outputs into {args.dest} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
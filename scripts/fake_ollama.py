@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for the Ollama HTTP API, for benchmarks and offline runs.
+
+    python scripts/fake_ollama.py --port 11999 --styles clean,fenced,chatty --latency 0.05
+    OLLAMA_API=http://localhost:11999 python agent/agent_loop.py "show version on leaf1"
+
+POST /api/generate and /api/chat answer with either a recorded response (--responses FILE, JSONL lines of
+{"match": "<substring of the prompt>", "response": "<text>"}, first match wins) or a synthetic
+decision derived from the question in the prompt: the first device name and allowed command
+it mentions, or a planner "calls"/"final" object when the prompt is a planner prompt. The
+decision text is then dressed in one of the response styles below, cycled per request:
+
+    clean      the bare JSON object
+    fenced     inside a ```json fence with a heading line
+    chatty     prose before and after the object
+    malformed  a trailing comma before the closing brace (needs the lenient parser)
+    truncated  cut off mid-object (forces the heuristic fallback)
+
+--latency delays the first token and --token-delay every streamed token, so time-to-first-
+token and generation time can be shaped to match a real model. GET /api/tags lists the model.
+
+Prompt evaluation is modelled on Ollama's runner. The prompt is tokenized by an approximate
+word/punctuation tokenizer, with a chat template around the messages. It is matched against
+--slots cached sequences: each holds the previous prompt plus the reply generated for it. The
+slot with the longest common prefix is used if that prefix covers at least half of the slot,
+otherwise the least recently used slot. Only the tokens after that prefix are
+evaluated, at --prompt-eval-rate tokens/s. The model unloads once it has been idle for the
+request's keep_alive (default --keep-alive seconds), which clears every slot; the next request
+then pays --load-time. The final frame reports prompt_eval_count, prompt_eval_duration and
+load_duration (ns) like Ollama does, and stats() sums them. An empty /api/generate prompt only
+loads the model, and options.num_predict caps the reply tokens.
+"""
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STYLES = ("clean", "fenced", "chatty", "malformed", "truncated")
+COMMANDS = [
+    "show ip interface brief", "show version", "show ip bgp summary", "show running-config",
+    "show interfaces status", "show processes cpu", "show logging", "show ip route", "show arp",
+    "show ntp status", "show inventory", "show platform", "show controllers", "show ip ospf neighbor",
+    "show mac address-table", "show vlan brief", "show ip interface", "show users", "show clock",
+    "show ip cef", "show tacacs", "show startup-config", "show license",
+]
+DEVICE_RE = re.compile(r"\b((?:leaf|spine)\d+)\b", re.IGNORECASE)
+OBSERVATIONS_RE = re.compile(r"Observations(?: so far)?:")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# longest first so "show ip interface brief" wins over "show ip interface"
+_BY_LENGTH = sorted(COMMANDS, key=len, reverse=True)
+
+
+def _question(prompt):
+    for marker in ("Question: ", "User: "):
+        if marker in prompt:
+            return prompt.rsplit(marker, 1)[1].split("\n\n", 1)[0]
+    return prompt
+
+
+def synthetic_decision(prompt):
+    """The JSON object a well-behaved model would return for this prompt."""
+    question = _question(prompt)
+    lower = question.lower()
+    device = DEVICE_RE.search(question)
+    command = next((c for c in _BY_LENGTH if c in lower), "show ip interface brief")
+    if device is None:
+        decision = {"tool": "inventory", "args": {"name": None}}
+    else:
+        decision = {"tool": "run_show", "args": {"device": device.group(1).lower(), "command": command}}
+    if '"calls"' not in prompt:
+        return decision
+    if OBSERVATIONS_RE.search(prompt):
+        return {"final": f"Answer for: {question[:80]}"}
+    return {"calls": [decision]}
+
+
+def dress(obj, style):
+    text = json.dumps(obj)
+    if style == "fenced":
+        return f"Here is the tool call:\n```json\n{json.dumps(obj, indent=2)}\n```"
+    if style == "chatty":
+        return f"Sure! To answer that I will call a tool.\n{text}\nLet me know if you need anything else {{like more detail}}."
+    if style == "malformed":
+        return text[:-1] + ",}"
+    if style == "truncated":
+        return text[: max(1, len(text) * 2 // 3)]
+    return text
+
+
+def _tokens(text, size=6):
+    """Stream chunks of the reply (not model tokens, see tokenize)."""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def chat_tokens(messages):
+    """Template tokens for a chat, ending with the assistant header the reply follows."""
+    out = []
+    for m in messages:
+        out.append(f"<|{m.get('role', 'user')}|>")
+        out.extend(tokenize(m.get("content") or ""))
+    out.append("<|assistant|>")
+    return out
+
+
+def flatten(messages):
+    """The chat as one text, for picking the synthetic reply."""
+    parts = []
+    for m in messages:
+        role, content = m.get("role"), m.get("content") or ""
+        parts.append(content if role == "system" else ("Assistant: " if role == "assistant" else "User: ") + content)
+    return "\n\n".join(parts)
+
+
+def parse_keep_alive(value, default):
+    """Seconds from an Ollama keep_alive (300, "5m", "1h", -1 = forever); default when absent."""
+    if value is None or value == "":
+        return default
+    m = re.fullmatch(r"(-?\d+(?:\.\d+)?)(ms|s|m|h)?", str(value).strip())
+    if m is None:
+        return default
+    n = float(m.group(1))
+    if n < 0:
+        return float("inf")
+    return n * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[m.group(2)]
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class FakeOllama:
+    """Threaded fake server; start() returns self, .url is the base URL to use as OLLAMA_API."""
+
+    def __init__(self, host="127.0.0.1", port=0, styles=("clean",), latency=0.0, token_delay=0.0,
+                 responses=None, model="llama3", slots=1, prompt_eval_rate=0.0, load_time=0.0, keep_alive=300.0):
+        self.styles = itertools.cycle(styles)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.responses = list(responses or [])
+        self.model = model
+        self.prompt_eval_rate = prompt_eval_rate
+        self.load_time = load_time
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        self._slots = [[] for _ in range(max(1, slots))]
+        self._slot_used = [0.0] * len(self._slots)
+        self._unload_at = None  # monotonic time the idle model unloads; None while not loaded
+        self.counters = {"requests": 0, "streamed": 0, "recorded": 0, "synthetic": 0, "chat": 0,
+                         "prompt_tokens": 0, "prompt_eval_tokens": 0, "prompt_eval_s": 0.0, "loads": 0, "load_s": 0.0}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reply(self, prompt):
+        """(text, style) this server returns for the prompt."""
+        with self._lock:
+            style = next(self.styles)
+            self.counters["requests"] += 1
+        for entry in self.responses:
+            if entry.get("match", "") in prompt:
+                with self._lock:
+                    self.counters["recorded"] += 1
+                return entry["response"], "recorded"
+        with self._lock:
+            self.counters["synthetic"] += 1
+        return dress(synthetic_decision(prompt), style), style
+
+    def _load(self, now):
+        """Seconds spent loading the model (0 when still loaded); the caller holds the lock."""
+        if self._unload_at is not None and now <= self._unload_at:
+            return 0.0
+        self._slots = [[] for _ in self._slots]
+        self.counters["loads"] += 1
+        self.counters["load_s"] += self.load_time
+        return self.load_time
+
+    def evaluate(self, tokens):
+        """Pick the slot sharing the longest prefix with tokens; returns (slot, tokens evaluated, load s)."""
+        with self._lock:
+            now = time.monotonic()
+            load_s = self._load(now)
+            common = [_common_prefix(seq, tokens) for seq in self._slots]
+            # like llama.cpp, a slot is only reused when the prompt shares at least half of what
+            # it holds; otherwise the least recently used one is overwritten
+            similar = [i for i, seq in enumerate(self._slots) if seq and common[i] * 2 >= len(seq)]
+            if similar:
+                slot = max(similar, key=lambda i: common[i])
+            else:
+                slot = min(range(len(self._slots)), key=lambda i: self._slot_used[i])
+            evaluated = max(1, len(tokens) - common[slot])
+            self._slots[slot] = list(tokens)
+            self._slot_used[slot] = now
+            self.counters["prompt_tokens"] += len(tokens)
+            self.counters["prompt_eval_tokens"] += evaluated
+            eval_s = evaluated / self.prompt_eval_rate if self.prompt_eval_rate else 0.0
+            self.counters["prompt_eval_s"] += eval_s
+            # the model stays loaded while a request runs
+            self._unload_at = float("inf")
+        return slot, evaluated, load_s, eval_s
+
+    def finish(self, slot, reply, keep_alive):
+        """The generated reply joins the slot's cached sequence; the idle timer starts."""
+        with self._lock:
+            self._slots[slot].extend(tokenize(reply))
+            self._unload_at = time.monotonic() + keep_alive
+
+    def load(self, keep_alive):
+        with self._lock:
+            load_s = self._load(time.monotonic())
+            self._unload_at = time.monotonic() + keep_alive
+        return load_s
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in separate writes; without this, delayed ACKs add ~40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, obj, status=200):
+                data = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    return self._send_json({"models": [{"name": fake.model}]})
+                self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if self.path not in ("/api/generate", "/api/chat"):
+                    return self._send_json({"error": "not found"}, 404)
+                chat = self.path == "/api/chat"
+                keep_alive = parse_keep_alive(body.get("keep_alive"), fake.keep_alive)
+                if chat:
+                    messages = body.get("messages") or []
+                    prompt, tokens = flatten(messages), chat_tokens(messages)
+                    with fake._lock:
+                        fake.counters["chat"] += 1
+                else:
+                    prompt = body.get("prompt", "")
+                    tokens = ["<|user|>"] + tokenize(prompt) + ["<|assistant|>"]
+                    if not prompt:
+                        # Ollama loads the model and returns at once
+                        load_s = fake.load(keep_alive)
+                        time.sleep(load_s)
+                        return self._send_json({"model": fake.model, "response": "", "done": True,
+                                                "load_duration": int(load_s * 1e9)})
+
+                def frame(content, done, **extra):
+                    out = {"model": fake.model, "done": done}
+                    out.update({"message": {"role": "assistant", "content": content}} if chat else {"response": content})
+                    out.update(extra)
+                    return out
+
+                slot, evaluated, load_s, eval_s = fake.evaluate(tokens)
+                text, _ = fake.reply(prompt)
+                chunks = _tokens(text)
+                num_predict = (body.get("options") or {}).get("num_predict")
+                if num_predict:
+                    chunks = chunks[:num_predict]
+                    text = "".join(chunks)
+                stats = {"prompt_eval_count": evaluated, "prompt_eval_duration": int(eval_s * 1e9),
+                         "load_duration": int(load_s * 1e9), "eval_count": len(chunks)}
+                time.sleep(fake.latency + load_s + eval_s)
+                if not body.get("stream", True):
+                    fake.finish(slot, text, keep_alive)
+                    return self._send_json(frame(text, True, **stats))
+                with fake._lock:
+                    fake.counters["streamed"] += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                sent = []
+                try:
+                    for tok in chunks:
+                        self._chunk(json.dumps(frame(tok, False)) + "\n")
+                        sent.append(tok)
+                        if fake.token_delay:
+                            time.sleep(fake.token_delay)
+                    self._chunk(json.dumps(frame("", True, **stats)) + "\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client stopped reading once it had a decision
+                    self.close_connection = True
+                finally:
+                    fake.finish(slot, "".join(sent), keep_alive)
+
+            def _chunk(self, text):
+                data = text.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, prompt_eval_s=round(self.counters["prompt_eval_s"], 4),
+                        load_s=round(self.counters["load_s"], 4))
+
+
+def load_responses(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11999)
+    ap.add_argument("--styles", default="clean", help=f"comma-separated, cycled per request: {','.join(STYLES)}")
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    ap.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed tokens")
+    ap.add_argument("--responses", help="JSONL of recorded {match, response} entries")
+    ap.add_argument("--model", default="llama3")
+    ap.add_argument("--slots", type=int, default=1, help="cached prompt sequences (OLLAMA_NUM_PARALLEL)")
+    ap.add_argument("--prompt-eval-rate", type=float, default=0.0, help="prompt tokens/s (0 = instant)")
+    ap.add_argument("--load-time", type=float, default=0.0, help="seconds to load the model")
+    ap.add_argument("--keep-alive", type=float, default=300.0, help="idle seconds before unloading by default")
+    args = ap.parse_args()
+
+    styles = [s for s in args.styles.split(",") if s]
+    unknown = set(styles) - set(STYLES)
+    if unknown:
+        ap.error(f"unknown styles: {', '.join(sorted(unknown))}")
+    fake = FakeOllama(args.host, args.port, styles, args.latency, args.token_delay,
+                      load_responses(args.responses) if args.responses else None, args.model,
+                      args.slots, args.prompt_eval_rate, args.load_time, args.keep_alive)
+    print(f"[INFO] fake Ollama on {fake.url} (styles: {', '.join(styles)})")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
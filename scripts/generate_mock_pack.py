@@ -1,12 +1,34 @@
 #!/usr/bin/env python3
+"""
+Generate a synthetic leaf/spine fleet of mock show outputs.
+
+    python scripts/generate_mock_pack.py                                  # 5 leaves, 5 spines
+    python scripts/generate_mock_pack.py --leaves 10000 --spines 32 --workers 8
+    python scripts/generate_mock_pack.py --leaves 100000 --spines 64 --pack server/pyats_mocks.pack
+    python scripts/generate_mock_pack.py --size "show logging=500" --size "show running-config=2000"
+
+Output is a pure function of the topology and --seed (no timestamps), so re-running with the
+same options rewrites identical content and snapshots deduplicate it. Every leaf has --uplinks
+links to spines; both ends of a link get addresses from the same /31 and the BGP summaries on
+both sides list each other's address and AS. Each device draws from its own seeded RNG, so the
+output is identical for any --workers. Devices are generated in chunks on a process pool and
+written per chunk (or streamed into one pack file, see server/mock_pack.py); files/sec and
+MB/sec are reported at the end. Every device also gets a device.json with its role, site
+(--sites) and tags for /tool/inventory.
+"""
+import argparse
+import ipaddress
+import json
+import os
 import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
 
-OUT = Path(__file__).resolve().parents[1] / "server" / "pyats_mocks"
-OUT.mkdir(parents=True, exist_ok=True)
-
-DEVICES = [f"leaf{i}" for i in range(1,6)] + [f"spine{i}" for i in range(1,6)]
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "server" / "pyats_mocks"
 
 COMMANDS = [
     "show ip interface brief",
@@ -31,45 +53,284 @@ COMMANDS = [
     "show ip cef",
     "show tacacs",
     "show startup-config",
-    "show running-config | include interface",
-    "show license",
-    "show version | include uptime"
+    "show license"
 ]
+# per-device inventory metadata, as read by server/inventory.py
+META_FILE = "device.json"
+# piped variants ("show version | include uptime") are filtered server-side from the base output
+
+SPINE_AS = 65000
+LINK_BASE = ipaddress.IPv4Address("10.128.0.0")   # /31 point-to-point links
+LOOPBACK_BASE = ipaddress.IPv4Address("10.0.0.0")
+
+
+def cmd_to_file(cmd):
+    return cmd.replace(" ", "_").replace("|", "_pipe_").replace("/", "_").lower() + ".txt"
+
+
+# -- topology --
+# devices are numbered spines first: spine1..spineS are 0..S-1, leaf1..leafL are S..S+L-1
+
+def leaf_as(leaf):
+    # 2-byte private ASNs while they last, then the 4-byte private range
+    return 65001 + leaf if leaf < 534 else 4200000000 + leaf
+
+
+def spine_leaves(topo, spine):
+    """(leaf, uplink) pairs attached to spine, in leaf order; uplink k of leaf goes to spine (leaf + k) % S."""
+    out = []
+    S = topo["spines"]
+    for k in range(topo["uplinks"]):
+        first = (spine - k) % S
+        out.extend((leaf, k) for leaf in range(first, topo["leaves"], S))
+    out.sort()
+    return out
+
+
+def link_ips(topo, leaf, k):
+    """(spine side, leaf side) addresses of uplink k of leaf."""
+    net = LINK_BASE + 2 * (leaf * topo["uplinks"] + k)
+    return str(net), str(net + 1)
 
-def gen_if(dev):
-    lines = ["Interface  IP-Address  Status  Protocol"]
-    for i in range(1,5):
-        ip = f"10.{random.randint(0,255)}.{random.randint(1,254)}.{random.randint(1,254)}"
-        lines.append(f"Eth1/{i} {ip} up up")
+
+def router_id(index):
+    return str(LOOPBACK_BASE + index + 1)
+
+
+def device_name(topo, index):
+    S = topo["spines"]
+    return f"spine{index + 1}" if index < S else f"leaf{index - S + 1}"
+
+
+# -- outputs --
+
+def gen_if(topo, index, rnd):
+    lines = ["Interface  IP-Address  Status  Protocol", f"Loopback0 {router_id(index)} up up"]
+    S = topo["spines"]
+    if index < S:
+        for port, (leaf, k) in enumerate(spine_leaves(topo, index), 1):
+            lines.append(f"Eth1/{port} {link_ips(topo, leaf, k)[0]} up up")
+    else:
+        for k in range(topo["uplinks"]):
+            lines.append(f"Eth1/{k + 1} {link_ips(topo, index - S, k)[1]} up up")
     return "\n".join(lines)
 
-def gen_bgp(dev):
-    return f"""
-BGP router identifier 10.0.0.{random.randint(1,254)}, local AS 65001
-Neighbor        AS    Up/Down   PfxRcd
-10.1.1.{random.randint(1,254)} 65002 1d02h {random.randint(1,200)}
-""".strip()
-
-def gen_version(dev):
-    return f"Cisco IOS XE Software, Version 17.{random.randint(1,9)}.{random.randint(0,9)}\nDevice uptime is {random.randint(1,365)} days"
-
-def gen_generic(dev, cmd):
-    if "interface brief" in cmd:
-        return gen_if(dev)
-    if "bgp summary" in cmd:
-        return gen_bgp(dev)
-    if "version" in cmd:
-        return gen_version(dev)
-    return f"# Mock output for {dev} - {cmd}\n# generated {datetime.utcnow()}"
+
+def gen_bgp(topo, index, rnd):
+    S = topo["spines"]
+    if index < S:
+        local_as = SPINE_AS
+        peers = [(link_ips(topo, leaf, k)[1], leaf_as(leaf)) for leaf, k in spine_leaves(topo, index)]
+    else:
+        leaf = index - S
+        local_as = leaf_as(leaf)
+        peers = [(link_ips(topo, leaf, k)[0], SPINE_AS) for k in range(topo["uplinks"])]
+    lines = [f"BGP router identifier {router_id(index)}, local AS {local_as}",
+             "Neighbor        AS    Up/Down   PfxRcd"]
+    for ip, asn in peers:
+        lines.append(f"{ip} {asn} {rnd.randint(0, 30)}d{rnd.randint(0, 23):02d}h {rnd.randint(1, 200)}")
+    return "\n".join(lines)
+
+
+def gen_if_status(topo, index, rnd):
+    lines = ["Port      Name               Status       Vlan       Duplex  Speed Type"]
+    S = topo["spines"]
+    if index < S:
+        links = [(f"to-leaf{leaf + 1}", port) for port, (leaf, _) in enumerate(spine_leaves(topo, index), 1)]
+    else:
+        links = [(f"to-spine{(index - S + k) % S + 1}", k + 1) for k in range(topo["uplinks"])]
+    for name, port in links:
+        lines.append(f"Eth1/{port:<5} {name:<18} connected    routed     full    100G QSFP-100G-SR4")
+    if index >= S:
+        # host-facing access ports on leaves
+        for port in range(1, 5):
+            status = "connected" if rnd.random() < 0.8 else "notconnect"
+            lines.append(f"Eth2/{port:<5} {'':<18} {status:<12} {10 * port:<10} full    25G  SFP-25G-SR")
+    return "\n".join(lines)
+
+
+def gen_route(topo, index, rnd):
+    lines = ["Codes: L - local, C - connected, B - BGP", "",
+             "Gateway of last resort is not set", ""]
+    S = topo["spines"]
+    lines.append(f"C        {router_id(index)}/32 is directly connected, Loopback0")
+    if index < S:
+        for port, (leaf, k) in enumerate(spine_leaves(topo, index), 1):
+            spine_ip, leaf_ip = link_ips(topo, leaf, k)
+            lines.append(f"C        {spine_ip}/31 is directly connected, Eth1/{port}")
+            lines.append(f"B        {router_id(S + leaf)}/32 [20/0] via {leaf_ip}, 1d02h")
+    else:
+        for k in range(topo["uplinks"]):
+            spine_ip, leaf_ip = link_ips(topo, index - S, k)
+            spine = (index - S + k) % S
+            lines.append(f"C        {spine_ip}/31 is directly connected, Eth1/{k + 1}")
+            lines.append(f"B        {router_id(spine)}/32 [20/0] via {spine_ip}, 1d02h")
+    return "\n".join(lines)
+
+
+def gen_version(topo, index, rnd):
+    return f"Cisco IOS XE Software, Version 17.{rnd.randint(1,9)}.{rnd.randint(0,9)}\nDevice uptime is {rnd.randint(1,365)} days"
+
+
+def gen_generic(topo, index, rnd, cmd):
+    dev = device_name(topo, index)
+    lines = [f"# Mock output for {dev} - {cmd}", f"# generated with seed {topo['seed']}"]
+    for n in range(topo["sizes"].get(cmd, 0)):
+        lines.append(f"{cmd.split()[-1]} {n:06d} {rnd.getrandbits(64):016x}")
+    return "\n".join(lines)
+
+
+GENERATORS = {
+    "show ip interface brief": gen_if,
+    "show ip bgp summary": gen_bgp,
+    "show version": gen_version,
+    "show interfaces status": gen_if_status,
+    "show ip route": gen_route,
+}
+
+
+def gen_meta(topo, index):
+    """Inventory metadata (server/inventory.py): spines and leaves are spread over --sites."""
+    S = topo["spines"]
+    spine = index < S
+    position = index if spine else index - S
+    site = position % topo["sites"]
+    tags = ["fabric"]
+    if not spine and position < topo["sites"]:
+        # the first leaf of each site carries its external links
+        tags.append("border")
+    return {"role": "spine" if spine else "leaf", "site": f"dc{site + 1}", "vendor": "cisco_ios", "tags": tags}
+
+
+def gen_device(topo, index):
+    """[(fname, bytes)] for the metadata file and every command of one device."""
+    rnd = random.Random(f"{topo['seed']}:{index}")
+    out = [(META_FILE, json.dumps(gen_meta(topo, index), sort_keys=True).encode())]
+    for cmd in topo["commands"]:
+        gen = GENERATORS.get(cmd)
+        text = gen(topo, index, rnd) if gen else gen_generic(topo, index, rnd, cmd)
+        out.append((cmd_to_file(cmd), text.encode()))
+    return out
+
+
+def gen_chunk(topo, start, stop, out_dir):
+    """
+    Generate devices [start, stop). With out_dir the files are written here and only
+    (files, bytes) travels back; otherwise the outputs are returned for the pack writer.
+    """
+    results = []
+    files = size = 0
+    for index in range(start, stop):
+        dev = device_name(topo, index)
+        outputs = gen_device(topo, index)
+        files += len(outputs)
+        size += sum(len(data) for _, data in outputs)
+        if out_dir is None:
+            results.extend((dev, fname, data) for fname, data in outputs)
+            continue
+        ddir = os.path.join(out_dir, dev)
+        os.makedirs(ddir, exist_ok=True)
+        for fname, data in outputs:
+            with open(os.path.join(ddir, fname), "wb") as f:
+                f.write(data)
+    return files, size, results
+
+
+def run_chunks(topo, total, chunk, workers, out_dir):
+    """Yield gen_chunk results in device order, keeping at most 2*workers chunks in flight."""
+    ranges = [(s, min(s + chunk, total)) for s in range(0, total, chunk)]
+    if workers <= 1:
+        for start, stop in ranges:
+            yield gen_chunk(topo, start, stop, out_dir)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(pool.submit(gen_chunk, topo, start, stop, out_dir))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def parse_sizes(items):
+    sizes = {"show logging": 20, "show running-config": 40}
+    for item in items or []:
+        cmd, sep, n = item.rpartition("=")
+        if not sep or cmd.strip() not in COMMANDS:
+            raise SystemExit(f"--size expects '<command>=<lines>' for a known command, got {item!r}")
+        sizes[cmd.strip()] = int(n)
+    return sizes
+
 
 def main():
-    for dev in DEVICES:
-        ddir = OUT / dev
-        ddir.mkdir(parents=True, exist_ok=True)
-        for cmd in COMMANDS:
-            fname = cmd.replace(" ", "_").replace("|","_pipe_").replace("/","_").lower()+".txt"
-            (ddir / fname).write_text(gen_generic(dev, cmd))
-    print("Mock pack created at:", OUT)
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--leaves", type=int, default=5)
+    ap.add_argument("--spines", type=int, default=5)
+    ap.add_argument("--uplinks", type=int, default=2, help="spine uplinks per leaf (capped at --spines)")
+    ap.add_argument("--sites", type=int, default=1, help="sites the devices are spread over (inventory metadata)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--size", action="append", metavar="CMD=LINES",
+                    help="extra filler lines for a command's output (repeatable)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk", type=int, default=256, help="devices per worker task")
+    ap.add_argument("--out", default=str(OUT), help="directory layout output (default server/pyats_mocks)")
+    ap.add_argument("--pack", help="write one packed file here instead of the directory layout")
+    ap.add_argument("--snapshot", nargs="?", const="", metavar="LABEL",
+                    help="record a snapshot of the result for /tool/diff (see server/snapshots.py)")
+    ap.add_argument("--snapshot-dir", default=str(ROOT / "server" / "snapshots"))
+    args = ap.parse_args()
+
+    if args.spines < 1:
+        raise SystemExit("--spines must be at least 1")
+    topo = {
+        "leaves": args.leaves,
+        "spines": args.spines,
+        "uplinks": max(1, min(args.uplinks, args.spines)),
+        "sites": max(1, args.sites),
+        "seed": args.seed,
+        "sizes": parse_sizes(args.size),
+        "commands": COMMANDS,
+    }
+    if args.leaves * topo["uplinks"] * 2 > 2 ** 23:
+        raise SystemExit("too many links for the 10.128.0.0/9 link range")
+    total = args.leaves + args.spines
+    totals = {"files": 0, "bytes": 0}
+
+    def _stream(out_dir):
+        for files, size, results in run_chunks(topo, total, args.chunk, args.workers, out_dir):
+            totals["files"] += files
+            totals["bytes"] += size
+            yield from results
+
+    sys.path.insert(0, str(ROOT / "server"))
+    t0 = time.perf_counter()
+    if args.pack:
+        from mock_pack import write_pack
+        write_pack(_stream(None), args.pack)
+        dest = args.pack
+    else:
+        Path(args.out).mkdir(parents=True, exist_ok=True)
+        for _ in _stream(args.out):
+            pass
+        dest = args.out
+    elapsed = time.perf_counter() - t0
+
+    print("Mock pack created at:", dest)
+    print(f"{total} devices, {totals['files']} files, {totals['bytes'] / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({totals['files'] / elapsed:.0f} files/s, {totals['bytes'] / 1e6 / elapsed:.1f} MB/s, "
+          f"{args.workers} workers)")
+
+    if args.snapshot is not None:
+        from mock_pack import PackStore
+        from mock_store import MockStore
+        from snapshots import SnapshotStore
+        store = PackStore(dest) if args.pack else MockStore(dest, max_bytes=0)
+        t0 = time.perf_counter()
+        snap = SnapshotStore(args.snapshot_dir).take(store, label=args.snapshot or None)
+        print(f"snapshot {snap['id']}: {snap['files']} files, {snap['new_objects']} new objects "
+              f"in {time.perf_counter() - t0:.2f}s")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
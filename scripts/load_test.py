@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Load test for the tool server at different worker counts.
+
+    python scripts/load_test.py --workers 1,2,4 --clients 16 --duration 10
+
+For each worker count it starts `server/serve.py` on a free port, drives /tool/run_show and
+/tool/inventory from --clients client processes (one keep-alive session each) for --duration
+seconds, and reports requests/sec and p50/p99 latency per endpoint.
+"""
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+SERVER = ROOT / "server" / "serve.py"
+MOCK_DIR = ROOT / "server" / "pyats_mocks"
+COMMANDS = ["show ip interface brief", "show version", "show ip bgp summary", "show interfaces status"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.post(f"{base}/tool/inventory", json={}, timeout=1).ok:
+                return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base} did not become ready")
+
+
+def client(base, devices, duration, inventory_ratio, seed):
+    rnd = random.Random(seed)
+    session = requests.Session()
+    lat = {"run_show": [], "inventory": []}
+    errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if rnd.random() < inventory_ratio:
+            kind, url, body = "inventory", f"{base}/tool/inventory", {}
+        else:
+            body = {"device": rnd.choice(devices), "command": rnd.choice(COMMANDS)}
+            kind, url = "run_show", f"{base}/tool/run_show"
+        t0 = time.perf_counter()
+        try:
+            if not session.post(url, json=body, timeout=10).ok:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        lat[kind].append(time.perf_counter() - t0)
+    return lat, errors
+
+
+def summarize(samples, duration):
+    if not samples:
+        return {"requests": 0}
+    s = sorted(samples)
+    pick = lambda p: s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+    return {"requests": len(s), "req_per_s": round(len(s) / duration, 1),
+            "p50_ms": round(pick(50) * 1000, 3), "p99_ms": round(pick(99) * 1000, 3)}
+
+
+def run_level(workers, args, devices):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    cmd = [sys.executable, str(SERVER), "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+           "--threads", str(args.threads), "--server", args.server]
+    proc = subprocess.Popen(cmd, cwd=str(SERVER.parent), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(base)
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            futures = [pool.submit(client, base, devices, args.duration, args.inventory_ratio, i)
+                       for i in range(args.clients)]
+            results = [f.result() for f in futures]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    merged = {"run_show": [], "inventory": []}
+    errors = 0
+    for lat, err in results:
+        errors += err
+        for k in merged:
+            merged[k].extend(lat[k])
+    total = len(merged["run_show"]) + len(merged["inventory"])
+    return {"workers": workers, "threads": args.threads, "clients": args.clients, "errors": errors,
+            "total_req_per_s": round(total / args.duration, 1),
+            "run_show": summarize(merged["run_show"], args.duration),
+            "inventory": summarize(merged["inventory"], args.duration)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--inventory-ratio", type=float, default=0.1)
+    ap.add_argument("--server", default="gunicorn")
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    args = ap.parse_args()
+
+    devices = sorted(p.name for p in MOCK_DIR.iterdir() if p.is_dir())
+    report = [run_level(int(w), args, devices) for w in args.workers.split(",")]
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# server/fleet_index.py
+"""
+Inverted indexes over parsed show data for fleet-wide lookups (/tool/query), e.g.
+"which device owns 10.128.0.9" or "which devices peer with AS 65002".
+
+Each indexed (device, command) remembers the source version it was built from; refresh()
+re-parses only the files whose version changed and swaps that device's postings, so a
+regeneration touching a few files costs a few parses. Lookups are dict probes.
+"""
+import heapq
+import threading
+import time
+
+# field -> help text, in the order shown to clients
+FIELDS = {
+    "ip": "interface IP address (show ip interface brief)",
+    "interface": "interface name (show ip interface brief)",
+    "neighbor": "BGP neighbor address (show ip bgp summary)",
+    "neighbor_as": "BGP neighbor remote AS (show ip bgp summary)",
+    "local_as": "local BGP AS (show ip bgp summary)",
+    "version": "software version (show version)",
+}
+
+
+def _postings_if(parsed):
+    for item in parsed.get("interfaces", []):
+        detail = {"interface": item["interface"], "ip_address": item["ip_address"], "status": item["status"]}
+        if item["ip_address"] not in ("unassigned", ""):
+            yield "ip", item["ip_address"], detail
+        yield "interface", item["interface"], detail
+
+
+def _postings_bgp(parsed):
+    if parsed.get("local_as") is not None:
+        yield "local_as", str(parsed["local_as"]), {"router_id": parsed.get("router_id")}
+    for n in parsed.get("neighbors", []):
+        detail = {"neighbor": n["neighbor"], "remote_as": n["remote_as"], "state": n["state"]}
+        yield "neighbor", n["neighbor"], detail
+        if n["remote_as"] is not None:
+            yield "neighbor_as", str(n["remote_as"]), detail
+
+
+def _postings_version(parsed):
+    if parsed.get("version"):
+        yield "version", parsed["version"], {"software": parsed.get("software"), "uptime": parsed.get("uptime")}
+
+
+# indexed command -> postings extractor over its parsed output
+SOURCES = {
+    "show ip interface brief": _postings_if,
+    "show ip bgp summary": _postings_bgp,
+    "show version": _postings_version,
+}
+
+
+def _key(value):
+    return str(value).strip().lower()
+
+
+class FleetIndex:
+    """
+    field -> value -> {device: [detail, ...]}, built from parse_cache over store.
+    cmd_to_file maps a command to the store's file name (tool_server._cmd_to_file).
+    """
+
+    def __init__(self, store, parse_cache, cmd_to_file, refresh_interval=5.0):
+        self.store = store
+        self.parse_cache = parse_cache
+        self.cmd_to_file = cmd_to_file
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._index = {field: {} for field in FIELDS}
+        self._built = {}  # (device, command) -> (version, [(field, key)])
+        self._thread = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self.counters = {"refreshes": 0, "reindexed": 0, "removed": 0, "queries": 0}
+        self.last_refresh_s = 0.0
+
+    # -- build --
+    def _drop(self, device, command):
+        old = self._built.pop((device, command), None)
+        if old is None:
+            return
+        for field, key in old[1]:
+            bucket = self._index[field].get(key)
+            if bucket is not None:
+                bucket.pop(device, None)
+                if not bucket:
+                    del self._index[field][key]
+
+    def _add(self, device, command, version, postings):
+        keys = []
+        for field, value, detail in postings:
+            key = _key(value)
+            self._index[field].setdefault(key, {}).setdefault(device, []).append(detail)
+            keys.append((field, key))
+        self._built[(device, command)] = (version, keys)
+
+    def refresh(self):
+        """Re-index every (device, command) whose source version changed; returns the number re-indexed."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        t0 = time.perf_counter()
+        devices = self.store.devices()
+        changed = 0
+        for device in devices:
+            for command, extract in SOURCES.items():
+                fname = self.cmd_to_file(command)
+                version = self.store.version(device, fname)
+                built = self._built.get((device, command))
+                if built is not None and built[0] == version:
+                    continue
+                parsed = None
+                if version is not None:
+                    parsed = self.parse_cache.get(device, command, version, lambda: self.store.get(device, fname))
+                postings = list(extract(parsed)) if parsed is not None else []
+                with self._lock:
+                    self._drop(device, command)
+                    if parsed is not None:
+                        self._add(device, command, version, postings)
+                changed += 1
+        live = set(devices)
+        gone = [k for k in self._built if k[0] not in live]
+        if gone:
+            with self._lock:
+                for device, command in gone:
+                    self._drop(device, command)
+            self.counters["removed"] += len({d for d, _ in gone})
+        self.counters["refreshes"] += 1
+        self.counters["reindexed"] += changed
+        self.last_refresh_s = round(time.perf_counter() - t0, 4)
+        self._ready.set()
+        return changed
+
+    def start_refresher(self):
+        """Refresh from a daemon thread every refresh_interval seconds (first build runs immediately)."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        def _run():
+            while True:
+                self.refresh()
+                if self._stop.wait(self.refresh_interval):
+                    return
+        self._thread = threading.Thread(target=_run, name="fleet-index", daemon=True)
+        self._thread.start()
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def stop_refresher(self):
+        self._stop.set()
+        self._thread = None
+
+    # -- lookup --
+    def query(self, field, value, limit=100):
+        """
+        {"devices", "matches": [{"device", ...detail}], "count", "truncated"} for one exact value
+        (case-insensitive). Only the first `limit` devices in name order are materialized, so a
+        truncated answer is the same on every call.
+        """
+        if not self._ready.is_set():
+            self.refresh()
+        with self._lock:
+            bucket = self._index[field].get(_key(value), {})
+            count = len(bucket)
+            devices = heapq.nsmallest(limit, bucket)
+            matches = [dict(detail, device=d) for d in devices for detail in bucket[d]]
+        self.counters["queries"] += 1
+        return {"field": field, "value": value, "count": count,
+                "devices": devices, "matches": matches, "truncated": count > limit}
+
+    def stats(self):
+        with self._lock:
+            sizes = {field: len(values) for field, values in self._index.items()}
+            indexed = len(self._built)
+        return dict(self.counters, indexed=indexed, values=sizes, last_refresh_s=self.last_refresh_s)
@@ -0,0 +1,243 @@
+# server/inventory.py
+"""
+Device inventory with metadata for /tool/inventory: name, role, site, vendor and tags.
+
+Metadata is read from a per-device META_FILE next to the outputs (an entry of the pack for a
+packed store); devices without one get DEFAULT_VENDOR and a role taken from the name
+("leaf12" -> "leaf"). Like fleet_index.py, each device remembers the version its metadata
+was read from and refresh() re-reads only the files that changed.
+
+Names are kept sorted, so a prefix or the literal head of a glob is a bisect, and every
+(field, value) keeps a sorted posting list, so a filtered listing walks only the devices of
+its most selective value. Pages continue after an opaque cursor (the last name returned).
+etag() changes whenever the set of devices or any metadata version does.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+
+META_FILE = "device.json"
+DEFAULT_VENDOR = "cisco_ios"
+FIELDS = ("name", "role", "site", "vendor", "tags")
+# request filters: role, site and vendor match any of the given values, tags all of them
+FILTERS = ("role", "site", "vendor", "tags")
+_ROLE_RE = re.compile(r"[a-z]+")
+
+
+class InventoryError(ValueError):
+    pass
+
+
+def _key(value):
+    return str(value).strip().lower()
+
+
+def default_record(name):
+    m = _ROLE_RE.match(name.lower())
+    return {"name": name, "role": m.group(0) if m else None, "site": None, "vendor": DEFAULT_VENDOR, "tags": []}
+
+
+def parse_meta(name, text):
+    """Record for one device from its META_FILE text (None: defaults only)."""
+    record = default_record(name)
+    if text is None:
+        return record
+    try:
+        meta = json.loads(text)
+    except ValueError:
+        print(f"[WARN] {name}/{META_FILE} is not valid JSON, using defaults")
+        return record
+    if not isinstance(meta, dict):
+        return record
+    for field in ("role", "site", "vendor"):
+        if isinstance(meta.get(field), str):
+            record[field] = meta[field]
+    tags = meta.get("tags")
+    if isinstance(tags, list):
+        record["tags"] = [t for t in tags if isinstance(t, str)]
+    return record
+
+
+class Inventory:
+    """name -> record, with sorted names and sorted posting lists per (field, value)."""
+
+    def __init__(self, store, refresh_interval=5.0):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._records = {}  # name -> record
+        self._versions = {}  # name -> META_FILE version (None: no file)
+        # swapped as a whole on rebuild, so readers only hold the lock to take a reference
+        self._view = ([], {}, {}, "")  # (sorted names, {(field, key): sorted names}, {lower name: name}, etag)
+        self._thread = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self.counters = {"refreshes": 0, "reread": 0, "removed": 0, "lookups": 0}
+        self.last_refresh_s = 0.0
+
+    # -- build --
+    def refresh(self):
+        """Re-read the metadata of devices whose META_FILE version changed; returns how many."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        t0 = time.perf_counter()
+        devices = self.store.devices()
+        changed = 0
+        for name in devices:
+            version = self.store.version(name, META_FILE)
+            if name in self._records and self._versions.get(name) == version:
+                continue
+            text = self.store.get(name, META_FILE) if version is not None else None
+            self._records[name] = parse_meta(name, text)
+            self._versions[name] = version
+            changed += 1
+        live = set(devices)
+        gone = [name for name in self._records if name not in live]
+        for name in gone:
+            del self._records[name]
+            del self._versions[name]
+        if changed or gone or not self._ready.is_set():
+            self._rebuild()
+        self.counters["refreshes"] += 1
+        self.counters["reread"] += changed
+        self.counters["removed"] += len(gone)
+        self.last_refresh_s = round(time.perf_counter() - t0, 4)
+        self._ready.set()
+        return changed
+
+    def _rebuild(self):
+        names = sorted(self._records)
+        postings = {}
+        digest = hashlib.sha1()
+        for name in names:
+            record = self._records[name]
+            for field in ("role", "site", "vendor"):
+                if record[field] is not None:
+                    postings.setdefault((field, _key(record[field])), []).append(name)
+            for tag in record["tags"]:
+                postings.setdefault(("tags", _key(tag)), []).append(name)
+            digest.update(f"{name}\0{self._versions[name]}\n".encode())
+        lower = {name.lower(): name for name in names}
+        with self._lock:
+            self._view = (names, postings, lower, digest.hexdigest()[:16])
+
+    def start_refresher(self):
+        """Refresh from a daemon thread every refresh_interval seconds (first build runs immediately)."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        def _run():
+            while True:
+                self.refresh()
+                if self._stop.wait(self.refresh_interval):
+                    return
+        self._thread = threading.Thread(target=_run, name="inventory", daemon=True)
+        self._thread.start()
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def stop_refresher(self):
+        self._stop.set()
+        self._thread = None
+
+    # -- lookup --
+    def _current(self):
+        if not self._ready.is_set():
+            self.refresh()
+        with self._lock:
+            return self._view
+
+    def etag(self):
+        return self._current()[3]
+
+    def get(self, name):
+        """The record of one device, matched case-insensitively like find(), or None."""
+        name = self._current()[2].get(name.lower())
+        self.counters["lookups"] += 1
+        return self._records.get(name) if name is not None else None
+
+    def find(self, names, fields=None):
+        """Records of the given names that exist, matched case-insensitively, in the order asked."""
+        lower = self._current()[2]
+        found = dict.fromkeys(lower[n.lower()] for n in names if n.lower() in lower)
+        self.counters["lookups"] += 1
+        records = (self._records.get(n) for n in found)
+        return [self.project(r, fields) for r in records if r is not None]
+
+    def list(self, prefix=None, glob=None, filters=None, fields=None, cursor=None, limit=100):
+        """
+        {"devices": [record, ...], "next_cursor": str or None} for the devices matching every
+        given condition, in name order, starting after cursor. filters maps FILTERS keys to
+        lists of values (case-insensitive).
+        """
+        names, postings, _, _ = self._current()
+        filters = {k: [_key(v) for v in vs] for k, vs in (filters or {}).items() if vs}
+        if glob:
+            # the literal head of the glob narrows the walk like a prefix
+            head = re.split(r"[*?\[]", glob, 1)[0]
+            prefix = head if prefix is None or head.startswith(prefix) else prefix
+        walk = names
+        for key, values in filters.items():
+            if key == "tags" or len(values) == 1:
+                for value in values:
+                    candidate = postings.get((key, value), [])
+                    if len(candidate) < len(walk):
+                        walk = candidate
+            else:
+                candidate = sorted(set().union(*(postings.get((key, v), []) for v in values)))
+                if len(candidate) < len(walk):
+                    walk = candidate
+        start = bisect_right(walk, cursor) if cursor else 0
+        if prefix:
+            start = max(start, bisect_left(walk, prefix))
+        out = []
+        more = False
+        for i in range(start, len(walk)):
+            name = walk[i]
+            if prefix and not name.startswith(prefix):
+                break
+            if glob and not fnmatchcase(name, glob):
+                continue
+            record = self._records.get(name)
+            if record is None or not self._matches(record, filters):
+                continue
+            if len(out) == limit:
+                more = True
+                break
+            out.append(self.project(record, fields))
+        self.counters["lookups"] += 1
+        return {"devices": out, "next_cursor": out[-1]["name"] if more else None}
+
+    @staticmethod
+    def _matches(record, filters):
+        for key, values in filters.items():
+            if key == "tags":
+                have = {_key(t) for t in record["tags"]}
+                if not all(v in have for v in values):
+                    return False
+            elif record[key] is None or _key(record[key]) not in values:
+                return False
+        return True
+
+    @staticmethod
+    def project(record, fields):
+        """The record reduced to name plus fields (all fields when none are given)."""
+        if not fields:
+            return dict(record, tags=list(record["tags"]))
+        return {f: record[f] for f in ("name",) + tuple(fields) if f in record}
+
+    def stats(self):
+        names, postings, _, etag = self._view
+        return dict(self.counters, devices=len(names), values=len(postings), etag=etag,
+                    last_refresh_s=self.last_refresh_s)
@@ -0,0 +1,276 @@
+# server/mock_pack.py
+"""
+Packed mock format: one file holding every (device, command) output back to back,
+followed by a JSON offset index and a fixed-size trailer.
+
+    MOCKPACK1\\n | output bytes ... | index JSON | <index offset: 8 bytes LE> MOCKIDX1
+
+index = {"version": 1, "devices": {device: {fname: [offset, length]}}}
+
+Keeping the index inside the data file means a regeneration is one os.replace(), so a
+reader never sees a new index against old data. Readers map the file and slice outputs
+straight out of the page cache.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+MAGIC = b"MOCKPACK1\n"
+TRAILER_MAGIC = b"MOCKIDX1"
+_TRAILER = struct.Struct("<Q8s")
+READ_CHUNK = 64 * 1024
+
+
+class PackError(ValueError):
+    pass
+
+
+def write_pack(outputs, dest):
+    """
+    Write an iterable of (device, fname, bytes) to dest atomically (temp file + rename).
+    Returns (entries, data_bytes).
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    index = {}
+    entries = data_bytes = 0
+    fd, tmp = tempfile.mkstemp(prefix=dest.name + ".", dir=dest.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            offset = len(MAGIC)
+            for device, fname, data in outputs:
+                f.write(data)
+                index.setdefault(device, {})[fname] = [offset, len(data)]
+                offset += len(data)
+                entries += 1
+                data_bytes += len(data)
+            f.write(json.dumps({"version": 1, "devices": index}, separators=(",", ":")).encode())
+            f.write(_TRAILER.pack(offset, TRAILER_MAGIC))
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, dest)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return entries, data_bytes
+
+
+def iter_dir(root):
+    """(device, fname, bytes) for every <root>/<device>/*.txt and device.json, in sorted order."""
+    root = Path(root)
+    for ddir in sorted(p for p in root.iterdir() if p.is_dir()):
+        # device.json is the inventory metadata (inventory.py), packed along with the outputs
+        for fpath in sorted(list(ddir.glob("*.txt")) + list(ddir.glob("device.json"))):
+            yield ddir.name, fpath.name, fpath.read_bytes()
+
+
+def pack_dir(root, dest):
+    return write_pack(iter_dir(root), dest)
+
+
+def unpack(pack_path, root):
+    """Write a pack back out as the <root>/<device>/<fname> directory layout."""
+    root = Path(root)
+    reader = PackReader(pack_path)
+    try:
+        count = 0
+        for device in reader.devices():
+            ddir = root / device
+            ddir.mkdir(parents=True, exist_ok=True)
+            for fname in reader.files(device):
+                (ddir / fname).write_bytes(reader.view(device, fname))
+                count += 1
+        return count
+    finally:
+        reader.close()
+
+
+class PackReader:
+    """Read-only mmap of one pack file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.size = st.st_size
+            self.mtime_ns = st.st_mtime_ns
+            self.inode = st.st_ino
+            if self.size < len(MAGIC) + _TRAILER.size:
+                raise PackError(f"{self.path}: too small to be a mock pack")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        index_off, magic = _TRAILER.unpack(mm[-_TRAILER.size:])
+        if mm[:len(MAGIC)] != MAGIC or magic != TRAILER_MAGIC:
+            self.close()
+            raise PackError(f"{self.path}: not a mock pack")
+        self._index = json.loads(mm[index_off:self.size - _TRAILER.size])["devices"]
+        self.data_bytes = index_off - len(MAGIC)
+        self.entries = sum(len(files) for files in self._index.values())
+
+    def devices(self):
+        return sorted(self._index)
+
+    def files(self, device):
+        return sorted(self._index.get(device, ()))
+
+    def locate(self, device, fname):
+        files = self._index.get(device)
+        return files.get(fname) if files else None
+
+    def view(self, device, fname):
+        """Zero-copy memoryview of one output, or None."""
+        loc = self.locate(device, fname)
+        if loc is None:
+            return None
+        return memoryview(self._mm)[loc[0]:loc[0] + loc[1]]
+
+    def willneed(self):
+        if hasattr(self._mm, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+            self._mm.madvise(mmap.MADV_WILLNEED)
+
+    def close(self):
+        try:
+            self._mm.close()
+        except BufferError:
+            # a response still holds a view; the map is released when it is collected
+            pass
+
+
+class PackStore:
+    """
+    MockStore-compatible view of a packed mock file (see tool_server.py, MOCK_PACK).
+    - one open() and one JSON index load at start-up instead of a directory walk
+    - lookups are a dict probe plus a slice of the mapped file; the OS page cache
+      is the output cache, so there is no LRU to size
+    - mtime/inode polling re-maps the file after the generator replaces it
+    """
+
+    def __init__(self, pack_path, poll_interval=2.0):
+        self.pack_path = Path(pack_path)
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._last_poll = 0.0
+        self._watcher = None
+        self._stop = threading.Event()
+        self.counters = {"hits": 0, "misses": 0, "reloads": 0}
+        self._reader = PackReader(self.pack_path)
+        self._device_set = frozenset(self._reader.devices())
+
+    def devices(self):
+        self._maybe_poll()
+        return self._reader.devices()
+
+    def has_device(self, device):
+        self._maybe_poll()
+        return device in self._device_set
+
+    def files(self, device):
+        # command outputs only, like MockStore.files; device.json stays reachable through get()
+        return [f for f in self._reader.files(device) if f.endswith(".txt")]
+
+    def view(self, device, fname):
+        self._maybe_poll()
+        mv = self._reader.view(device, fname)
+        with self._lock:
+            self.counters["hits" if mv is not None else "misses"] += 1
+        return mv
+
+    def get(self, device, fname):
+        mv = self.view(device, fname)
+        return None if mv is None else str(mv, "utf-8")
+
+    def cached(self, device, fname):
+        mv = self._reader.view(device, fname)
+        return None if mv is None else str(mv, "utf-8")
+
+    def exists(self, device, fname):
+        return self._reader.locate(device, fname) is not None
+
+    def version(self, device, fname):
+        """Pack generation (inode, mtime_ns) while the output exists, else None."""
+        reader = self._reader
+        if reader.locate(device, fname) is None:
+            return None
+        return (reader.inode, reader.mtime_ns)
+
+    def path(self, device, fname):
+        # outputs have no file of their own; callers fall back to iter_bytes()
+        return None
+
+    def iter_bytes(self, device, fname, chunk=READ_CHUNK):
+        mv = self._reader.view(device, fname)
+        if mv is None:
+            return
+        for i in range(0, len(mv), chunk):
+            yield bytes(mv[i:i + chunk])
+
+    def preload(self):
+        """Ask the kernel to read the whole pack ahead; pages are shared by every process."""
+        self._reader.willneed()
+
+    # -- invalidation --
+    def _maybe_poll(self):
+        if self._watcher is None and time.monotonic() - self._last_poll >= self.poll_interval:
+            self.poll()
+
+    def poll(self):
+        """Re-map the pack if it was replaced or rewritten; returns 1 on reload, else 0."""
+        self._last_poll = time.monotonic()
+        try:
+            st = self.pack_path.stat()
+        except FileNotFoundError:
+            return 0
+        cur = self._reader
+        if (st.st_ino, st.st_mtime_ns, st.st_size) == (cur.inode, cur.mtime_ns, cur.size):
+            return 0
+        try:
+            reader = PackReader(self.pack_path)
+        except (PackError, ValueError, OSError):
+            # partially written or replaced mid-poll; keep serving the old map
+            return 0
+        with self._lock:
+            self._reader = reader
+            self._device_set = frozenset(reader.devices())
+            self.counters["reloads"] += 1
+        cur.close()
+        return 1
+
+    def start_watcher(self, on_change=None):
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        def _run():
+            while not self._stop.wait(self.poll_interval):
+                n = self.poll()
+                if n and on_change is not None:
+                    on_change(n)
+        self._watcher = threading.Thread(target=_run, name="mock-pack-watcher", daemon=True)
+        self._watcher.start()
+
+    def after_fork(self):
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def stop_watcher(self):
+        self._stop.set()
+        self._watcher = None
+
+    def stats(self):
+        reader = self._reader
+        with self._lock:
+            out = dict(self.counters)
+        out.update({
+            "format": "pack",
+            "entries": reader.entries,
+            "bytes": reader.data_bytes,
+            "devices": len(self._device_set),
+        })
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
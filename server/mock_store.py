@@ -0,0 +1,201 @@
+# server/mock_store.py
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class MockStore:
+    """
+    In-memory view of the pyats_mocks directory:
+    - device index cached until the pack root changes
+    - command outputs kept in an LRU bounded by total bytes
+    - mtime polling (inline or from a watcher thread) drops entries that the
+      mock pack generator has rewritten since they were loaded
+    """
+
+    def __init__(self, root, max_bytes=64 * 1024 * 1024, poll_interval=2.0):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # (device, fname) -> (text, mtime_ns, size)
+        self._bytes = 0
+        self._devices = []
+        self._device_set = frozenset()
+        self._root_mtime = None
+        self._last_poll = 0.0
+        self._watcher = None
+        self._stop = threading.Event()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "rescans": 0}
+        self._scan_devices()
+
+    # -- device index --
+    def _scan_devices(self):
+        try:
+            mtime = self.root.stat().st_mtime_ns
+            names = sorted(p.name for p in self.root.iterdir() if p.is_dir())
+        except FileNotFoundError:
+            mtime, names = None, []
+        with self._lock:
+            self._root_mtime = mtime
+            self._devices = names
+            self._device_set = frozenset(names)
+            self.counters["rescans"] += 1
+
+    def devices(self):
+        self._maybe_poll()
+        return list(self._devices)
+
+    def has_device(self, device):
+        self._maybe_poll()
+        return device in self._device_set
+
+    # -- outputs --
+    def get(self, device, fname):
+        """Return the file content for (device, fname), or None if it does not exist."""
+        self._maybe_poll()
+        key = (device, fname)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[0]
+            self.counters["misses"] += 1
+        return self._load(key)
+
+    def cached(self, device, fname):
+        """Return the cached content without loading or counting a lookup (None if not cached)."""
+        entry = self._entries.get((device, fname))
+        return entry[0] if entry is not None else None
+
+    def path(self, device, fname):
+        return self.root / device / fname
+
+    def files(self, device):
+        return sorted(p.name for p in (self.root / device).glob("*.txt"))
+
+    def exists(self, device, fname):
+        return self.path(device, fname).is_file()
+
+    def version(self, device, fname):
+        """mtime_ns of the output (from the cache entry when loaded), or None if missing."""
+        entry = self._entries.get((device, fname))
+        if entry is not None:
+            return entry[1]
+        try:
+            return self.path(device, fname).stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def _load(self, key):
+        fpath = self.root / key[0] / key[1]
+        try:
+            st = fpath.stat()
+            text = fpath.read_text()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        self._put(key, text, st.st_mtime_ns, st.st_size)
+        return text
+
+    def _put(self, key, text, mtime_ns, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (text, mtime_ns, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.counters["evictions"] += 1
+
+    def preload(self):
+        """Read the whole pack into memory, stopping once the byte budget is full."""
+        for device in self.devices():
+            for fname in self.files(device):
+                if self._bytes >= self.max_bytes:
+                    return
+                self._load((device, fname))
+
+    # -- invalidation --
+    def _maybe_poll(self):
+        if self._watcher is None and time.monotonic() - self._last_poll >= self.poll_interval:
+            self.poll()
+
+    def poll(self):
+        """
+        Re-scan the device index if the pack root changed and drop stale outputs.
+        Returns the number of changes seen (device rescan counts as one).
+        """
+        self._last_poll = time.monotonic()
+        changes = 0
+        try:
+            root_mtime = self.root.stat().st_mtime_ns
+        except FileNotFoundError:
+            root_mtime = None
+        if root_mtime != self._root_mtime:
+            self._scan_devices()
+            changes += 1
+
+        with self._lock:
+            snapshot = [(k, v[1], v[2]) for k, v in self._entries.items()]
+        stale = []
+        for key, mtime_ns, size in snapshot:
+            try:
+                st = (self.root / key[0] / key[1]).stat()
+            except (FileNotFoundError, NotADirectoryError):
+                stale.append(key)
+                continue
+            if st.st_mtime_ns != mtime_ns or st.st_size != size:
+                stale.append(key)
+        if stale:
+            with self._lock:
+                for key in stale:
+                    entry = self._entries.pop(key, None)
+                    if entry is not None:
+                        self._bytes -= entry[2]
+                        self.counters["invalidations"] += 1
+        return changes + len(stale)
+
+    def start_watcher(self, on_change=None):
+        """
+        Poll from a daemon thread so requests never pay for the stat() sweep.
+        on_change(n) is called from that thread after a poll that saw n > 0 changes.
+        """
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        def _run():
+            while not self._stop.wait(self.poll_interval):
+                n = self.poll()
+                if n and on_change is not None:
+                    on_change(n)
+        self._watcher = threading.Thread(target=_run, name="mock-store-watcher", daemon=True)
+        self._watcher.start()
+
+    def after_fork(self):
+        """Reset thread state in a forked worker; the parent's lock and watcher do not survive fork()."""
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def stop_watcher(self):
+        self._stop.set()
+        self._watcher = None
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters)
+            out.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "devices": len(self._devices),
+            })
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
@@ -0,0 +1,219 @@
+# server/parsers.py
+"""
+Structured parsers for the common show commands, used by /tool/run_show with
+"format": "structured". Each parser takes the raw output text and returns a dict;
+lines it does not recognise are skipped rather than treated as errors, so both the
+generated mocks and real IOS output parse.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+_IPV4 = r"\d{1,3}(?:\.\d{1,3}){3}"
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_ip_interface_brief(text):
+    interfaces = []
+    header = None
+    for line in text.splitlines():
+        tokens = line.split()
+        if not tokens or line.startswith("#"):
+            continue
+        if tokens[0] == "Interface":
+            header = tokens
+            continue
+        if header is None or len(tokens) < 4:
+            continue
+        item = {"interface": tokens[0], "ip_address": tokens[1], "protocol": tokens[-1]}
+        rest = tokens[2:-1]
+        if "OK?" in header and len(rest) >= 3:
+            # real IOS: Interface IP-Address OK? Method Status Protocol
+            item["ok"], item["method"] = rest[0], rest[1]
+            rest = rest[2:]
+        item["status"] = " ".join(rest)
+        item["up"] = item["status"] == "up" and item["protocol"] == "up"
+        interfaces.append(item)
+    return {
+        "interfaces": interfaces,
+        "up": sum(1 for i in interfaces if i["up"]),
+        "down": sum(1 for i in interfaces if not i["up"]),
+    }
+
+
+_BGP_ID_RE = re.compile(rf"BGP router identifier ({_IPV4}), local AS (?:number )?(\d+)")
+
+
+def parse_ip_bgp_summary(text):
+    result = {"router_id": None, "local_as": None, "neighbors": []}
+    header = None
+    for line in text.splitlines():
+        m = _BGP_ID_RE.search(line)
+        if m:
+            result["router_id"], result["local_as"] = m.group(1), int(m.group(2))
+            continue
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == "Neighbor":
+            header = tokens
+            continue
+        if header is None or not re.fullmatch(_IPV4, tokens[0]):
+            continue
+        row = {}
+        if len(tokens) >= len(header):
+            # the last column may hold spaces ("Idle (Admin)"), so it takes the remaining tokens
+            row = dict(zip(header[:-1], tokens))
+            row[header[-1]] = " ".join(tokens[len(header) - 1:])
+        state_pfx = row.get("PfxRcd", row.get("State/PfxRcd", tokens[-1]))
+        pfx = _to_int(state_pfx)
+        result["neighbors"].append({
+            "neighbor": tokens[0],
+            "remote_as": _to_int(row.get("AS", tokens[1] if len(tokens) > 1 else None)),
+            "up_down": row.get("Up/Down"),
+            "state": "Established" if pfx is not None else state_pfx,
+            "prefixes_received": pfx,
+        })
+    result["established"] = sum(1 for n in result["neighbors"] if n["state"] == "Established")
+    return result
+
+
+_VERSION_RE = re.compile(r"Version ([\w.()]+)")
+_UPTIME_RE = re.compile(r"^(\S+) uptime is (.+)$", re.M)
+_UPTIME_DAYS_RE = re.compile(r"(\d+) (year|week|day)s?")
+_SOFTWARE_RE = re.compile(r"^(Cisco IOS[^,]*?)(?:,|$)", re.M)
+
+
+def parse_version(text):
+    result = {"software": None, "version": None, "hostname": None, "uptime": None, "uptime_days": None}
+    m = _SOFTWARE_RE.search(text)
+    if m:
+        result["software"] = m.group(1).strip()
+    m = _VERSION_RE.search(text)
+    if m:
+        result["version"] = m.group(1).rstrip(",")
+    m = _UPTIME_RE.search(text)
+    if m:
+        if m.group(1) != "Device":
+            result["hostname"] = m.group(1)
+        result["uptime"] = m.group(2).strip()
+        days = 0
+        for n, unit in _UPTIME_DAYS_RE.findall(result["uptime"]):
+            days += int(n) * {"year": 365, "week": 7, "day": 1}[unit]
+        result["uptime_days"] = days
+    return result
+
+
+_PORT_STATES = {"connected", "notconnect", "disabled", "err-disabled", "inactive",
+                "monitoring", "suspended", "sfpAbsent", "xcvrAbsent", "noOperMem"}
+
+
+def parse_interfaces_status(text):
+    # columns are not reliably aligned (Name may be blank or contain spaces), so anchor
+    # on the Status keyword: Port [Name...] Status Vlan Duplex Speed [Type...]
+    ports = []
+    for line in text.splitlines():
+        tokens = line.split()
+        if len(tokens) < 5 or tokens[0] in ("Port", "#"):
+            continue
+        idx = next((i for i, t in enumerate(tokens[1:], 1) if t in _PORT_STATES), None)
+        if idx is None or len(tokens) < idx + 4:
+            continue
+        ports.append({
+            "port": tokens[0],
+            "name": " ".join(tokens[1:idx]) or None,
+            "status": tokens[idx],
+            "vlan": tokens[idx + 1],
+            "duplex": tokens[idx + 2],
+            "speed": tokens[idx + 3],
+            "type": " ".join(tokens[idx + 4:]) or None,
+        })
+    return {
+        "ports": ports,
+        "connected": sum(1 for p in ports if p["status"] == "connected"),
+        "notconnect": sum(1 for p in ports if p["status"] != "connected"),
+    }
+
+
+_ROUTE_RE = re.compile(
+    rf"^(?P<code>[A-Za-z][A-Za-z0-9]?\*?(?: [A-Za-z0-9]{{1,2}})?)\s+(?P<prefix>{_IPV4}(?:/\d+)?)"
+    rf"(?:\s+\[(?P<ad>\d+)/(?P<metric>\d+)\])?"
+    rf"(?:\s+via (?P<next_hop>{_IPV4}))?"
+    r"(?P<connected> is directly connected)?(?P<tail>.*)$")
+_IFNAME_RE = re.compile(r"[A-Za-z][\w/.:-]*")
+
+
+def parse_ip_route(text):
+    routes = []
+    for line in text.splitlines():
+        m = _ROUTE_RE.match(line.rstrip())
+        if not m:
+            continue
+        # last comma-separated field is the outgoing interface when it looks like one
+        last = m.group("tail").rsplit(",", 1)[-1].strip()
+        routes.append({
+            "code": m.group("code").strip(),
+            "prefix": m.group("prefix"),
+            "admin_distance": _to_int(m.group("ad")),
+            "metric": _to_int(m.group("metric")),
+            "next_hop": m.group("next_hop"),
+            "interface": last if "," in m.group("tail") and _IFNAME_RE.fullmatch(last) else None,
+            "connected": bool(m.group("connected")),
+        })
+    return {"routes": routes, "count": len(routes)}
+
+
+PARSERS = {
+    "show ip interface brief": parse_ip_interface_brief,
+    "show ip bgp summary": parse_ip_bgp_summary,
+    "show version": parse_version,
+    "show interfaces status": parse_interfaces_status,
+    "show ip route": parse_ip_route,
+}
+
+
+class ParseCache:
+    """
+    Parsed outputs memoized by (device, command, version), where version is the mtime
+    (or pack generation) of the source; a regenerated file gets a new key, so nothing
+    has to be invalidated. Bounded by entry count, least recently used first out.
+    """
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0}
+
+    def get(self, device, command, version, text_fn):
+        """Return the parsed dict; text_fn() supplies the raw output on a miss (None if gone)."""
+        key = (device, command, version)
+        with self._lock:
+            parsed = self._entries.get(key)
+            if parsed is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return parsed
+            self.counters["misses"] += 1
+        text = text_fn()
+        if text is None:
+            return None
+        parsed = PARSERS[command](text)
+        with self._lock:
+            self._entries[key] = parsed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters, entries=len(self._entries))
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
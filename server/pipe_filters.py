@@ -0,0 +1,107 @@
+# server/pipe_filters.py
+import re
+from functools import lru_cache
+
+# IOS output modifiers; every one has a distinct first letter, so any prefix ("inc", "i") resolves
+MODIFIERS = ("include", "exclude", "begin", "section", "count")
+
+
+# "| word pattern" where word may be a modifier; anything else after a pipe belongs to the pattern
+_NEXT_MODIFIER_RE = re.compile(r"\|\s+(\S+)(?=\s+\S)")
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _modifier(word):
+    """The modifier a word (or a prefix of one) names, else None."""
+    matches = [m for m in MODIFIERS if m.startswith(word.lower())]
+    return matches[0] if len(matches) == 1 else None
+
+
+def parse_command(cmd):
+    """
+    Split "show running-config | include interface" into the base command and
+    a list of (modifier, pattern) filters. Raises FilterError on unknown modifiers.
+    """
+    head, pipe, rest = cmd.partition("|")
+    base = " ".join(head.split())
+    segments = []
+    if pipe:
+        # later pipes only start a new modifier when a modifier word follows them, so regex
+        # alternation ("include up|down") stays part of the pattern
+        start = 0
+        for m in _NEXT_MODIFIER_RE.finditer(rest):
+            if _modifier(m.group(1)) is not None:
+                segments.append(rest[start:m.start()])
+                start = m.start() + 1
+        segments.append(rest[start:])
+    filters = []
+    for seg in segments:
+        words = seg.strip().split(None, 1)
+        if not words:
+            raise FilterError("empty pipe modifier")
+        modifier = _modifier(words[0])
+        if modifier is None:
+            raise FilterError(f"unknown pipe modifier: {words[0]}")
+        pattern = words[1].strip() if len(words) > 1 else ""
+        if not pattern:
+            raise FilterError(f"pipe modifier '{modifier}' needs a regular expression")
+        filters.append((modifier, pattern))
+    for mod, _ in filters[:-1]:
+        if mod == "count":
+            raise FilterError("'count' must be the last pipe modifier")
+    return base, filters
+
+
+@lru_cache(maxsize=512)
+def compile_pattern(pattern):
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise FilterError(f"invalid regular expression '{pattern}': {e}")
+
+
+def _include(lines, rx):
+    return (line for line in lines if rx.search(line))
+
+
+def _exclude(lines, rx):
+    return (line for line in lines if not rx.search(line))
+
+
+def _begin(lines, rx):
+    started = False
+    for line in lines:
+        if started or rx.search(line):
+            started = True
+            yield line
+
+
+def _section(lines, rx):
+    # a section is a top-level line matching the pattern plus the indented lines under it
+    in_section = False
+    for line in lines:
+        if line[:1].isspace():
+            if in_section or rx.search(line):
+                yield line
+        else:
+            in_section = bool(rx.search(line))
+            if in_section:
+                yield line
+
+
+def _count(lines, rx):
+    n = sum(1 for line in lines if rx.search(line))
+    yield f"Number of lines which match regexp = {n}"
+
+
+_APPLY = {"include": _include, "exclude": _exclude, "begin": _begin, "section": _section, "count": _count}
+
+
+def apply_filters(lines, filters):
+    """Chain the filters lazily over an iterable of lines (without line endings)."""
+    for mod, pattern in filters:
+        lines = _APPLY[mod](lines, compile_pattern(pattern))
+    return lines
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Production entry point for the tool server.
+
+    python server/serve.py --workers 4 --threads 8 --bind 127.0.0.1:8000
+
+With gunicorn installed the app is loaded and the mock pack preloaded once in the master,
+then forked into gthread workers that share those pages copy-on-write. A master-side watcher
+polls the pack; once a regeneration has settled it refreshes the master's copy and sends
+SIGHUP, so gunicorn replaces the workers gracefully with ones forked from the fresh copy.
+Without gunicorn it falls back to Werkzeug's threaded server in one process.
+
+--server asyncio serves the ASGI app in tool_server_async.py with uvicorn instead: one event
+loop per worker, store reads on a thread pool (ASYNC_READ_WORKERS), and concurrent requests
+for the same (device, command) sharing one read. uvicorn starts each worker as a fresh
+process, so every worker loads the pack itself and --threads does not apply.
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+
+import tool_server
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    def _watch_pack(arbiter):
+        # reload only after a poll with no further changes, so a regeneration in progress
+        # triggers one reload rather than one per file written
+        store = tool_server.store
+        pending = False
+        while True:
+            time.sleep(store.poll_interval)
+            changes = store.poll()
+            if changes:
+                pending = True
+            elif pending:
+                pending = False
+                store.preload()
+                arbiter.log.info("mock pack changed; reloading workers")
+                os.kill(arbiter.pid, signal.SIGHUP)
+
+    def when_ready(arbiter):
+        if args.reload_on_change:
+            threading.Thread(target=_watch_pack, args=(arbiter,), name="pack-watcher", daemon=True).start()
+
+    def post_fork(arbiter, worker):
+        tool_server.store.after_fork()
+        tool_server.store.start_watcher()
+        tool_server.fleet_index.after_fork()
+        tool_server.fleet_index.start_refresher()
+        tool_server.inventory.after_fork()
+        tool_server.inventory.start_refresher()
+        tool_server.trace_log.after_fork()
+
+    class ToolServerApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return tool_server.create_app(watch=False)
+
+    ToolServerApplication({
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "keepalive": 5,
+        "graceful_timeout": 30,
+        "accesslog": "-" if args.access_log else None,
+        "when_ready": when_ready,
+        "post_fork": post_fork,
+    }).run()
+
+
+def run_werkzeug(args):
+    from werkzeug.serving import WSGIRequestHandler, run_simple
+
+    host, _, port = args.bind.rpartition(":")
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    run_simple(host or "localhost", int(port), tool_server.create_app(), threaded=True)
+
+
+def run_asyncio(args):
+    import uvicorn
+
+    host, _, port = args.bind.rpartition(":")
+    uvicorn.run("tool_server_async:create_async_app", factory=True, host=host or "localhost", port=int(port),
+                workers=args.workers, access_log=args.access_log, timeout_keep_alive=5, log_level="warning")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bind", default=os.environ.get("TOOL_SERVER_BIND", "127.0.0.1:8000"))
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("TOOL_SERVER_WORKERS", str(os.cpu_count() or 1))))
+    ap.add_argument("--threads", type=int, default=int(os.environ.get("TOOL_SERVER_THREADS", "4")))
+    ap.add_argument("--server", choices=["gunicorn", "werkzeug", "asyncio"], default=os.environ.get("TOOL_SERVER_IMPL", "gunicorn"))
+    ap.add_argument("--no-reload-on-change", dest="reload_on_change", action="store_false",
+                    help="do not restart workers when the mock pack is regenerated")
+    ap.add_argument("--access-log", action="store_true")
+    args = ap.parse_args()
+
+    if args.server == "asyncio":
+        try:
+            import starlette  # noqa: F401
+            import uvicorn  # noqa: F401
+        except ImportError:
+            print("[WARN] starlette/uvicorn are not installed; falling back to gunicorn")
+            args.server = "gunicorn"
+    if args.server == "gunicorn":
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print("[WARN] gunicorn is not installed; falling back to the single-process Werkzeug server")
+            args.server = "werkzeug"
+    if args.server == "asyncio":
+        run_asyncio(args)
+    elif args.server == "gunicorn":
+        run_gunicorn(args)
+    else:
+        run_werkzeug(args)
+
+
+if __name__ == "__main__":
+    main()
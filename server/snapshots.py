@@ -0,0 +1,266 @@
+# server/snapshots.py
+"""
+Versioned snapshots of the mock pack with content-addressed, deduplicated storage.
+
+    <root>/objects/ab/abcdef...   zlib-compressed output, named by the sha256 of its content
+    <root>/manifests/000007.json  {"id", "created", "label", "entries": {device: {fname: [sha, version]}}}
+
+A snapshot stores each distinct output once, however many snapshots reference it. The
+store version (file mtime, or pack generation) recorded next to each hash lets the next
+snapshot or diff reuse the hash of an unchanged output without reading it again, and
+diffs only read the outputs whose hashes differ.
+"""
+import difflib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+
+def _norm_version(version):
+    # pack versions are tuples; manifests round-trip them through JSON as lists
+    return list(version) if isinstance(version, tuple) else version
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _create_exclusive(path, data):
+    """
+    Like _write_atomic, but FileExistsError when path already exists. The finished file is
+    hard-linked into place, so creation is exclusive across processes and never seen partial.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.link(tmp, path)
+    finally:
+        os.unlink(tmp)
+
+
+def fname_to_command(fname):
+    return fname[:-4].replace("_", " ") if fname.endswith(".txt") else fname
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class SnapshotStore:
+    def __init__(self, root, diff_cache_entries=4096):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.manifests = self.root / "manifests"
+        self._lock = threading.RLock()
+        self._manifests = {}  # id -> manifest (immutable once written)
+        self._live = {}  # (device, fname) -> (version, sha) for the current store
+        self._diffs = OrderedDict()  # (sha_a, sha_b, context) -> diff lines
+        self._diff_cache_entries = diff_cache_entries
+        self.counters = {"hashed": 0, "hash_reused": 0, "objects_written": 0,
+                         "diffs_computed": 0, "diff_cache_hits": 0}
+        latest = self.ids()[-1:] or None
+        if latest:
+            # seed the hash memo so a restart does not re-read unchanged outputs
+            for device, files in self.load(latest[0])["entries"].items():
+                for fname, (sha, version) in files.items():
+                    self._live[(device, fname)] = (version, sha)
+
+    # -- manifests --
+    def ids(self):
+        if not self.manifests.is_dir():
+            return []
+        return sorted(p.stem for p in self.manifests.glob("*.json"))
+
+    def load(self, snap_id):
+        with self._lock:
+            manifest = self._manifests.get(snap_id)
+        if manifest is None:
+            path = self.manifests / f"{snap_id}.json"
+            try:
+                manifest = json.loads(path.read_text())
+            except FileNotFoundError:
+                raise SnapshotError(f"unknown snapshot: {snap_id}")
+            with self._lock:
+                self._manifests[snap_id] = manifest
+        return manifest
+
+    def list(self):
+        out = []
+        for snap_id in self.ids():
+            m = self.load(snap_id)
+            out.append({"id": m["id"], "created": m["created"], "label": m.get("label"),
+                        "devices": len(m["entries"]), "files": sum(len(f) for f in m["entries"].values())})
+        return out
+
+    def resolve(self, ref):
+        """Snapshot id for "latest", "previous" (the one before latest) or an explicit id."""
+        ids = self.ids()
+        if ref in (None, "latest"):
+            if not ids:
+                raise SnapshotError("no snapshots yet")
+            return ids[-1]
+        if ref == "previous":
+            if len(ids) < 2:
+                raise SnapshotError("need at least two snapshots")
+            return ids[-2]
+        if ref not in ids:
+            raise SnapshotError(f"unknown snapshot: {ref}")
+        return ref
+
+    # -- objects --
+    def _object_path(self, sha):
+        return self.objects / sha[:2] / sha
+
+    def read(self, sha):
+        return zlib.decompress(self._object_path(sha).read_bytes()).decode("utf-8", "replace")
+
+    def _put_object(self, sha, data):
+        path = self._object_path(sha)
+        if path.exists():
+            return False
+        _write_atomic(path, zlib.compress(data, 6))
+        with self._lock:
+            self.counters["objects_written"] += 1
+        return True
+
+    # -- live view --
+    def live_entries(self, store, write_objects=False):
+        """
+        {device: {fname: [sha, version]}} for the store as it is now. Outputs whose version
+        matches the memo keep their hash without being read.
+        """
+        entries = {}
+        new_objects = 0
+        for device in store.devices():
+            files = {}
+            for fname in store.files(device):
+                version = _norm_version(store.version(device, fname))
+                if version is None:
+                    continue
+                with self._lock:
+                    memo = self._live.get((device, fname))
+                if memo is not None and memo[0] == version and (not write_objects or self._object_path(memo[1]).exists()):
+                    sha = memo[1]
+                    with self._lock:
+                        self.counters["hash_reused"] += 1
+                else:
+                    text = store.get(device, fname)
+                    if text is None:
+                        continue
+                    data = text.encode()
+                    sha = hashlib.sha256(data).hexdigest()
+                    if write_objects and self._put_object(sha, data):
+                        new_objects += 1
+                    with self._lock:
+                        self._live[(device, fname)] = (version, sha)
+                        self.counters["hashed"] += 1
+                files[fname] = [sha, version]
+            entries[device] = files
+        return entries, new_objects
+
+    def take(self, store, label=None):
+        """Record a snapshot of the store; returns its summary."""
+        entries, new_objects = self.live_entries(store, write_objects=True)
+        created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            ids = self.ids()
+            next_id = int(ids[-1]) + 1 if ids else 1
+            # other server processes share the directory: an id is ours only once its file is created
+            while True:
+                snap_id = f"{next_id:06d}"
+                manifest = {"id": snap_id, "created": created, "label": label, "entries": entries}
+                try:
+                    _create_exclusive(self.manifests / f"{snap_id}.json",
+                                      json.dumps(manifest, separators=(",", ":")).encode())
+                    break
+                except FileExistsError:
+                    next_id += 1
+            self._manifests[snap_id] = manifest
+        files = sum(len(f) for f in entries.values())
+        return {"id": snap_id, "created": manifest["created"], "label": label, "devices": len(entries),
+                "files": files, "new_objects": new_objects}
+
+    # -- diff --
+    def _diff_lines(self, sha_a, sha_b, context, text_b=None):
+        key = (sha_a, sha_b, context)
+        with self._lock:
+            cached = self._diffs.get(key)
+            if cached is not None:
+                self._diffs.move_to_end(key)
+                self.counters["diff_cache_hits"] += 1
+                return cached
+        a = self.read(sha_a).splitlines() if sha_a else []
+        if text_b is None:
+            text_b = self.read(sha_b) if sha_b else ""
+        lines = list(difflib.unified_diff(a, text_b.splitlines(), lineterm="", n=context))[2:]
+        with self._lock:
+            self._diffs[key] = lines
+            self.counters["diffs_computed"] += 1
+            while len(self._diffs) > self._diff_cache_entries:
+                self._diffs.popitem(last=False)
+        return lines
+
+    def diff(self, old, new, device=None, fname=None, context=3, limit=100, live_store=None):
+        """
+        Per-(device, command) diffs between two entry maps. Pairs with equal hashes are
+        counted as unchanged without reading anything. With live_store, `new` is the live
+        view and changed outputs are read from the store rather than the object store.
+        """
+        summary = {"compared": 0, "unchanged": 0, "changed": 0, "added": 0, "removed": 0}
+        results = []
+        for dev in sorted(set(old) | set(new)):
+            if device and not fnmatchcase(dev, device):
+                continue
+            a_files, b_files = old.get(dev, {}), new.get(dev, {})
+            for name in sorted(set(a_files) | set(b_files)):
+                if fname and name != fname:
+                    continue
+                summary["compared"] += 1
+                sha_a = a_files[name][0] if name in a_files else None
+                sha_b = b_files[name][0] if name in b_files else None
+                if sha_a == sha_b:
+                    summary["unchanged"] += 1
+                    continue
+                status = "added" if sha_a is None else "removed" if sha_b is None else "changed"
+                summary[status] += 1
+                if len(results) >= limit:
+                    continue
+                text_b = None
+                if live_store is not None and sha_b is not None and not self._object_path(sha_b).exists():
+                    text_b = live_store.get(dev, name) or ""
+                lines = self._diff_lines(sha_a, sha_b, context, text_b)
+                results.append({
+                    "device": dev,
+                    "command": fname_to_command(name),
+                    "status": status,
+                    "lines_added": sum(1 for ln in lines if ln.startswith("+")),
+                    "lines_removed": sum(1 for ln in lines if ln.startswith("-")),
+                    "diff": lines,
+                })
+        summary["truncated"] = len(results) < summary["changed"] + summary["added"] + summary["removed"]
+        summary["results"] = results
+        return summary
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters, snapshots=len(self.ids()), diff_cache=len(self._diffs))
+        return out
@@ -0,0 +1,118 @@
+# server/telemetry.py
+"""
+Request tracing and Prometheus-style metrics for the tool server, without a client library:
+- Histogram / Counter keep per-label-set values under one lock and render the text
+  exposition format for /metrics
+- TraceLog appends one JSON line per span, tagged with the caller's X-Correlation-ID
+
+Values are per process; under serve.py each gunicorn worker reports its own.
+"""
+import json
+import threading
+import time
+import uuid
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                out.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, *labels):
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, row in sorted(self._values.items()):
+                for bound, n in zip(self.buckets, row):
+                    out.append(f"{self.name}_bucket{_labels(names, labels + (repr(bound),))} {n}")
+                out.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {row[-1]}")
+                out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {row[-2]:.6f}")
+                out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {row[-1]}")
+        return out
+
+
+def render(metrics, gauges=None):
+    """Prometheus text format for the given metrics plus {name: (help, value)} gauges."""
+    lines = []
+    for m in metrics:
+        lines.extend(m.render())
+    for name, (help_text, value) in (gauges or {}).items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+class TraceLog:
+    """Append-only JSONL span log; path=None keeps it disabled."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def write(self, record):
+        if not self.path:
+            return
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", buffering=1)
+                self._file.write(line)
+            except OSError:
+                pass
+
+    def after_fork(self):
+        # each worker opens its own handle (O_APPEND keeps whole lines together)
+        self._lock = threading.Lock()
+        self._file = None
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+def new_span(trace_id, name):
+    return {"trace_id": trace_id, "span_id": uuid.uuid4().hex[:8], "name": name, "ts": round(time.time(), 6)}
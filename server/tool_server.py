@@ -1,10 +1,69 @@
-from flask import Flask, request, jsonify
+import os
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from flask import Flask, Response, g, request, jsonify, send_file
 from pathlib import Path
+from werkzeug.serving import WSGIRequestHandler
+from fleet_index import FIELDS, FleetIndex
+from inventory import FIELDS as INVENTORY_FIELDS, FILTERS as INVENTORY_FILTERS, Inventory, InventoryError
+from mock_pack import PackStore
+from mock_store import MockStore
+from parsers import PARSERS, ParseCache
+from snapshots import SnapshotError, SnapshotStore
+import telemetry
+from pipe_filters import MODIFIERS, FilterError, apply_filters, compile_pattern, parse_command
 
 app = Flask(__name__)
 BASE = Path(__file__).parent
 MOCK_DIR = BASE / "pyats_mocks"
 
+# in-memory output cache; see mock_store.py
+MOCK_CACHE_BYTES = int(os.environ.get("MOCK_CACHE_BYTES", str(256 * 1024 * 1024)))
+MOCK_POLL_INTERVAL = float(os.environ.get("MOCK_POLL_INTERVAL", "2.0"))
+# MOCK_PACK=<file> serves a packed mock file (mock_pack.py) instead of the directory layout
+MOCK_PACK = os.environ.get("MOCK_PACK")
+if MOCK_PACK:
+    store = PackStore(MOCK_PACK, poll_interval=MOCK_POLL_INTERVAL)
+else:
+    store = MockStore(MOCK_DIR, max_bytes=MOCK_CACHE_BYTES, poll_interval=MOCK_POLL_INTERVAL)
+
+# bounded pool shared by all /tool/run_show_batch requests
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "8"))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "10000"))
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="run-show-batch")
+
+# parsed outputs for "format": "structured"; see parsers.py
+PARSE_CACHE_ENTRIES = int(os.environ.get("PARSE_CACHE_ENTRIES", "50000"))
+parse_cache = ParseCache(max_entries=PARSE_CACHE_ENTRIES)
+
+# inverted indexes over parsed outputs for /tool/query; see fleet_index.py
+INDEX_REFRESH_INTERVAL = float(os.environ.get("INDEX_REFRESH_INTERVAL", "5.0"))
+QUERY_MAX_LIMIT = int(os.environ.get("QUERY_MAX_LIMIT", "10000"))
+
+# device metadata (role, site, vendor, tags) for /tool/inventory; see inventory.py
+INVENTORY_PAGE_SIZE = int(os.environ.get("INVENTORY_PAGE_SIZE", "1000"))
+INVENTORY_MAX_LIMIT = int(os.environ.get("INVENTORY_MAX_LIMIT", "10000"))
+inventory = Inventory(store, refresh_interval=INDEX_REFRESH_INTERVAL)
+
+# versioned, content-addressed snapshots of the pack for /tool/diff; see snapshots.py
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", str(BASE / "snapshots"))
+snapshots = SnapshotStore(SNAPSHOT_DIR)
+
+# spans per request, tagged with the caller's X-Correlation-ID (TRACE=0 disables); see telemetry.py
+CORRELATION_HEADER = "X-Correlation-ID"
+SERVER_TRACE_FILE = os.environ.get("SERVER_TRACE_FILE", str(BASE / ".trace.jsonl"))
+trace_log = telemetry.TraceLog(SERVER_TRACE_FILE if os.environ.get("TRACE", "1") == "1" else None)
+REQUEST_SECONDS = telemetry.Histogram("tool_request_duration_seconds", "Tool request latency", ("tool", "status"))
+COMMAND_SECONDS = telemetry.Histogram("tool_command_duration_seconds", "Per-command show lookup latency", ("command",))
+REQUESTS = telemetry.Counter("tool_requests_total", "Tool requests", ("tool", "status"))
+RESPONSE_BYTES = telemetry.Counter("tool_response_bytes_total", "Response body bytes", ("tool",))
+
+# lines per NDJSON frame when /tool/run_show is called with "stream"
+STREAM_CHUNK_LINES = int(os.environ.get("STREAM_CHUNK_LINES", "200"))
+
 ALLOWED_COMMANDS = {
     "cisco_ios": [
         "show ip interface brief",
@@ -29,62 +88,442 @@ ALLOWED_COMMANDS = {
         "show ip cef",
         "show tacacs",
         "show startup-config",
-        "show running-config | include interface",
-        "show license",
-        "show version | include uptime"
+        "show license"
     ]
 }
 
-def _list_devices():
-    if not MOCK_DIR.exists():
+# any allowed command may be followed by IOS pipe modifiers, evaluated server-side
+# e.g. "show running-config | include interface", "show version | include uptime"
+
+def _inventory_etag(body):
+    """ETag of an inventory answer: the inventory's version plus the request body."""
+    digest = hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f'"{inventory.etag()}-{digest}"'
+
+def _not_modified(if_none_match, etag):
+    tags = [t.strip() for t in (if_none_match or "").split(",")]
+    return etag in tags or "W/" + etag in tags or "*" in tags
+
+def _inventory_answer(body, if_none_match):
+    """(etag, payload, http_status) of an inventory request; payload is None for a 304."""
+    etag = _inventory_etag(body)
+    if _not_modified(if_none_match, etag):
+        return etag, None, 304
+    payload, status = _inventory_payload(body)
+    return etag, payload, status
+
+def _str_list(body, key):
+    value = body.get(key)
+    if value is None:
         return []
-    return [p.name for p in MOCK_DIR.iterdir() if p.is_dir()]
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise InventoryError(f"{key} must be a string or a list of strings")
+    return value
+
+def _inventory_payload(body):
+    """
+    Answer an inventory request; returns (payload, http_status). One device by "name", the
+    existing ones of "names" (both case-insensitive), or a page of the devices matching "prefix", "glob" and the
+    INVENTORY_FILTERS, continued with "cursor" (the previous page's next_cursor).
+    """
+    try:
+        fields = _str_list(body, "fields")
+        unknown = sorted(set(fields) - set(INVENTORY_FIELDS))
+        if unknown:
+            raise InventoryError(f"unknown fields: {', '.join(unknown)} (known: {', '.join(INVENTORY_FIELDS)})")
+        name = body.get("name")
+        if name is not None and not isinstance(name, str):
+            raise InventoryError("name must be a string")
+        if name:
+            record = inventory.get(name)
+            if record is None:
+                return {"ok": False, "error": "device not found"}, 404
+            return {"ok": True, "result": [inventory.project(record, fields)]}, 200
+        if body.get("names") is not None:
+            return {"ok": True, "result": inventory.find(_str_list(body, "names"), fields)}, 200
+        try:
+            limit = int(body.get("limit", INVENTORY_PAGE_SIZE))
+        except (TypeError, ValueError):
+            raise InventoryError("limit must be an integer")
+        if not 1 <= limit <= INVENTORY_MAX_LIMIT:
+            raise InventoryError(f"limit must be between 1 and {INVENTORY_MAX_LIMIT}")
+        for key in ("prefix", "glob", "cursor"):
+            if body.get(key) is not None and not isinstance(body[key], str):
+                raise InventoryError(f"{key} must be a string")
+        filters = {key: _str_list(body, key) for key in INVENTORY_FILTERS}
+    except InventoryError as e:
+        return {"ok": False, "error": str(e)}, 400
+    page = inventory.list(prefix=body.get("prefix"), glob=body.get("glob"), filters=filters, fields=fields,
+                          cursor=body.get("cursor"), limit=limit)
+    return {"ok": True, "result": page["devices"], "next_cursor": page["next_cursor"]}, 200
 
 @app.route("/tool/inventory", methods=["POST"])
 def inventory_tool():
     body = request.json or {}
-    name = body.get("name")
-    devices = _list_devices()
-    if name:
-        if name in devices:
-            return jsonify({"ok": True, "result": [{"name": name, "vendor": "cisco_ios"}]})
-        return jsonify({"ok": False, "error": "device not found"}), 404
+    etag, payload, status = _inventory_answer(body, request.headers.get("If-None-Match"))
+    if status == 304:
+        return Response(status=304, headers={"ETag": etag})
+    response = jsonify(payload)
+    if status == 200:
+        response.headers["ETag"] = etag
+    return response, status
 
-    return jsonify({"ok": True, "result": [{"name": d, "vendor": "cisco_ios"} for d in devices]})
+@app.route("/tool/commands", methods=["POST"])
+def commands_tool():
+    return jsonify({"ok": True, "result": {"commands": ALLOWED_COMMANDS, "pipe_modifiers": list(MODIFIERS),
+                                           "structured": sorted(PARSERS), "query_fields": FIELDS}})
 
 def _cmd_to_file(cmd):
-    return cmd.replace(" ", "_").replace("|","_pipe_").replace("/", "_").lower() + ".txt"
+    base = parse_command(cmd)[0]
+    return base.replace(" ", "_").replace("|","_pipe_").replace("/", "_").lower() + ".txt"
+
+fleet_index = FleetIndex(store, parse_cache, _cmd_to_file, refresh_interval=INDEX_REFRESH_INTERVAL)
+
+def _check_show(device, command):
+    """Validate a run_show request; returns (fname, filters, None, None) or (None, None, error_payload, status)."""
+    if not device or not command:
+        return None, None, {"ok": False, "error": "device and command required"}, 400
+    if not isinstance(device, str) or not isinstance(command, str):
+        return None, None, {"ok": False, "error": "device and command must be strings"}, 400
+
+    try:
+        base, filters = parse_command(command)
+        for _, pattern in filters:
+            compile_pattern(pattern)
+    except FilterError as e:
+        return None, None, {"ok": False, "error": str(e)}, 400
+
+    if base not in ALLOWED_COMMANDS["cisco_ios"]:
+        return None, None, {"ok": False, "error": "command not allowed"}, 403
+
+    if not store.has_device(device):
+        return None, None, {"ok": False, "error": "device not found"}, 404
+
+    return _cmd_to_file(base), filters, None, None
+
+def _run_show_structured(device, command, fname, filters):
+    base = parse_command(command)[0]
+    if base not in PARSERS:
+        return {"ok": False, "error": f"no structured parser for: {base}",
+                "structured": sorted(PARSERS)}, 400
+    if filters:
+        return {"ok": False, "error": "pipe modifiers cannot be combined with format=structured"}, 400
+    version = store.version(device, fname)
+    parsed = None
+    if version is not None:
+        parsed = parse_cache.get(device, base, version, lambda: store.get(device, fname))
+    if parsed is None:
+        return {"ok": False, "error": f"mock file not found: {fname}"}, 404
+    return {"ok": True, "device": device, "command": command, "format": "structured", "parsed": parsed}, 200
+
+def _run_show_one(device, command, fmt=None):
+    """Look up one (device, command) pair; returns (payload, http_status)."""
+    t0 = time.perf_counter()
+    payload, status = _run_show_lookup(device, command, fmt)
+    if status not in (400, 403):
+        # rejected commands are not observed, so label values stay within ALLOWED_COMMANDS
+        COMMAND_SECONDS.observe(time.perf_counter() - t0, parse_command(command.strip())[0])
+    return payload, status
+
+def _strip_command(command):
+    return command.strip() if isinstance(command, str) else command
+
+def _run_show_lookup(device, command, fmt):
+    command = _strip_command(command)
+    fname, filters, err, status = _check_show(device, command)
+    if err:
+        return err, status
+    if fmt == "structured":
+        return _run_show_structured(device, command, fname, filters)
+    if fmt not in (None, "text"):
+        return {"ok": False, "error": f"unknown format: {fmt}"}, 400
+
+    return _text_payload(device, command, fname, filters, store.get(device, fname))
+
+def _text_payload(device, command, fname, filters, output):
+    """Response for a text lookup of output (None when the mock file is missing)."""
+    if output is None:
+        return {"ok": False, "error": f"mock file not found: {fname}"}, 404
+
+    payload = {"ok": True, "device": device, "command": command}
+    if filters:
+        filtered = "\n".join(apply_filters(output.splitlines(), filters))
+        payload.update({"output": filtered,
+                        "bytes_total": len(output.encode()),
+                        "bytes_returned": len(filtered.encode())})
+    else:
+        payload["output"] = output
+    return payload, 200
+
+def _output_lines(device, fname):
+    """Iterate output lines (no line endings) from the cache, else straight from the file."""
+    cached = store.cached(device, fname)
+    if cached is not None:
+        yield from cached.splitlines()
+        return
+    with open(store.path(device, fname)) as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+def _ndjson_frames(device, command, fname, filters):
+    """
+    Yield a header frame, then chunks of output lines, then a trailer with totals. Byte counts
+    are of the lines joined by newlines, as in the non-streamed "output".
+    """
+    yield json.dumps({"ok": True, "device": device, "command": command}) + "\n"
+    stats = {"lines": 0, "bytes": 0}
+
+    def _counted(lines):
+        for line in lines:
+            stats["lines"] += 1
+            stats["bytes"] += len(line.encode())
+            yield line
+
+    total_lines = total_bytes = 0
+    chunk = []
+    for line in apply_filters(_counted(_output_lines(device, fname)), filters):
+        chunk.append(line)
+        total_lines += 1
+        total_bytes += len(line.encode())
+        if len(chunk) >= STREAM_CHUNK_LINES:
+            yield json.dumps({"lines": chunk}) + "\n"
+            chunk = []
+    if chunk:
+        yield json.dumps({"lines": chunk}) + "\n"
+    # one newline between consecutive lines
+    total_bytes += max(0, total_lines - 1)
+    bytes_total = stats["bytes"] + max(0, stats["lines"] - 1)
+    trailer = {"done": True, "lines": total_lines, "bytes": total_bytes, "bytes_total": bytes_total}
+    if filters:
+        trailer["bytes_returned"] = total_bytes
+    yield json.dumps(trailer) + "\n"
+
+def _text_frames(device, fname, filters):
+    for line in apply_filters(_output_lines(device, fname), filters):
+        yield line + "\n"
+
+def _stream_show(device, command, mode):
+    fname, filters, err, status = _check_show(device, command)
+    if err:
+        return jsonify(err), status
+    if not store.exists(device, fname):
+        return jsonify({"ok": False, "error": f"mock file not found: {fname}"}), 404
+    if mode == "text":
+        if not filters:
+            fpath = store.path(device, fname)
+            if fpath is None:
+                # packed store: stream slices of the mapped file
+                return Response(store.iter_bytes(device, fname), mimetype="text/plain")
+            # unfiltered output: hand the file to the WSGI server (sendfile via wsgi.file_wrapper)
+            return send_file(fpath, mimetype="text/plain", max_age=0)
+        return Response(_text_frames(device, fname, filters), mimetype="text/plain")
+    return Response(_ndjson_frames(device, command, fname, filters), mimetype="application/x-ndjson")
 
 @app.route("/tool/run_show", methods=["POST"])
 def run_show():
     body = request.json or {}
+    stream = body.get("stream")
+    fmt = body.get("format")
+    if fmt not in (None, "text", "structured"):
+        return jsonify({"ok": False, "error": f"unknown format: {fmt}"}), 400
+    if stream and fmt != "structured":
+        command = _strip_command(body.get("command"))
+        return _stream_show(body.get("device"), command, "text" if stream == "text" else "ndjson")
+    payload, status = _run_show_one(body.get("device"), body.get("command", ""), fmt)
+    return jsonify(payload), status
+
+def _expand_devices(spec):
+    """Resolve a device list and/or glob (e.g. "spine*") against the inventory; None unless strings."""
+    patterns = [spec] if isinstance(spec, str) else spec or []
+    if not isinstance(patterns, list) or not all(isinstance(p, str) for p in patterns):
+        return None
+    known = store.devices()
+    out = []
+    seen = set()
+    for pat in patterns:
+        if any(ch in pat for ch in "*?["):
+            matches = [d for d in known if fnmatchcase(d, pat)]
+        else:
+            # explicit names are kept even if unknown so they get a per-item error
+            matches = [pat]
+        for d in matches:
+            if d not in seen:
+                seen.add(d)
+                out.append(d)
+    return out
+
+@app.route("/tool/run_show_batch", methods=["POST"])
+def run_show_batch():
+    body = request.json or {}
+    devices = _expand_devices(body.get("devices"))
+    commands = body.get("commands") or ([body["command"]] if body.get("command") else [])
+    if isinstance(commands, str):
+        commands = [commands]
+    fmt = body.get("format")
+
+    if devices is None or not isinstance(commands, list) or not all(isinstance(c, str) for c in commands):
+        return jsonify({"ok": False, "error": "devices and commands must be strings or lists of strings"}), 400
+    if not devices or not commands:
+        return jsonify({"ok": False, "error": "devices and commands required"}), 400
+
+    pairs = [(d, c) for d in devices for c in commands]
+    if len(pairs) > BATCH_MAX_ITEMS:
+        return jsonify({"ok": False, "error": f"batch too large: {len(pairs)} items (max {BATCH_MAX_ITEMS})"}), 413
+
+    def _one(pair):
+        payload, status = _run_show_one(*pair, fmt)
+        if not payload["ok"]:
+            payload.update({"device": pair[0], "command": pair[1], "status": status})
+        return payload
+
+    results = list(_batch_pool.map(_one, pairs))
+    errors = sum(1 for r in results if not r["ok"])
+    return jsonify({"ok": True, "count": len(results), "errors": errors, "results": results})
+
+@app.route("/tool/query", methods=["POST"])
+def query_tool():
+    body = request.json or {}
+    field, value = body.get("field"), body.get("value")
+    if not isinstance(field, str) or field not in FIELDS or value in (None, ""):
+        return jsonify({"ok": False, "error": "field and value required", "fields": FIELDS}), 400
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        return jsonify({"ok": False, "error": "value must be a string or an integer"}), 400
+    try:
+        limit = min(int(body.get("limit", 100)), QUERY_MAX_LIMIT)
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"ok": False, "error": "limit must be at least 1"}), 400
+    return jsonify({"ok": True, "result": fleet_index.query(field, value, limit)})
+
+@app.route("/tool/snapshot", methods=["POST"])
+def snapshot_tool():
+    body = request.json or {}
+    return jsonify({"ok": True, "result": snapshots.take(store, label=body.get("label"))})
+
+@app.route("/tool/snapshots", methods=["GET"])
+def snapshots_tool():
+    return jsonify({"ok": True, "result": snapshots.list()})
+
+@app.route("/tool/diff", methods=["POST"])
+def diff_tool():
+    """Diff two snapshots, or a snapshot against the live pack ("to": "current", the default)."""
+    body = request.json or {}
+    command = _strip_command(body.get("command") or "")
     device = body.get("device")
-    command = body.get("command", "").strip()
+    if not isinstance(command, str) or not (device is None or isinstance(device, str)):
+        return jsonify({"ok": False, "error": "device and command must be strings"}), 400
+    if command and command not in ALLOWED_COMMANDS["cisco_ios"]:
+        return jsonify({"ok": False, "error": "command not allowed"}), 400
+    if not all(body.get(key) is None or isinstance(body[key], str) for key in ("from", "to")):
+        return jsonify({"ok": False, "error": "from/to must be snapshot id strings"}), 400
+    try:
+        context = int(body.get("context", 3))
+        limit = min(int(body.get("limit", 100)), BATCH_MAX_ITEMS)
+        old_id = snapshots.resolve(body.get("from", "latest"))
+        old = snapshots.load(old_id)["entries"]
+        to = body.get("to", "current")
+        if to == "current":
+            new_id, (new, _) = "current", snapshots.live_entries(store)
+        else:
+            new_id = snapshots.resolve(to)
+            new = snapshots.load(new_id)["entries"]
+    except (TypeError, ValueError) as e:
+        # SnapshotError is a ValueError
+        return jsonify({"ok": False, "error": str(e)}), 404 if isinstance(e, SnapshotError) else 400
+    result = snapshots.diff(old, new, device=device, fname=_cmd_to_file(command) if command else None,
+                            context=context, limit=limit, live_store=store if new_id == "current" else None)
+    result.update({"from": old_id, "to": new_id})
+    return jsonify({"ok": True, "result": result})
 
-    if not device or not command:
-        return jsonify({"ok": False, "error": "device and command required"}), 400
+def _cache_stats():
+    return dict(store.stats(), parse_cache=parse_cache.stats(), fleet_index=fleet_index.stats(),
+                inventory=inventory.stats(), snapshots=snapshots.stats())
 
-    if command not in ALLOWED_COMMANDS["cisco_ios"]:
-        return jsonify({"ok": False, "error": "command not allowed"}), 403
+@app.route("/tool/cache_stats", methods=["GET"])
+def cache_stats():
+    return jsonify({"ok": True, "result": _cache_stats()})
 
-    ddir = MOCK_DIR / device
-    if not ddir.exists():
-        return jsonify({"ok": False, "error": "device not found"}), 404
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    gauges = {}
+    for prefix, stats in (("mock_store", store.stats()), ("parse_cache", parse_cache.stats())):
+        for key, value in stats.items():
+            if isinstance(value, (int, float)):
+                gauges[f"{prefix}_{key}"] = (f"{prefix} {key}", value)
+    body = telemetry.render([REQUEST_SECONDS, COMMAND_SECONDS, REQUESTS, RESPONSE_BYTES], gauges)
+    return Response(body, mimetype="text/plain; version=0.0.4")
 
-    fname = _cmd_to_file(command)
-    fpath = ddir / fname
+@app.before_request
+def _start_span():
+    g.trace_id = request.headers.get(CORRELATION_HEADER) or telemetry.new_trace_id()
+    g.t0 = time.perf_counter()
 
-    if not fpath.exists():
-        return jsonify({"ok": False, "error": f"mock file not found: {fname}"}), 404
+@app.after_request
+def _finish_span(response):
+    response.headers[CORRELATION_HEADER] = g.trace_id
+    if request.path == "/metrics":
+        return response
+    tool = request.path.rsplit("/", 1)[-1] if request.url_rule else "unknown"
+    body = request.get_json(silent=True) if request.is_json else None
+    record = telemetry.new_span(g.trace_id, f"tool.{tool}")
+    record.update({"method": request.method, "status": response.status_code,
+                   "bytes_in": request.content_length or 0})
+    if isinstance(body, dict):
+        record.update({k: body[k] for k in ("device", "command", "field") if isinstance(body.get(k), str)})
+
+    t0 = g.t0
+    sent = {"bytes": None}
+
+    def _record():
+        # runs after the request context is gone for streamed bodies, so only closure state here
+        elapsed = time.perf_counter() - t0
+        size = sent["bytes"] if sent["bytes"] is not None else response.content_length
+        record.update({"duration_ms": round(elapsed * 1000, 3), "bytes_out": size})
+        trace_log.write(record)
+        REQUEST_SECONDS.observe(elapsed, tool, str(response.status_code))
+        REQUESTS.inc(tool, str(response.status_code))
+        if size:
+            RESPONSE_BYTES.inc(tool, amount=size)
 
-    output = fpath.read_text()
+    if not response.is_streamed or response.direct_passthrough:
+        # passthrough files (send_file) go to the WSGI server as-is and never call close hooks
+        _record()
+        return response
+    if response.content_length is None:
+        # generator bodies (NDJSON / filtered text): count bytes as they are sent
+        def _counted(chunks):
+            sent["bytes"] = 0
+            for chunk in chunks:
+                sent["bytes"] += len(chunk)
+                yield chunk
+        response.response = _counted(response.iter_encoded())
+    # streamed bodies are timed until the server closes the response
+    response.call_on_close(_record)
+    return response
 
-    return jsonify({
-        "ok": True,
-        "device": device,
-        "command": command,
-        "output": output
-    })
+def create_app(preload=None, watch=True):
+    """
+    App factory for WSGI servers (see serve.py, or gunicorn "tool_server:create_app()"):
+    warms the mock store and starts its watcher. With a pre-forking server call it in the
+    master so workers share the preloaded pages copy-on-write.
+    """
+    if preload is None:
+        preload = os.environ.get("MOCK_PRELOAD", "1") == "1"
+    if preload:
+        store.preload()
+        fleet_index.refresh()
+        inventory.refresh()
+    if watch:
+        store.start_watcher()
+        fleet_index.start_refresher()
+        inventory.start_refresher()
+    return app
 
 if __name__ == "__main__":
+    create_app()
+    # HTTP/1.1 so pooled clients can keep connections alive
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
     app.run(host="localhost", port=8000)
\ No newline at end of file
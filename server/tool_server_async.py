@@ -0,0 +1,250 @@
+# server/tool_server_async.py
+"""
+Asyncio (ASGI) front for the tool server, selected with `serve.py --server asyncio`.
+
+/tool/inventory, /tool/commands, /tool/run_show (text, structured and streamed) and
+/tool/cache_stats are served on the event loop with the same request/response contract as
+tool_server.py. Store reads, parsing and filtering run on a bounded thread pool, and
+concurrent lookups of the same (device, command) share one read (ReadCoalescer). Every
+other route (batch, query, snapshots, diff, /metrics) is handed to the Flask app on a worker
+thread, so state, metrics and trace spans stay those of tool_server.py.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+import telemetry
+import tool_server
+from pipe_filters import parse_command
+from tool_server import (CORRELATION_HEADER, COMMAND_SECONDS, REQUEST_SECONDS, REQUESTS, RESPONSE_BYTES,
+                         store)
+
+# threads for store reads, parsing and filtering (the event loop itself never touches disk)
+ASYNC_READ_WORKERS = int(os.environ.get("ASYNC_READ_WORKERS", "16"))
+
+
+class ReadCoalescer:
+    """
+    Runs blocking lookups on a thread pool, at most one per key at a time: callers that ask
+    for a key already being read await that read instead of starting another. Only used from
+    the event loop thread, so the in-flight map needs no lock.
+    """
+
+    def __init__(self, workers):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="async-read")
+        self._inflight = {}  # key -> asyncio.Future
+        self.counters = {"reads": 0, "coalesced": 0, "cached": 0}
+
+    async def run(self, key, fn, *args):
+        fut = self._inflight.get(key)
+        if fut is None:
+            self.counters["reads"] += 1
+            fut = asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.counters["coalesced"] += 1
+        # a cancelled caller (client went away) must not cancel the read others are waiting on
+        return await asyncio.shield(fut)
+
+    async def get(self, device, fname):
+        """store.get() without blocking the loop; cached outputs are returned directly."""
+        text = store.cached(device, fname)
+        if text is not None:
+            self.counters["cached"] += 1
+            return text
+        return await self.run(("text", device, fname), store.get, device, fname)
+
+    async def offload(self, fn, *args):
+        """Run fn on the read pool without coalescing."""
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def stats(self):
+        return dict(self.counters, in_flight=len(self._inflight))
+
+
+reads = ReadCoalescer(ASYNC_READ_WORKERS)
+
+
+async def _json_body(request):
+    raw = await request.body()
+    if not raw:
+        return {}
+    body = json.loads(raw)
+    return body if isinstance(body, dict) else {}
+
+
+def _traced(tool):
+    """Wrap an endpoint(body, request) with the X-Correlation-ID echo, a trace span and request metrics."""
+
+    def wrap(endpoint):
+        async def handler(request):
+            trace_id = request.headers.get(CORRELATION_HEADER) or telemetry.new_trace_id()
+            t0 = time.perf_counter()
+            try:
+                body = await _json_body(request) if request.method == "POST" else {}
+            except ValueError:
+                body, response = {}, JSONResponse({"ok": False, "error": "invalid JSON body"}, 400)
+            else:
+                response = await endpoint(body, request)
+            response.headers[CORRELATION_HEADER] = trace_id
+            status = response.status_code
+            record = telemetry.new_span(trace_id, f"tool.{tool}")
+            record.update({"method": request.method, "status": status,
+                           "bytes_in": int(request.headers.get("content-length") or 0)})
+            record.update({k: body[k] for k in ("device", "command", "field") if isinstance(body.get(k), str)})
+
+            def _record(size):
+                elapsed = time.perf_counter() - t0
+                record.update({"duration_ms": round(elapsed * 1000, 3), "bytes_out": size})
+                tool_server.trace_log.write(record)
+                REQUEST_SECONDS.observe(elapsed, tool, str(status))
+                REQUESTS.inc(tool, str(status))
+                if size:
+                    RESPONSE_BYTES.inc(tool, amount=size)
+
+            if isinstance(response, StreamingResponse):
+                # timed until the last chunk is sent, as the Flask app does with call_on_close
+                chunks = response.body_iterator
+
+                async def _counted():
+                    sent = 0
+                    try:
+                        async for chunk in chunks:
+                            sent += len(chunk)
+                            yield chunk
+                    finally:
+                        _record(sent)
+                response.body_iterator = _counted()
+            elif isinstance(response, FileResponse):
+                _record(int(response.headers.get("content-length") or 0) or None)
+            else:
+                _record(len(response.body))
+            return response
+        return handler
+    return wrap
+
+
+@_traced("inventory")
+async def inventory_tool(body, request):
+    # the first call may build the index and hashing the body is CPU work; later pages are
+    # bisects, but a big page is still work, so all of it stays off the loop
+    etag, payload, status = await reads.offload(tool_server._inventory_answer, body,
+                                                request.headers.get("if-none-match"))
+    if status == 304:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(payload, status, headers={"ETag": etag} if status == 200 else None)
+
+
+@_traced("commands")
+async def commands_tool(body, request):
+    with tool_server.app.app_context():
+        payload = tool_server.commands_tool().get_json()
+    return JSONResponse(payload)
+
+
+async def _run_show_one(device, command, fmt):
+    """Async counterpart of tool_server._run_show_one; returns (payload, http_status)."""
+    t0 = time.perf_counter()
+    payload, status = await _run_show_lookup(device, command, fmt)
+    if status not in (400, 403):
+        COMMAND_SECONDS.observe(time.perf_counter() - t0, parse_command(command.strip())[0])
+    return payload, status
+
+
+async def _run_show_lookup(device, command, fmt):
+    command = tool_server._strip_command(command)
+    fname, filters, err, status = tool_server._check_show(device, command)
+    if err:
+        return err, status
+    if fmt == "structured":
+        return await reads.run(("structured", device, command), tool_server._run_show_structured,
+                               device, command, fname, filters)
+    if fmt not in (None, "text"):
+        return {"ok": False, "error": f"unknown format: {fmt}"}, 400
+    output = await reads.get(device, fname)
+    if filters and output is not None:
+        # filtering a large output is CPU work; keep it off the loop too
+        return await reads.offload(tool_server._text_payload, device, command, fname, filters, output)
+    return tool_server._text_payload(device, command, fname, filters, output)
+
+
+async def _stream_show(device, command, mode):
+    fname, filters, err, status = tool_server._check_show(device, command)
+    if err:
+        return JSONResponse(err, status)
+    if not await reads.offload(store.exists, device, fname):
+        return JSONResponse({"ok": False, "error": f"mock file not found: {fname}"}, 404)
+    # sync iterators are drained on Starlette's thread pool, so file reads stay off the loop
+    if mode == "text":
+        if not filters:
+            fpath = store.path(device, fname)
+            if fpath is None:
+                return StreamingResponse(store.iter_bytes(device, fname), media_type="text/plain")
+            return FileResponse(fpath, media_type="text/plain", stat_result=await reads.offload(os.stat, fpath))
+        return StreamingResponse(tool_server._text_frames(device, fname, filters), media_type="text/plain")
+    return StreamingResponse(tool_server._ndjson_frames(device, command, fname, filters),
+                             media_type="application/x-ndjson")
+
+
+@_traced("run_show")
+async def run_show(body, request):
+    stream = body.get("stream")
+    fmt = body.get("format")
+    if fmt not in (None, "text", "structured"):
+        return JSONResponse({"ok": False, "error": f"unknown format: {fmt}"}, 400)
+    if stream and fmt != "structured":
+        command = tool_server._strip_command(body.get("command"))
+        return await _stream_show(body.get("device"), command, "text" if stream == "text" else "ndjson")
+    payload, status = await _run_show_one(body.get("device"), body.get("command", ""), fmt)
+    return JSONResponse(payload, status)
+
+
+@_traced("cache_stats")
+async def cache_stats(body, request):
+    return JSONResponse({"ok": True, "result": dict(tool_server._cache_stats(), async_reads=reads.stats())})
+
+
+def _call_flask(method, path, query, headers, data):
+    environ = EnvironBuilder(path=path, method=method, query_string=query, headers=headers, data=data).get_environ()
+    app_iter, status, response_headers = run_wsgi_app(tool_server.app, environ, buffered=True)
+    try:
+        body = b"".join(app_iter)
+    finally:
+        getattr(app_iter, "close", lambda: None)()
+    return int(status.split(" ", 1)[0]), response_headers, body
+
+
+async def flask_fallback(request):
+    """Any other route: run the Flask app for this request on a worker thread."""
+    headers = [(k, v) for k, v in request.headers.items() if k not in ("content-length", "host")]
+    status, response_headers, body = await run_in_threadpool(
+        _call_flask, request.method, request.url.path, request.url.query, headers, await request.body())
+    response = Response(body, status)
+    for key, value in response_headers.items():
+        if key.lower() != "content-length":
+            response.headers[key] = value
+    return response
+
+
+def create_async_app(preload=None, watch=True):
+    """
+    ASGI app factory (uvicorn "tool_server_async:create_async_app" --factory): warms the
+    shared store exactly like tool_server.create_app().
+    """
+    tool_server.create_app(preload=preload, watch=watch)
+    return Starlette(routes=[
+        Route("/tool/inventory", inventory_tool, methods=["POST"]),
+        Route("/tool/commands", commands_tool, methods=["POST"]),
+        Route("/tool/run_show", run_show, methods=["POST"]),
+        Route("/tool/cache_stats", cache_stats, methods=["GET"]),
+        Route("/{path:path}", flask_fallback, methods=["GET", "POST"]),
+    ])
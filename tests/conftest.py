@@ -0,0 +1,28 @@
+# tests/conftest.py
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# the server and agent modules import their siblings flat, as when run from their directories
+ROOT = Path(__file__).resolve().parents[1]
+for sub in ("server", "agent"):
+    sys.path.insert(0, str(ROOT / sub))
+# importing tool_server must not append to the repo's trace log
+os.environ.setdefault("TRACE", "0")
+
+
+@pytest.fixture
+def make_fleet(tmp_path):
+    """make_fleet({device: {fname: text, "device.json": {...}}}) writes a mock directory; returns its root."""
+    def _make(devices, root=None):
+        root = Path(root or tmp_path / "mocks")
+        for device, files in devices.items():
+            ddir = root / device
+            ddir.mkdir(parents=True, exist_ok=True)
+            for fname, content in files.items():
+                (ddir / fname).write_text(content if isinstance(content, str) else json.dumps(content))
+        return root
+    return _make
@@ -0,0 +1,17 @@
+# tests/test_intent_router.py
+from intent_router import IntentRouter
+
+COMMANDS = ["show version", "show ip bgp summary"]
+
+
+def test_fleet_phrase_uses_inventory_roles():
+    router = IntentRouter(COMMANDS, ["leaf1", "leaf2", "spine1", "edge9"], {"edge9": "leaf", "leaf2": "border"})
+    decision = router.route("show version on all leaves")["decision"]
+    assert decision["args"] == {"devices": ["edge9", "leaf1"], "command": "show version"}
+    assert router.route("show version on every border")["decision"]["args"]["device"] == "leaf2"
+
+
+def test_fleet_phrase_defaults_to_name_prefix_roles():
+    router = IntentRouter(COMMANDS, ["leaf1", "leaf2", "spine1"])
+    assert router.route("show ip bgp summary on all leafs")["decision"]["args"]["devices"] == ["leaf1", "leaf2"]
+    assert router.route("show version on all devices")["decision"]["args"]["devices"] == "*"
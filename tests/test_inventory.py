@@ -0,0 +1,127 @@
+# tests/test_inventory.py
+import os
+
+import pytest
+
+import tool_server
+from inventory import Inventory
+from mock_store import MockStore
+
+FLEET = {
+    "leaf1": {"device.json": {"role": "leaf", "site": "dc1", "tags": ["fabric", "border"]}},
+    "leaf2": {"device.json": {"role": "leaf", "site": "dc2", "tags": ["fabric"]}},
+    "leaf3": {},
+    "spine1": {"device.json": {"role": "spine", "site": "dc1", "vendor": "arista_eos", "tags": ["fabric"]}},
+    "spine2": {"device.json": {"role": "spine", "site": "dc2", "tags": ["fabric"]}},
+    "edge1": {"device.json": {"role": "leaf", "site": "dc1"}},
+}
+
+
+@pytest.fixture
+def inv(make_fleet):
+    return Inventory(MockStore(make_fleet(FLEET), poll_interval=0))
+
+
+@pytest.fixture
+def post(inv, monkeypatch):
+    monkeypatch.setattr(tool_server, "inventory", inv)
+    client = tool_server.app.test_client()
+
+    def _post(body, **headers):
+        return client.post("/tool/inventory", json=body, headers=headers)
+    return _post
+
+
+def names(res):
+    return [d["name"] for d in res.get_json()["result"]]
+
+
+def test_name_lookup(post):
+    res = post({"name": "SPINE1"})
+    assert res.status_code == 200
+    assert res.get_json()["result"] == [{"name": "spine1", "role": "spine", "site": "dc1",
+                                         "vendor": "arista_eos", "tags": ["fabric"]}]
+    assert post({"name": "leaf9"}).status_code == 404
+
+
+def test_names_keep_question_order_and_skip_unknown(post):
+    assert names(post({"names": ["spine2", "nope", "LEAF1", "spine2"]})) == ["spine2", "leaf1"]
+
+
+def test_defaults_without_device_json(post):
+    res = post({"name": "leaf3"}).get_json()["result"][0]
+    assert res == {"name": "leaf3", "role": "leaf", "site": None, "vendor": "cisco_ios", "tags": []}
+
+
+@pytest.mark.parametrize("body, expected", [
+    ({}, ["edge1", "leaf1", "leaf2", "leaf3", "spine1", "spine2"]),
+    ({"prefix": "leaf"}, ["leaf1", "leaf2", "leaf3"]),
+    ({"glob": "*1"}, ["edge1", "leaf1", "spine1"]),
+    ({"glob": "spine[2-9]"}, ["spine2"]),
+    ({"role": "leaf"}, ["edge1", "leaf1", "leaf2", "leaf3"]),
+    ({"role": ["spine", "LEAF"], "site": "dc2"}, ["leaf2", "spine2"]),
+    ({"vendor": "arista_eos"}, ["spine1"]),
+    ({"tags": ["fabric", "border"]}, ["leaf1"]),
+    ({"prefix": "leaf", "site": "dc1"}, ["leaf1"]),
+])
+def test_listing_filters(post, body, expected):
+    assert names(post(body)) == expected
+
+
+def test_fields_are_projected(post):
+    assert post({"prefix": "spine", "fields": ["site"]}).get_json()["result"] == [
+        {"name": "spine1", "site": "dc1"}, {"name": "spine2", "site": "dc2"}]
+
+
+def test_cursor_pages_until_exhausted(post):
+    seen, cursor, pages = [], None, 0
+    while True:
+        body = {"limit": 2, "fields": ["name"]}
+        if cursor:
+            body["cursor"] = cursor
+        data = post(body).get_json()
+        seen.extend(d["name"] for d in data["result"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ["edge1", "leaf1", "leaf2", "leaf3", "spine1", "spine2"]
+    assert pages == 3
+
+
+@pytest.mark.parametrize("body", [
+    {"fields": ["serial"]},
+    {"limit": 0},
+    {"limit": "ten"},
+    {"name": ["leaf1"]},
+    {"name": 5},
+    {"prefix": 3},
+    {"cursor": ["leaf1"]},
+    {"role": [1]},
+])
+def test_invalid_requests(post, body):
+    res = post(body)
+    assert res.status_code == 400
+    assert res.get_json()["ok"] is False
+
+
+def test_if_none_match_round_trip(post):
+    first = post({"role": "spine"})
+    etag = first.headers["ETag"]
+    again = post({"role": "spine"}, **{"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    # another body is another answer
+    assert post({"role": "leaf"}, **{"If-None-Match": etag}).status_code == 200
+
+
+def test_refresh_picks_up_changed_metadata(inv, post, make_fleet):
+    etag = post({"role": "spine"}).headers["ETag"]
+    meta = make_fleet({"leaf3": {"device.json": {"role": "spine"}}})
+    path = meta / "leaf3" / "device.json"
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert inv.refresh() == 1
+    res = post({"role": "spine"}, **{"If-None-Match": etag})
+    assert res.status_code == 200
+    assert names(res) == ["leaf3", "spine1", "spine2"]
@@ -0,0 +1,16 @@
+# tests/test_json_extract.py
+from json_extract import extract_json
+
+
+def test_unclosed_brace_before_the_decision():
+    text = 'Use a brace { to start. {"tool": "inventory", "args": {}}'
+    assert extract_json(text) == {"tool": "inventory", "args": {}}
+
+
+def test_emoticon_brace_before_the_decision():
+    text = 'Sure :-{ here: {"tool": "run_show", "args": {"device": "leaf1", "command": "show version"}}'
+    assert extract_json(text) == {"tool": "run_show", "args": {"device": "leaf1", "command": "show version"}}
+
+
+def test_no_complete_object():
+    assert extract_json('{"tool": "inventory", "args": {') is None
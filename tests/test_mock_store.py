@@ -0,0 +1,55 @@
+# tests/test_mock_store.py
+import os
+
+from mock_store import MockStore
+
+
+def _bump_mtime(path, seconds=1):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def test_lru_stays_within_the_byte_budget(make_fleet):
+    root = make_fleet({"leaf1": {"a.txt": "a" * 40, "b.txt": "b" * 40, "c.txt": "c" * 40}})
+    store = MockStore(root, max_bytes=100, poll_interval=3600)
+    assert store.get("leaf1", "a.txt") == "a" * 40
+    store.get("leaf1", "b.txt")
+    store.get("leaf1", "a.txt")  # a is now the most recently used
+    store.get("leaf1", "c.txt")
+    stats = store.stats()
+    assert stats["bytes"] <= 100 and stats["evictions"] == 1
+    assert store.cached("leaf1", "a.txt") is not None
+    assert store.cached("leaf1", "b.txt") is None
+    assert store.cached("leaf1", "c.txt") is not None
+
+
+def test_output_larger_than_the_budget_is_served_uncached(make_fleet):
+    root = make_fleet({"leaf1": {"big.txt": "x" * 200}})
+    store = MockStore(root, max_bytes=100, poll_interval=3600)
+    assert store.get("leaf1", "big.txt") == "x" * 200
+    assert store.cached("leaf1", "big.txt") is None
+    assert store.stats()["bytes"] == 0
+
+
+def test_rewritten_file_is_invalidated(make_fleet):
+    root = make_fleet({"leaf1": {"show_version.txt": "old"}})
+    store = MockStore(root, poll_interval=3600)
+    assert store.get("leaf1", "show_version.txt") == "old"
+    path = root / "leaf1" / "show_version.txt"
+    path.write_text("new")
+    _bump_mtime(path)
+    # cached until polled
+    assert store.get("leaf1", "show_version.txt") == "old"
+    assert store.poll() == 1
+    assert store.get("leaf1", "show_version.txt") == "new"
+    assert store.stats()["invalidations"] == 1
+
+
+def test_new_device_is_found_after_a_rescan(make_fleet):
+    root = make_fleet({"leaf1": {"show_version.txt": "v"}})
+    store = MockStore(root, poll_interval=0)
+    assert store.devices() == ["leaf1"]
+    make_fleet({"spine1": {"show_version.txt": "v"}})
+    _bump_mtime(root)
+    assert store.devices() == ["leaf1", "spine1"]
+    assert store.has_device("spine1")
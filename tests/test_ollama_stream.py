@@ -0,0 +1,51 @@
+# tests/test_ollama_stream.py
+import json
+
+import pytest
+
+from ollama_stream import generate_until_decision
+
+
+class _Response:
+    def __init__(self, frames):
+        self.frames = frames
+        self.read = 0
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        for frame in self.frames:
+            self.read += 1
+            yield json.dumps(frame)
+
+    def close(self):
+        self.closed = True
+
+
+class _Client:
+    def __init__(self, text, chunk=4):
+        tokens = [text[i:i + chunk] for i in range(0, len(text), chunk)]
+        frames = [{"response": t, "done": False} for t in tokens]
+        self.response = _Response(frames + [{"response": "", "done": True, "eval_count": len(frames)}])
+
+    def post(self, url, json=None, stream=False):
+        return self.response
+
+
+@pytest.mark.parametrize("preamble", ["Use a brace { to start. ", "Sure :-{ here: "])
+def test_unclosed_brace_still_stops_early(preamble):
+    decision = {"tool": "run_show", "args": {"device": "leaf1", "command": "show version"}}
+    client = _Client(preamble + json.dumps(decision) + " and some more text after the answer")
+    out = generate_until_decision(client, "http://ollama", "m", "prompt")
+    assert out["decision"] == decision
+    assert out["stopped_early"] is True
+    assert client.response.read < len(client.response.frames)
+    assert client.response.closed
+
+
+def test_example_object_is_skipped():
+    decision = {"tool": "inventory", "args": {"name": "spine1"}}
+    client = _Client('For example {"example": true}. Answer: ' + json.dumps(decision))
+    assert generate_until_decision(client, "http://ollama", "m", "prompt")["decision"] == decision
@@ -0,0 +1,81 @@
+# tests/test_parsers.py
+from parsers import (ParseCache, parse_interfaces_status, parse_ip_bgp_summary, parse_ip_interface_brief,
+                     parse_ip_route, parse_version)
+
+BGP = """BGP router identifier 10.0.0.1, local AS number 65001
+BGP table version is 10, main routing table version 10
+
+Neighbor        V           AS MsgRcvd MsgSent   TblVer  InQ OutQ Up/Down  State/PfxRcd
+10.0.0.2        4        65002     100     101       10    0    0 01:00:00       12
+10.0.0.3        4        65003       0       0        1    0    0 never    Idle (Admin)
+10.0.0.4        4        65004       0       0        1    0    0 00:01:00 Active
+"""
+
+
+def test_bgp_summary():
+    parsed = parse_ip_bgp_summary(BGP)
+    assert (parsed["router_id"], parsed["local_as"], parsed["established"]) == ("10.0.0.1", 65001, 1)
+    assert parsed["neighbors"][0] == {"neighbor": "10.0.0.2", "remote_as": 65002, "up_down": "01:00:00",
+                                      "state": "Established", "prefixes_received": 12}
+    assert parsed["neighbors"][2]["state"] == "Active"
+
+
+def test_bgp_two_word_state_keeps_its_columns():
+    admin = parse_ip_bgp_summary(BGP)["neighbors"][1]
+    assert admin == {"neighbor": "10.0.0.3", "remote_as": 65003, "up_down": "never",
+                     "state": "Idle (Admin)", "prefixes_received": None}
+
+
+def test_ip_interface_brief_with_and_without_ok_method():
+    ios = parse_ip_interface_brief(
+        "Interface              IP-Address      OK? Method Status                Protocol\n"
+        "GigabitEthernet0/0     10.0.0.1        YES NVRAM  up                    up\n"
+        "GigabitEthernet0/1     unassigned      YES unset  administratively down down\n")
+    assert (ios["up"], ios["down"]) == (1, 1)
+    assert ios["interfaces"][1]["status"] == "administratively down"
+    assert ios["interfaces"][1]["method"] == "unset"
+    mock = parse_ip_interface_brief("Interface  IP-Address  Status  Protocol\nEth1/1 10.1.1.1 up up\n")
+    assert mock["interfaces"] == [{"interface": "Eth1/1", "ip_address": "10.1.1.1", "protocol": "up",
+                                   "status": "up", "up": True}]
+
+
+def test_version():
+    parsed = parse_version("Cisco IOS XE Software, Version 17.8.5\n"
+                           "spine1 uptime is 1 year, 2 weeks, 3 days, 4 hours, 5 minutes\n")
+    assert parsed == {"software": "Cisco IOS XE Software", "version": "17.8.5", "hostname": "spine1",
+                      "uptime": "1 year, 2 weeks, 3 days, 4 hours, 5 minutes", "uptime_days": 382}
+
+
+def test_interfaces_status_with_blank_and_spaced_names():
+    parsed = parse_interfaces_status(
+        "Port      Name               Status       Vlan       Duplex  Speed Type\n"
+        "Gi1/0/1   uplink to core     connected    trunk      a-full  a-1000 10/100/1000BaseTX\n"
+        "Gi1/0/2                      notconnect   1          auto    auto 10/100/1000BaseTX\n")
+    assert [p["name"] for p in parsed["ports"]] == ["uplink to core", None]
+    assert (parsed["connected"], parsed["notconnect"]) == (1, 1)
+    assert parsed["ports"][0]["vlan"] == "trunk"
+
+
+def test_ip_route():
+    parsed = parse_ip_route(
+        "Gateway of last resort is not set\n"
+        "C        10.0.0.0/31 is directly connected, Ethernet1/1\n"
+        "B        10.1.0.0/24 [20/0] via 10.0.0.1, 01:02:03\n")
+    assert parsed["count"] == 2
+    assert parsed["routes"][0]["connected"] and parsed["routes"][0]["interface"] == "Ethernet1/1"
+    assert parsed["routes"][1]["next_hop"] == "10.0.0.1"
+    assert (parsed["routes"][1]["admin_distance"], parsed["routes"][1]["interface"]) == (20, None)
+
+
+def test_parse_cache_keys_on_version():
+    cache = ParseCache(max_entries=1)
+    reads = []
+
+    def text():
+        reads.append(1)
+        return BGP
+    assert cache.get("leaf1", "show ip bgp summary", 1, text)["local_as"] == 65001
+    cache.get("leaf1", "show ip bgp summary", 1, text)
+    cache.get("leaf1", "show ip bgp summary", 2, text)
+    assert len(reads) == 2
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,22 @@
+# tests/test_pipe_filters.py
+import pytest
+
+from pipe_filters import FilterError, apply_filters, parse_command
+
+
+def test_alternation_stays_in_the_pattern():
+    base, filters = parse_command("show ip interface brief | include up|down")
+    assert base == "show ip interface brief"
+    assert filters == [("include", "up|down")]
+    lines = ["Gi0/1 up", "Gi0/2 down", "Gi0/3 admin"]
+    assert list(apply_filters(lines, filters)) == ["Gi0/1 up", "Gi0/2 down"]
+
+
+def test_chained_modifiers_and_prefixes():
+    assert parse_command("show running-config|inc interface | ex Loopback | c up") == (
+        "show running-config", [("include", "interface"), ("exclude", "Loopback"), ("count", "up")])
+
+
+def test_unknown_modifier():
+    with pytest.raises(FilterError):
+        parse_command("show version | bogus x")
@@ -0,0 +1,14 @@
+# tests/test_prompts.py
+from fleet_index import FIELDS
+from prompts import EXAMPLE_QUERY_FIELDS, build_planner_prompt, build_system_prompt
+
+
+def test_example_query_fields_match_the_server():
+    assert list(EXAMPLE_QUERY_FIELDS) == list(FIELDS)
+
+
+def test_prompts_list_the_given_query_fields():
+    for build in (build_system_prompt, build_planner_prompt):
+        text = build(("show version",), ("ip", "site"))
+        assert '"field": "ip|site"' in text
+        assert "neighbor_as" not in text
@@ -0,0 +1,85 @@
+# tests/test_snapshots.py
+import os
+import threading
+
+import pytest
+
+from mock_store import MockStore
+from snapshots import SnapshotError, SnapshotStore
+
+
+@pytest.fixture
+def fleet(make_fleet):
+    root = make_fleet({
+        "leaf1": {"show_version.txt": "Version 1\nuptime 1 day\n", "show_clock.txt": "12:00\n"},
+        "leaf2": {"show_version.txt": "Version 1\nuptime 1 day\n"},
+    })
+    return root, MockStore(root, poll_interval=0)
+
+
+def _rewrite(path, text):
+    path.write_text(text)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_identical_outputs_share_one_object(fleet, tmp_path):
+    _, store = fleet
+    snaps = SnapshotStore(tmp_path / "snaps")
+    first = snaps.take(store, label="base")
+    assert (first["id"], first["devices"], first["files"]) == ("000001", 2, 3)
+    # leaf1 and leaf2 have the same show version
+    assert first["new_objects"] == 2
+    second = snaps.take(store)
+    assert (second["id"], second["new_objects"]) == ("000002", 0)
+    assert snaps.counters["hash_reused"] == 3
+    assert [s["label"] for s in snaps.list()] == ["base", None]
+
+
+def test_ids_are_claimed_exclusively(fleet, tmp_path):
+    _, store = fleet
+    snaps = SnapshotStore(tmp_path / "snaps")
+    snaps.take(store, label="first")
+    # a second process that listed the directory before the first snapshot was written
+    other = SnapshotStore(tmp_path / "snaps")
+    other.ids = lambda: []
+    assert other.take(store, label="second")["id"] == "000002"
+    assert snaps.load("000001")["label"] == "first"
+
+
+def test_concurrent_stores_never_share_an_id(fleet, tmp_path):
+    _, store = fleet
+    stores = [SnapshotStore(tmp_path / "snaps") for _ in range(4)]
+    ids = []
+
+    def take(snaps):
+        for _ in range(5):
+            ids.append(snaps.take(store)["id"])
+    threads = [threading.Thread(target=take, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(ids) == [f"{i:06d}" for i in range(1, 21)]
+
+
+def test_diff_against_a_snapshot_and_the_live_store(fleet, tmp_path):
+    root, store = fleet
+    snaps = SnapshotStore(tmp_path / "snaps")
+    old_id = snaps.take(store)["id"]
+    _rewrite(root / "leaf1" / "show_version.txt", "Version 2\nuptime 1 day\n")
+    (root / "leaf2" / "show_version.txt").unlink()
+    live, _ = snaps.live_entries(store)
+    result = snaps.diff(snaps.load(old_id)["entries"], live, live_store=store)
+    assert {k: result[k] for k in ("compared", "unchanged", "changed", "added", "removed")} == {
+        "compared": 3, "unchanged": 1, "changed": 1, "added": 0, "removed": 1}
+    changed = next(r for r in result["results"] if r["status"] == "changed")
+    assert (changed["device"], changed["command"]) == ("leaf1", "show version")
+    assert "-Version 1" in changed["diff"] and "+Version 2" in changed["diff"]
+
+    new_id = snaps.take(store)["id"]
+    between = snaps.diff(snaps.load(old_id)["entries"], snaps.load(new_id)["entries"], device="leaf1")
+    assert [(r["device"], r["status"]) for r in between["results"]] == [("leaf1", "changed")]
+    assert snaps.resolve("previous") == old_id
+    with pytest.raises(SnapshotError):
+        snaps.resolve("000099")
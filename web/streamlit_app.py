@@ -1,38 +1,72 @@
 # web/streamlit_app.py
 import os
+import sys
 import json
-import requests
+import time
 import streamlit as st
-import re
 from datetime import datetime
+from pathlib import Path
+
+# shared helpers live next to the CLI agent
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "agent"))
+from decision_cache import DecisionCache
+from device_lookup import fleet_filters, list_devices, match_devices
+from intent_router import IntentRouter
+from http_client import HttpClient
+from json_extract import extract_json
+from ollama_stream import chat_until_decision, generate_until_decision
+from prompts import EXAMPLE_COMMANDS, EXAMPLE_QUERY_FIELDS, build_system_prompt, decision_messages, flatten_messages
+from tracing import span, spans_for, trace
+from ui_cache import Prefetcher, TtlCache
 
 # Config from env (when running locally set TOOL_SERVER=http://localhost:8000)
 TOOL_SERVER = os.environ.get("TOOL_SERVER", "http://localhost:8000")
 OLLAMA_API = os.environ.get("OLLAMA_API", "http://localhost:11434")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3")
+OLLAMA_STREAM = os.environ.get("OLLAMA_STREAM", "1") == "1"
+# same as the agent: pinned system message over /api/chat, model kept loaded between questions
+OLLAMA_CHAT = os.environ.get("OLLAMA_CHAT", "1") == "1"
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+DECISION_CACHE = os.environ.get("DECISION_CACHE", "1") == "1"
+DECISION_CACHE_PATH = os.environ.get(
+    "DECISION_CACHE_PATH", str(Path(__file__).resolve().parents[1] / "agent" / ".decision_cache.sqlite3"))
+# the inventory and tool results are reused across reruns and sessions for UI_CACHE_TTL seconds
+UI_CACHE_TTL = float(os.environ.get("UI_CACHE_TTL", "30"))
+# after a show on one device, fetch these for the same device in the background
+UI_PREFETCH = os.environ.get("UI_PREFETCH", "1") == "1"
+PREFETCH_COMMANDS = ["show ip interface brief", "show version", "show ip bgp summary", "show interfaces status"]
+# device names listed in the sidebar; the rest are counted
+SIDEBAR_DEVICES = int(os.environ.get("SIDEBAR_DEVICES", "20"))
 
-SYSTEM_PROMPT = """
-You are a careful network assistant. You may call:
-- inventory tool: POST /tool/inventory with {"name": "<optional device name>"}
-- run_show: POST /tool/run_show with {"device": "<name>", "command": "<allowed command>"}
-
-Rules:
-- Return ONLY a single JSON object when asked which tool to call.
-- The JSON must be exactly one of:
-  {"tool":"inventory","args":{"name": null}}
-  {"tool":"run_show","args":{"device":"leaf1","command":"show ip interface brief"}}
-- If the user mentions a device (e.g., leaf1) and a show-like verb, prefer run_show.
-"""
 
 # -----------------------
 # Helpers: Ollama, extractor, heuristics
 # -----------------------
-def ask_ollama_raw(prompt):
-    """Call Ollama and return raw text content (string)."""
+@st.cache_resource
+def get_http_client():
+    """Keep-alive session shared across reruns (per-endpoint timeouts, retries, metrics)."""
+    return HttpClient()
+
+def ask_ollama_raw(messages):
+    """Call Ollama with chat messages (flattened into a prompt when OLLAMA_CHAT=0) and return raw text."""
+    request = messages if OLLAMA_CHAT else flatten_messages(messages)
+    keep_alive = OLLAMA_KEEP_ALIVE or None
+    if OLLAMA_STREAM:
+        # stop generating as soon as one complete decision object has streamed in
+        stream_fn = chat_until_decision if OLLAMA_CHAT else generate_until_decision
+        try:
+            res = stream_fn(get_http_client(), OLLAMA_API, OLLAMA_MODEL, request, keep_alive=keep_alive)
+        except Exception as e:
+            return f"[ERROR] Ollama call failed: {e}"
+        st.session_state["ollama_timing"] = {k: v for k, v in res.items() if k not in ("raw", "decision")}
+        return res["raw"]
+    payload = {"model": OLLAMA_MODEL, "stream": False}
+    payload.update({"messages": request} if OLLAMA_CHAT else {"prompt": request})
+    if keep_alive:
+        payload["keep_alive"] = keep_alive
     try:
-        resp = requests.post(f"{OLLAMA_API}/api/generate",
-                             json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False},
-                             timeout=60)
+        resp = get_http_client().post(f"{OLLAMA_API}/api/chat" if OLLAMA_CHAT else f"{OLLAMA_API}/api/generate",
+                                      json=payload)
         resp.raise_for_status()
         data = resp.json()
     except Exception as e:
@@ -42,6 +76,8 @@ def ask_ollama_raw(prompt):
     if isinstance(data, dict):
         if "response" in data:
             return data["response"]
+        if isinstance(data.get("message"), dict):
+            return data["message"].get("content") or ""
         if "choices" in data and data["choices"]:
             c0 = data["choices"][0]
             if isinstance(c0, dict):
@@ -50,62 +86,33 @@ def ask_ollama_raw(prompt):
                 return msg or c0.get("text") or json.dumps(c0)
     return str(data)
 
-def extract_json_from_text(text):
-    """
-    Robust extractor to find JSON object inside free text or fenced markdown.
-    Returns dict or None.
-    """
-    if not text or not isinstance(text, str):
-        return None
-    t = text.strip()
-    # remove triple-backtick blocks and capture inside if present
-    m_fence = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", t, flags=re.IGNORECASE)
-    if m_fence:
-        candidate = m_fence.group(1).strip()
-    else:
-        # if intro lines exist, find first line that starts with '{'
-        if not t.lstrip().startswith("{"):
-            lines = t.splitlines()
-            for i, line in enumerate(lines):
-                if line.strip().startswith("{"):
-                    candidate = "\n".join(lines[i:]).strip()
-                    break
-            else:
-                candidate = t
-        else:
-            candidate = t
-
-    # find first {...} block
-    m = re.search(r'(\{[\s\S]*?\})', candidate)
-    if not m:
-        return None
-    json_text = m.group(1)
-    # attempt load; do small cleanups if necessary
-    try:
-        return json.loads(json_text)
-    except Exception:
-        cleaned = re.sub(r",\s*}", "}", json_text)
-        cleaned = re.sub(r",\s*\]", "]", cleaned)
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return None
+def is_multi_device(args):
+    """True when a run_show decision targets more than one device (list or glob)."""
+    targets = args.get("devices")
+    if targets is None:
+        targets = args.get("device")
+    if isinstance(targets, list):
+        return len(targets) > 1
+    return isinstance(targets, str) and any(ch in targets for ch in "*?[")
 
 def heuristics_coerce(parsed, user_question):
     """Ensure parsed decision is valid; coerce to run_show if user clearly asks for it."""
     user_lower = (user_question or "").lower()
-    # detect device tokens
-    device_token = None
-    for token in ["leaf1","leaf2","leaf3","leaf4","leaf5","spine1","spine2","spine3","spine4","spine5"]:
-        if token in user_lower:
-            device_token = token
-            break
+    # detect device tokens, or a fleet-wide phrase such as "all spines"
+    fleet = fleet_devices(fleet_filters(user_question))
+    mentioned = match_devices(user_question, device_names_by_lower())
+    device_token = mentioned[0] if mentioned else None
+    if fleet is None and len(mentioned) > 1:
+        fleet = mentioned
     wants_show = any(w in user_lower for w in ["show ", "interfaces", "interface", "bgp", "version", "running-config", "ospf", "vlan", "mac address"])
     if not isinstance(parsed, dict):
         parsed = {"tool":"inventory","args":{}}
     tool = parsed.get("tool")
     args = parsed.get("args") or {}
 
+    if tool == "query" and args.get("field") and args.get("value") not in (None, ""):
+        return {"tool":"query","args":{"field": args["field"], "value": str(args["value"])}}
+
     # Normalize tool
     if tool not in ("inventory","run_show"):
         # try inference
@@ -115,19 +122,133 @@ def heuristics_coerce(parsed, user_question):
             tool = "inventory"
 
     if tool == "run_show":
-        device = args.get("device") or device_token
         cmd = args.get("command") or "show ip interface brief"
+        if is_multi_device(args):
+            return {"tool":"run_show","args":{"devices": args.get("devices") or args.get("device"), "command": cmd}}
+        if not args.get("device") and fleet:
+            return {"tool":"run_show","args":{"devices": fleet, "command": cmd}}
+        device = args.get("device") or device_token
+        if not device and isinstance(args.get("devices"), list) and args["devices"]:
+            device = args["devices"][0]
         if not device:
             # fallback to inventory if no device could be inferred
             return {"tool":"inventory","args":{}}
         return {"tool":"run_show","args":{"device": device, "command": cmd}}
 
     # If model chose inventory but the user clearly wants a show on a device, coerce
+    if tool == "inventory" and wants_show and fleet:
+        return {"tool":"run_show","args":{"devices": fleet, "command": "show ip interface brief"}}
     if tool == "inventory" and wants_show and device_token:
         return {"tool":"run_show","args":{"device": device_token, "command": "show ip interface brief"}}
 
     return {"tool":"inventory","args": {"name": args.get("name") if args.get("name") else None}}
 
+@st.cache_resource
+def get_decision_cache():
+    if not DECISION_CACHE:
+        return None
+    return DecisionCache(DECISION_CACHE_PATH,
+                         ttl=float(os.environ.get("DECISION_CACHE_TTL", str(7 * 24 * 3600))),
+                         max_entries=int(os.environ.get("DECISION_CACHE_MAX", "10000")))
+
+@st.cache_data(ttl=UI_CACHE_TTL, show_spinner=False)
+def fetch_commands():
+    """/tool/commands result (allowed commands, structured parsers, query fields)."""
+    return get_http_client().post(f"{TOOL_SERVER}/tool/commands", json={}, timeout=6).json()["result"]
+
+@st.cache_resource
+def get_router(device_roles):
+    """Deterministic pre-LLM router, built once per (name, role) list (None if the command list is unavailable)."""
+    if os.environ.get("INTENT_ROUTER", "1") != "1":
+        return None
+    try:
+        cmds = fetch_commands()["commands"]
+    except Exception:
+        return None
+    return IntentRouter(cmds["cisco_ios"], [name for name, _ in device_roles], dict(device_roles))
+
+def get_system_prompt():
+    """Decision prompt listing the tool server's allowed commands and query fields (examples if it is unreachable)."""
+    try:
+        catalog = fetch_commands()
+        return build_system_prompt(tuple(catalog["commands"]["cisco_ios"]), tuple(catalog["query_fields"]))
+    except Exception:
+        return build_system_prompt(EXAMPLE_COMMANDS, EXAMPLE_QUERY_FIELDS)
+
+def get_structured_commands():
+    """Commands the tool server can return as parsed JSON (format=structured)."""
+    try:
+        return frozenset(fetch_commands().get("structured", []))
+    except Exception:
+        return frozenset()
+
+ROUTER_MIN_CONFIDENCE = float(os.environ.get("ROUTER_MIN_CONFIDENCE", "0.9"))
+
+@st.cache_resource
+def get_tool_cache():
+    return TtlCache(ttl=UI_CACHE_TTL)
+
+@st.cache_resource
+def get_prefetcher():
+    # own client so background requests do not count towards an interaction's backend calls
+    return Prefetcher(get_tool_cache()), HttpClient()
+
+@st.cache_data(ttl=UI_CACHE_TTL, show_spinner=False)
+def fetch_device_roles():
+    """(name, role) of every inventory device."""
+    return tuple((d["name"], d["role"]) for d in list_devices(get_http_client(), TOOL_SERVER, fields=("name", "role")))
+
+@st.cache_data(ttl=UI_CACHE_TTL, show_spinner=False)
+def fetch_role_devices(role):
+    return [d["name"] for d in list_devices(get_http_client(), TOOL_SERVER, role=role)]
+
+def fleet_devices(filters):
+    """Devices for fleet_filters() output: "*" for every device, the role's devices, or None."""
+    if filters is None:
+        return None
+    if not filters:
+        return "*"
+    try:
+        return fetch_role_devices(filters["role"])
+    except Exception:
+        return None
+
+@st.cache_data(ttl=UI_CACHE_TTL, show_spinner=False)
+def device_names_by_lower():
+    """The inventory as {lower name: name}, for finding the devices a question names."""
+    try:
+        return {name.lower(): name for name, _ in fetch_device_roles()}
+    except Exception:
+        return {}
+
+def _is_ok(res):
+    return isinstance(res, dict) and bool(res.get("ok"))
+
+def tool_key(path, body):
+    return (path, json.dumps(body, sort_keys=True))
+
+def post_tool(path, body, client=None, headers=None):
+    try:
+        return (client or get_http_client()).post(f"{TOOL_SERVER}{path}", json=body, headers=headers).json()
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+def cached_tool(path, body):
+    """Tool call through the shared TTL cache; only successful results are kept."""
+    return get_tool_cache().get_or_fetch(tool_key(path, body), lambda: post_tool(path, body), _is_ok)
+
+def prefetch_device(device, current_command, structured=False):
+    """Queue likely follow-up shows (and their parsed form) for device; returns how many were scheduled."""
+    prefetcher, client = get_prefetcher()
+    bodies = [{"device": device, "command": cmd} for cmd in PREFETCH_COMMANDS if cmd != current_command]
+    if structured:
+        parsers = get_structured_commands()
+        bodies += [dict(b, format="structured") for b in bodies if b["command"] in parsers]
+    jobs = [(tool_key("/tool/run_show", body),
+             lambda body=body: post_tool("/tool/run_show", body, client, {"X-Prefetch": "1"}))
+            for body in bodies]
+    return prefetcher.submit(jobs, _is_ok)
+
 # -----------------------
 # Streamlit UI
 # -----------------------
@@ -140,14 +261,24 @@ st.sidebar.markdown(f"**Tool server:** {TOOL_SERVER}")
 st.sidebar.markdown(f"**Ollama API:** {OLLAMA_API}")
 force_run_show = st.sidebar.checkbox("Force run_show (bypass LLM)", value=False)
 show_raw_llm = st.sidebar.checkbox("Show raw LLM response", value=True)
+show_structured = st.sidebar.checkbox("Show parsed fields (supported commands)", value=True)
+# filled in at the end of the run with the requests this interaction made
+calls_at_start = get_http_client().metrics()["requests"]
+calls_box = st.sidebar.empty()
+with st.sidebar.expander("HTTP client metrics"):
+    st.json(get_http_client().metrics())
 
 # device list preview
 try:
-    inv = requests.post(f"{TOOL_SERVER}/tool/inventory", json={}, timeout=6).json()
-    devices = [d["name"] for d in inv.get("result", [])] if inv.get("ok") else []
+    device_roles = fetch_device_roles()
 except Exception:
-    devices = ["leaf1","leaf2","leaf3","leaf4","leaf5","spine1","spine2","spine3","spine4","spine5"]
-st.sidebar.markdown("**Detected devices:** " + ", ".join(devices))
+    device_roles = ()
+devices = [name for name, _ in device_roles]
+if devices:
+    more = f", ... and {len(devices) - SIDEBAR_DEVICES} more" if len(devices) > SIDEBAR_DEVICES else ""
+    st.sidebar.markdown(f"**Detected devices ({len(devices)}):** " + ", ".join(devices[:SIDEBAR_DEVICES]) + more)
+else:
+    st.sidebar.markdown("**Detected devices:** inventory unavailable")
 
 sample_queries = [
     "List all devices",
@@ -159,46 +290,111 @@ sample_queries = [
 if st.sidebar.button("Fill sample query"):
     st.session_state['user_query'] = sample_queries[0]
 
-# Main area
-user_query = st.text_input("Ask the network agent (example: 'Show ip interface brief on leaf1')", key="user_query")
-
-# When user submits
-if st.button("Send") or (user_query and st.session_state.get('user_query') == user_query):
-    q = (user_query or "").strip()
-    if not q:
+# Main area: nothing runs until the form is submitted; the last question is then re-rendered
+# on every rerun from the decision memo and the tool-result cache
+with st.form("ask"):
+    st.text_input("Ask the network agent (example: 'Show ip interface brief on leaf1')", key="user_query")
+    submitted = st.form_submit_button("Send")
+if submitted:
+    st.session_state["active_query"] = (st.session_state.get("user_query") or "").strip()
+    if not st.session_state["active_query"]:
         st.warning("Type a question first.")
-    else:
-        st.info(f"Query submitted: {q}")
-        # determine decision: either force or LLM-based
-        if force_run_show:
+q = st.session_state.get("active_query")
+# question -> decision for this session, so reruns never repeat routing or the LLM call
+decision_memo = st.session_state.setdefault("decision_memo", {})
+
+if q:
+    with trace() as trace_id:
+        st.info(f"Query: {q}")
+        memo_key = (q, force_run_show)
+        memo = decision_memo.get(memo_key)
+        if memo is not None:
+            decision = memo["decision"]
+            st.sidebar.success(f"Decision memo hit ({memo['source']})")
+            if show_raw_llm and memo.get("raw"):
+                st.sidebar.subheader("LLM raw response")
+                st.sidebar.code(memo["raw"][:4000])
+        elif force_run_show:
             decision = {"tool":"run_show","args":{"device": devices[0] if devices else "leaf1", "command":"show ip interface brief"}}
             st.sidebar.success("DEBUG: forced run_show")
+            decision_memo[memo_key] = {"decision": decision, "source": "forced"}
         else:
-            prompt = SYSTEM_PROMPT + "\n\nUser: " + q + "\n\nRespond with the exact JSON object only."
-            raw = ask_ollama_raw(prompt)
-            if show_raw_llm:
-                st.sidebar.subheader("LLM raw response")
-                st.sidebar.code(raw[:4000])
-            parsed = extract_json_from_text(raw)
-            final_decision = heuristics_coerce(parsed, q)
-            decision = final_decision
+            cache = get_decision_cache()
+            system = get_system_prompt()
+            router = get_router(device_roles)
+            routed = router.route(q) if router is not None else {"decision": None}
+            decision, source, raw = None, None, None
+            if routed["decision"] is not None and routed["confidence"] >= ROUTER_MIN_CONFIDENCE:
+                decision, source = routed["decision"], "router"
+                st.sidebar.success(f"Routed without LLM ({routed['reason']})")
+            elif cache is not None:
+                decision = cache.get(q, OLLAMA_MODEL, system)
+                if decision is not None:
+                    source = "decision cache"
+                    st.sidebar.success("Decision cache hit (LLM skipped)")
+            if decision is None:
+                messages = decision_messages(system, q)
+                t0 = time.perf_counter()
+                with span("ollama", prompt_bytes=len(flatten_messages(messages))) as attrs:
+                    raw = ask_ollama_raw(messages)
+                    attrs["response_bytes"] = len(raw)
+                with span("extract_json", bytes=len(raw)):
+                    parsed = extract_json(raw)
+                llm_latency = time.perf_counter() - t0
+                if show_raw_llm:
+                    st.sidebar.subheader("LLM raw response")
+                    st.sidebar.code(raw[:4000])
+                if OLLAMA_STREAM and st.session_state.get("ollama_timing"):
+                    st.sidebar.caption("Ollama timing: " + json.dumps(st.session_state["ollama_timing"]))
+                with span("coerce"):
+                    decision = heuristics_coerce(parsed, q)
+                source = "llm"
+                # only cache what the LLM produced, not the heuristic fallback
+                if cache is not None and parsed is not None:
+                    cache.put(q, OLLAMA_MODEL, system, decision, llm_latency)
+            decision_memo[memo_key] = {"decision": decision, "source": source, "raw": raw}
             st.sidebar.subheader("LLM decision (after extraction & coercion)")
             st.sidebar.code(json.dumps(decision, indent=2))
+            if cache is not None:
+                st.sidebar.caption("Decision cache: " + json.dumps(cache.stats()))
 
         # execute the tool
         tool = decision.get("tool")
         args = decision.get("args", {})
 
         if tool == "inventory":
-            try:
-                res = requests.post(f"{TOOL_SERVER}/tool/inventory", json={"name": args.get("name")}, timeout=10).json()
-                if res.get("ok"):
-                    st.success("Inventory result")
+            res = cached_tool("/tool/inventory", {"name": args.get("name")})
+            if res.get("ok"):
+                st.success("Inventory result")
+                st.json(res)
+            else:
+                st.error("Inventory error: " + str(res.get("error")))
+        elif tool == "query":
+            res = cached_tool("/tool/query", args)
+            if res.get("ok"):
+                result = res["result"]
+                st.success(f"{result['count']} devices with {result['field']} = {result['value']}")
+                st.dataframe(result["matches"])
+                if result["truncated"]:
+                    st.caption(f"Showing the first {len(result['devices'])} devices.")
+            else:
+                st.error("Query error: " + str(res.get("error")))
+        elif tool == "run_show" and is_multi_device(args):
+            targets = args.get("devices") or args.get("device")
+            cmd = args.get("command")
+            res = cached_tool("/tool/run_show_batch", {"devices": targets, "commands": [cmd]})
+            if not res.get("ok"):
+                st.error("Tool error: " + str(res.get("error")))
+            else:
+                st.success(f"Command executed on {res['count'] - res['errors']} of {res['count']} devices")
+                for item in res["results"]:
+                    st.subheader(f"{item.get('device')}: {item.get('command')}")
+                    if item.get("ok"):
+                        st.code("\n".join(item.get("output", "").splitlines()[:20]))
+                    else:
+                        st.error(str(item.get("error")))
+                with st.expander("Full evidence (raw JSON)"):
                     st.json(res)
-                else:
-                    st.error("Inventory error: " + str(res.get("error")))
-            except Exception as e:
-                st.error("Error calling inventory: " + str(e))
         elif tool == "run_show":
             dev = args.get("device")
             cmd = args.get("command")
@@ -206,24 +402,77 @@ if st.button("Send") or (user_query and st.session_state.get('user_query') == us
                 st.error("No device specified in decision.")
             else:
                 try:
-                    resp = requests.post(f"{TOOL_SERVER}/tool/run_show", json={"device": dev, "command": cmd}, timeout=20)
-                    st.sidebar.write("HTTP status:", resp.status_code)
-                    try:
-                        res = resp.json()
-                    except Exception as e:
-                        st.error("Failed to parse tool_server response as JSON: " + str(e))
-                        st.code(resp.text[:2000])
-                        res = {"ok": False, "error": "invalid json"}
-                    if not res.get("ok"):
-                        st.error("Tool error: " + str(res.get("error")))
+                    key = tool_key("/tool/run_show", {"device": dev, "command": cmd})
+                    tool_cache = get_tool_cache()
+                    res = tool_cache.get(key)
+                    if res is None and tool_cache.in_flight(key):
+                        # a prefetch is already fetching it
+                        res = cached_tool("/tool/run_show", {"device": dev, "command": cmd})
+                    if res is not None:
+                        st.sidebar.caption("Tool result from cache")
+                        if not res.get("ok"):
+                            st.error("Tool error: " + str(res.get("error")))
+                        else:
+                            st.success(f"Command executed on {dev}")
+                            st.subheader("Short summary")
+                            st.code("\n".join(res.get("output", "").splitlines()[:20]))
                     else:
-                        st.success(f"Command executed on {dev}")
-                        st.subheader("Short summary")
-                        out = res.get("output","")
-                        st.code("\n".join(out.splitlines()[:20]))
+                        # NDJSON stream: render the summary as soon as the first frames arrive
+                        resp = get_http_client().post(f"{TOOL_SERVER}/tool/run_show",
+                                                      json={"device": dev, "command": cmd, "stream": "ndjson"},
+                                                      stream=True)
+                        st.sidebar.write("HTTP status:", resp.status_code,
+                                         "| server trace:", resp.headers.get("X-Correlation-ID"))
+                        if resp.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                            res, lines, done = {"ok": True, "device": dev, "command": cmd}, [], False
+                            st.success(f"Command executed on {dev}")
+                            st.subheader("Short summary")
+                            summary = st.empty()
+                            for raw_frame in resp.iter_lines(decode_unicode=True):
+                                if not raw_frame:
+                                    continue
+                                frame = json.loads(raw_frame)
+                                if "lines" in frame and isinstance(frame["lines"], list):
+                                    before = len(lines)
+                                    lines.extend(frame["lines"])
+                                    if before < 20:
+                                        summary.code("\n".join(lines[:20]))
+                                done = done or bool(frame.get("done"))
+                            res["output"] = "\n".join(lines)
+                            if done:
+                                tool_cache.put(key, res)
+                        else:
+                            try:
+                                res = resp.json()
+                            except Exception as e:
+                                st.error("Failed to parse tool_server response as JSON: " + str(e))
+                                st.code(resp.text[:2000])
+                                res = {"ok": False, "error": "invalid json"}
+                            if not res.get("ok"):
+                                st.error("Tool error: " + str(res.get("error")))
+                            else:
+                                st.success(f"Command executed on {dev}")
+                                st.subheader("Short summary")
+                                st.code("\n".join(res.get("output", "").splitlines()[:20]))
+                    if res.get("ok") and UI_PREFETCH:
+                        prefetch_device(dev, cmd, structured=show_structured)
+                    if res.get("ok") and show_structured and cmd in get_structured_commands():
+                        parsed = cached_tool("/tool/run_show", {"device": dev, "command": cmd, "format": "structured"})
+                        if parsed.get("ok"):
+                            st.subheader("Parsed")
+                            st.json(parsed["parsed"])
+                    if res.get("ok"):
                         with st.expander("Full evidence (raw JSON)"):
                             st.json(res)
                 except Exception as e:
                     st.error("Request to tool_server failed: " + str(e))
         else:
-            st.error("Unknown tool returned by LLM: " + str(tool))
\ No newline at end of file
+            st.error("Unknown tool returned by LLM: " + str(tool))
+        spans = spans_for(trace_id)
+        with st.sidebar.expander(f"Trace {trace_id} ({len(spans)} spans)"):
+            st.dataframe([{k: v for k, v in s.items() if k != "trace_id"} for s in spans])
+
+prefetcher = get_prefetcher()[0]
+calls_box.caption(f"Backend calls this interaction: {get_http_client().metrics()['requests'] - calls_at_start} "
+                  f"(prefetched in background so far: {prefetcher.submitted}); "
+                  f"tool cache: {json.dumps(get_tool_cache().stats())}")
@@ -0,0 +1,107 @@
+# web/ui_cache.py
+"""
+Caches shared by all Streamlit sessions (held via st.cache_resource):
+- TtlCache: tool-server results by request, expiring after a TTL, with one fetch in flight per key
+- Prefetcher: fills the cache from background threads with likely follow-up requests
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TtlCache:
+    def __init__(self, ttl=30.0, max_entries=2048):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Event set when the fetch finishes
+        self.counters = {"hits": 0, "misses": 0, "fetches": 0, "expired": 0, "waited": 0}
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            self.counters["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key, fetch, cacheable=lambda value: True):
+        """
+        Cached value for key, else fetch() (stored when cacheable(value)). A caller that finds
+        the same key already being fetched, e.g. by a prefetch, waits for it instead.
+        """
+        while True:
+            with self._lock:
+                value = self._get(key)
+                if value is not None:
+                    self.counters["hits"] += 1
+                    return value
+                pending = self._inflight.get(key)
+                if pending is None:
+                    self._inflight[key] = threading.Event()
+                    self.counters["misses"] += 1
+                    break
+                self.counters["waited"] += 1
+            # then re-check: if that fetch was not cacheable, this caller fetches itself
+            pending.wait()
+        try:
+            with self._lock:
+                self.counters["fetches"] += 1
+            value = fetch()
+            if cacheable(value):
+                self.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._inflight
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), ttl=self.ttl)
+
+
+class Prefetcher:
+    """Run fetches for keys that are neither cached nor in flight on a small thread pool."""
+
+    def __init__(self, cache, workers=2):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui-prefetch")
+        self.submitted = 0
+
+    def submit(self, jobs, cacheable=lambda value: True):
+        """jobs: [(key, fetch), ...]; returns how many were scheduled."""
+        scheduled = 0
+        for key, fetch in jobs:
+            if self.cache.get(key) is not None or self.cache.in_flight(key):
+                continue
+            self._pool.submit(self._run, key, fetch, cacheable)
+            scheduled += 1
+        self.submitted += scheduled
+        return scheduled
+
+    def _run(self, key, fetch, cacheable):
+        try:
+            self.cache.get_or_fetch(key, fetch, cacheable)
+        except Exception:
+            # a failed prefetch only means the foreground request fetches it itself
+            pass